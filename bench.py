@@ -0,0 +1,323 @@
+"""Benchmark harness: trigger throughput, dashboard latency, log reads.
+
+Runs the app in-process against the embedded SQLite backend and the native
+scheduler, with config, logs and database in a throwaway directory, so it
+needs no network, crontab or PostgreSQL. Results are printed (or written
+with --out) as one JSON document, tagged with the git commit, so runs on
+different commits can be diffed.
+
+    python bench.py                       # full suite
+    python bench.py --quick --out b.json  # smaller sizes, for a fast check
+
+Requires httpx (already installed alongside FastAPI's TestClient).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+
+
+def _stats(samples: list[float]) -> dict[str, float]:
+    """Summary of latencies in milliseconds."""
+    ms = sorted(s * 1000 for s in samples)
+    if not ms:
+        return {}
+
+    def pct(q: float) -> float:
+        return round(ms[min(len(ms) - 1, int(q * len(ms)))], 3)
+
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ── Fixtures ──────────────────────────────────────────────────
+
+def write_jobs(config_dir: Path, scripts_dir: Path, count: int, prefix: str,
+               warm: bool = False) -> list[str]:
+    """Write `count` synthetic job YAMLs that never fire on their own."""
+    import yaml
+
+    script = scripts_dir / "stamp.py"
+    if not script.exists():
+        # First line of the log is the wall-clock time the script started
+        script.write_text("import time\nprint(repr(time.time()), flush=True)\n")
+    ids = []
+    for i in range(count):
+        job_id = f"{prefix}{i:05d}"
+        data = {
+            "id": job_id,
+            "name": f"bench {prefix} {i}",
+            "script_path": str(script),
+            "schedule": {"frequency": "custom", "cron_expression": "0 0 1 1 *"},
+            "timeout_seconds": 60,
+            "warm": warm,
+        }
+        with open(config_dir / f"{job_id}.yaml", "w") as f:
+            yaml.dump(data, f, default_flow_style=False)
+        ids.append(job_id)
+    return ids
+
+
+async def seed_runs(job_ids: list[str], per_job: int):
+    """Give every job a finished run history for the dashboard to read."""
+    import db
+    from models import RunRecord, RunStatus, TriggerType
+
+    now = datetime.now(timezone.utc)
+    batch = []
+    for job_id in job_ids:
+        for i in range(per_job):
+            started = now - timedelta(minutes=i + 1)
+            batch.append(RunRecord(
+                id=f"{job_id}-{i}", job_id=job_id, trigger=TriggerType.scheduled,
+                status=RunStatus.success if i % 5 else RunStatus.failed,
+                started_at=started, finished_at=started + timedelta(seconds=1),
+                duration_ms=1000, exit_code=0 if i % 5 else 1,
+            ))
+            if len(batch) >= 1000:
+                await db._store.upsert_runs(batch)
+                batch = []
+    if batch:
+        await db._store.upsert_runs(batch)
+
+
+# ── Benchmarks ────────────────────────────────────────────────
+
+async def bench_jobs_list(client, config_dir: Path, scripts_dir: Path, sizes: list[int],
+                          requests: int, runs_per_job: int) -> list[dict]:
+    """GET /api/jobs latency as the number of jobs grows, plain and conditional."""
+    import registry
+
+    results = []
+    existing = 0
+    for size in sizes:
+        ids = write_jobs(config_dir, scripts_dir, size - existing, prefix=f"list{size}_")
+        existing = size
+        registry.refresh(force=True)
+        await seed_runs(ids, runs_per_job)
+        await client.get("/api/jobs")  # warm caches
+        samples = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            resp = await client.get("/api/jobs")
+            samples.append(time.perf_counter() - t0)
+            resp.raise_for_status()
+        etag = resp.headers["etag"]
+        conditional = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            await client.get("/api/jobs", headers={"If-None-Match": etag})
+            conditional.append(time.perf_counter() - t0)
+        results.append({"jobs": len(registry.all_jobs()), **_stats(samples),
+                        "not_modified": _stats(conditional)})
+    return results
+
+
+async def bench_triggers(client, config_dir: Path, scripts_dir: Path, burst: int, jobs: int,
+                         warm: bool) -> dict:
+    """Fire `burst` manual runs at once and time them through to exec."""
+    import db
+    import executor
+    import logstore
+    import registry
+
+    ids = write_jobs(config_dir, scripts_dir, jobs, prefix="trig_warm_" if warm else "trig_", warm=warm)
+    registry.refresh(force=True)
+
+    async def fire(job_id: str) -> tuple[float, float, str]:
+        sent = time.time()
+        resp = await client.post(f"/api/jobs/{job_id}/run")
+        resp.raise_for_status()
+        return sent, time.time() - sent, resp.json()["run_id"]
+
+    wall = time.perf_counter()
+    fired = await asyncio.gather(*(fire(ids[i % len(ids)]) for i in range(burst)))
+    while executor._active_count() or executor.queue_depth():
+        await asyncio.sleep(0.01)
+    wall = time.perf_counter() - wall
+    await db.flush()
+
+    exec_lag = []
+    failed = 0
+    for sent, _, run_id in fired:
+        run = await db.get_run(run_id)
+        try:
+            _, head = logstore.read_range(Path(run.log_file), 0, 64)
+            exec_lag.append(float(head.split(b"\n", 1)[0]) - sent)
+        except (FileNotFoundError, ValueError):
+            failed += 1
+    return {
+        "burst": burst,
+        "jobs": jobs,
+        "warm": warm,
+        "max_concurrency": executor.MAX_CONCURRENCY,
+        "wall_s": round(wall, 3),
+        "runs_per_s": round(burst / wall, 2),
+        "failed": failed,
+        "post_latency": _stats([lat for _, lat, _ in fired]),
+        "trigger_to_exec": _stats(exec_lag),
+    }
+
+
+async def bench_logs(client, log_mb: int, requests: int) -> dict:
+    """Read a large log whole, in ranged pages and by tail, plain and compressed."""
+    import db
+    import executor
+    import logstore
+    from models import RunRecord, RunStatus, TriggerType
+
+    run_id = "benchlog00000"
+    path = executor.log_file_path(run_id)
+    line = b"2024-01-01T00:00:00 INFO bench worker processed item with some payload text\n"
+    with open(path, "wb") as f:
+        chunk = line * (1024 * 1024 // len(line))
+        for _ in range(log_mb):
+            f.write(chunk)
+    now = datetime.now(timezone.utc)
+    await db._store.upsert_runs([RunRecord(
+        id=run_id, job_id="benchlog", status=RunStatus.success, trigger=TriggerType.manual,
+        started_at=now, finished_at=now, duration_ms=0, exit_code=0, log_file=str(path),
+    )])
+
+    async def measure() -> dict:
+        size = logstore.file_size(path)
+        t0 = time.perf_counter()
+        resp = await client.get(f"/api/runs/{run_id}/log")
+        full = time.perf_counter() - t0
+        assert len(resp.content) == size
+        page = 1024 * 1024
+        t0 = time.perf_counter()
+        offset = 0
+        while offset < size:
+            resp = await client.get(f"/api/runs/{run_id}/log", params={"offset": offset, "limit": page})
+            offset = int(resp.headers["X-Log-Next-Offset"])
+        ranged = time.perf_counter() - t0
+        tails = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            await client.get(f"/api/runs/{run_id}/log", params={"tail": 1000})
+            tails.append(time.perf_counter() - t0)
+        return {
+            "full_mb_per_s": round(size / 1e6 / full, 1),
+            "ranged_1mb_pages_mb_per_s": round(size / 1e6 / ranged, 1),
+            "tail_1000_lines": _stats(tails),
+        }
+
+    plain_bytes = path.stat().st_size
+    plain = await measure()
+    t0 = time.perf_counter()
+    logstore.compress_log(path)
+    compress_s = time.perf_counter() - t0
+    gz_bytes = logstore._gz_path(path).stat().st_size
+    compressed = await measure()
+    return {
+        "log_mb": log_mb,
+        "plain": plain,
+        "compressed": {**compressed, "ratio": round(plain_bytes / gz_bytes, 1),
+                       "compress_mb_per_s": round(plain_bytes / 1e6 / compress_s, 1)},
+    }
+
+
+# ── Driver ────────────────────────────────────────────────────
+
+async def run(args) -> dict:
+    import httpx
+
+    import main
+
+    results: dict = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": vars(args),
+    }
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            scripts_dir = Path(os.environ["CRONUI_CONFIG_DIR"]).parent / "scripts"
+            scripts_dir.mkdir(exist_ok=True)
+            config_dir = Path(os.environ["CRONUI_CONFIG_DIR"])
+            results["jobs_list"] = await bench_jobs_list(
+                client, config_dir, scripts_dir, args.jobs, args.requests, args.runs_per_job)
+            results["triggers"] = await bench_triggers(
+                client, config_dir, scripts_dir, args.burst, args.trigger_jobs, warm=False)
+            results["triggers_warm"] = await bench_triggers(
+                client, config_dir, scripts_dir, args.burst, args.trigger_jobs, warm=True)
+            results["logs"] = await bench_logs(client, args.log_mb, args.requests)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastCronUI benchmark harness")
+    parser.add_argument("--jobs", default="10,100,1000",
+                        help="comma-separated job counts for /api/jobs latency")
+    parser.add_argument("--requests", type=int, default=200, help="requests per latency sample")
+    parser.add_argument("--runs-per-job", type=int, default=20, help="seeded run history per job")
+    parser.add_argument("--burst", type=int, default=200, help="runs fired at once")
+    parser.add_argument("--trigger-jobs", type=int, default=20, help="jobs the burst is spread over")
+    parser.add_argument("--concurrency", type=int, default=16, help="CRONUI_MAX_CONCURRENCY")
+    parser.add_argument("--log-mb", type=int, default=64, help="size of the large log")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a fast check")
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    # --quick only changes the defaults; sizes given explicitly still win
+    if parser.parse_known_args()[0].quick:
+        parser.set_defaults(jobs="10,100", requests=50, burst=40, log_mb=8)
+    args = parser.parse_args()
+    args.jobs = [int(n) for n in str(args.jobs).split(",")]
+
+    with tempfile.TemporaryDirectory(prefix="cronui-bench-") as tmp:
+        root = Path(tmp)
+        for name in ("config", "logs"):
+            (root / name).mkdir()
+        # Must be set before the app modules are imported
+        os.environ.update({
+            "CRONUI_DB": "sqlite",
+            "CRONUI_SQLITE_PATH": str(root / "bench.db"),
+            "CRONUI_SCHEDULER": "native",
+            "CRONUI_CONFIG_DIR": str(root / "config"),
+            "CRONUI_LOGS_DIR": str(root / "logs"),
+            "CRONUI_MAX_CONCURRENCY": str(args.concurrency),
+            "CRONUI_MAX_QUEUE": str(max(args.burst, 1000)),
+            "CRONUI_RETENTION_DAYS": "0",
+        })
+        sys.path.insert(0, str(BASE_DIR))
+        results = asyncio.run(run(args))
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+        print(f"[CRONUI] Benchmark results written to {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Compiled 5-field cron expressions.
+
+Each field is stored as an int bitset, so matching is a bit test and the
+next fire time is found by jumping field by field instead of scanning
+minute by minute. Times are naive local datetimes, like cron itself.
+"""
+from __future__ import annotations
+
+import calendar
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+_MONTH_NAMES = {
+    name.lower(): i for i, name in enumerate(calendar.month_abbr) if name
+}
+_DOW_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+
+# (low, high, names) per field: minute, hour, day of month, month, day of week
+_FIELDS = [
+    (0, 59, {}),
+    (0, 23, {}),
+    (1, 31, {}),
+    (1, 12, _MONTH_NAMES),
+    (0, 7, _DOW_NAMES),
+]
+
+# Longest gap between matches is Feb 29 on a leap year skipped by the
+# Gregorian century rule; 9 years of months covers it.
+_MAX_MONTHS = 12 * 9
+
+
+def _next_bit(mask: int, start: int) -> Optional[int]:
+    """Lowest set bit position >= start, or None."""
+    m = mask >> start
+    if not m:
+        return None
+    return start + (m & -m).bit_length() - 1
+
+
+def _value(token: str, names: dict[str, int]) -> int:
+    token = token.lower()
+    if token in names:
+        return names[token]
+    return int(token)
+
+
+def _parse_field(spec: str, low: int, high: int, names: dict[str, int]) -> int:
+    mask = 0
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_s = part.split("/", 1)
+            step = int(step_s)
+            if step < 1:
+                raise ValueError(f"Invalid step in cron field: {spec!r}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = _value(a, names), _value(b, names)
+        else:
+            start = _value(part, names)
+            # "5/15" means "from 5 to the end, every 15"
+            end = high if step > 1 else start
+        if not (low <= start <= high and low <= end <= high) or start > end:
+            raise ValueError(f"Cron field {spec!r} out of range {low}-{high}")
+        for v in range(start, end + 1, step):
+            mask |= 1 << v
+    return mask
+
+
+class CronExpr:
+    """A parsed cron expression with one bitset per field."""
+
+    __slots__ = ("expr", "minutes", "hours", "doms", "months", "dows",
+                 "_dom_any", "_dow_any", "_first_minute")
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression must have exactly 5 fields, got {len(fields)}")
+        self.expr = " ".join(fields)
+        masks = [_parse_field(f, *spec) for f, spec in zip(fields, _FIELDS)]
+        self.minutes, self.hours, self.doms, self.months, dows = masks
+        # 7 is an alias for Sunday
+        if dows & (1 << 7):
+            dows = (dows | 1) & 0x7F
+        self.dows = dows
+        # cron ORs day-of-month and day-of-week when both are restricted and
+        # ANDs them when either starts with "*" (so "*/5" keeps its step)
+        self._dom_any = fields[2].startswith("*")
+        self._dow_any = fields[4].startswith("*")
+        self._first_minute = _next_bit(self.minutes, 0)
+
+    def __repr__(self) -> str:
+        return f"CronExpr({self.expr!r})"
+
+    def _day_mask(self, year: int, month: int) -> int:
+        """Bitset (bit N = day N) of days in the month that match."""
+        first_wd, ndays = calendar.monthrange(year, month)
+        valid = ((1 << ndays) - 1) << 1
+        # calendar uses Mon=0; cron uses Sun=0
+        first_wd = (first_wd + 1) % 7
+        pattern = 0
+        for i in range(7):
+            if self.dows >> ((first_wd + i) % 7) & 1:
+                pattern |= 1 << i
+        dow_days = 0
+        for week in range(5):
+            dow_days |= pattern << (week * 7)
+        dow_days = (dow_days << 1) & valid
+        dom_days = self.doms & valid
+
+        if self._dom_any or self._dow_any:
+            return dom_days & dow_days
+        return dom_days | dow_days
+
+    def matches(self, dt: datetime) -> bool:
+        return (
+            bool(self.minutes >> dt.minute & 1)
+            and bool(self.hours >> dt.hour & 1)
+            and bool(self.months >> dt.month & 1)
+            and bool(self._day_mask(dt.year, dt.month) >> dt.day & 1)
+        )
+
+    def next_after(self, dt: datetime) -> Optional[datetime]:
+        """First matching minute strictly after `dt`, or None if none exists."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        year, month, day, hour, minute = t.year, t.month, t.day, t.hour, t.minute
+
+        for _ in range(_MAX_MONTHS):
+            m = _next_bit(self.months, month)
+            if m is None:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if m != month:
+                month, day, hour, minute = m, 1, 0, 0
+
+            days = self._day_mask(year, month)
+            d = _next_bit(days, day)
+            while d is not None:
+                if d != day:
+                    day, hour, minute = d, 0, 0
+                h = _next_bit(self.hours, hour)
+                if h is not None:
+                    mi = _next_bit(self.minutes, minute if h == hour else 0)
+                    if mi is None:
+                        h = _next_bit(self.hours, h + 1)
+                        mi = self._first_minute
+                    if h is not None:
+                        return datetime(year, month, d, h, mi)
+                day, hour, minute = d + 1, 0, 0
+                d = _next_bit(days, day)
+
+            month, day, hour, minute = month + 1, 1, 0, 0
+            if month > 12:
+                year, month = year + 1, 1
+        return None
+
+    def next_fire(self, ts: float) -> Optional[float]:
+        """Next fire time after epoch seconds `ts`, as epoch seconds."""
+        nxt = self.next_after(datetime.fromtimestamp(ts))
+        return nxt.timestamp() if nxt else None
+
+
+@lru_cache(maxsize=4096)
+def parse(expr: str) -> CronExpr:
+    """Compile `expr`, sharing one CronExpr per distinct expression."""
+    return CronExpr(expr)
@@ -0,0 +1,134 @@
+"""Job dependencies: start downstream jobs when their upstreams succeed.
+
+A job lists its upstream job ids in `depends_on`. When a run of an upstream
+finishes with success, every enabled downstream whose upstreams have all
+succeeded since its last dependency trigger is handed to executor.run_job
+right away, so a pipeline takes as long as its critical path and
+independent branches run in parallel under the executor's limits.
+
+Which upstreams have succeeded is kept in memory only; after a restart a
+fan-in job waits for each of its upstreams to succeed again. Cycles are
+rejected when jobs are saved; a cycle introduced by editing YAML by hand
+is logged and its jobs are never triggered by dependency.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Iterable, Optional
+
+import executor
+import registry
+from models import JobConfig, RunStatus, TriggerType
+
+# downstream job id -> upstream ids that have succeeded since its last trigger
+_satisfied: dict[str, set[str]] = {}
+_tasks: set[asyncio.Task] = set()
+
+# Index of the registry's job list it was built from (rebuilt on change)
+_indexed: Optional[list[JobConfig]] = None
+# upstream job id -> downstream jobs
+_downstream: dict[str, list[JobConfig]] = {}
+# Jobs on a dependency cycle
+_cyclic: set[str] = set()
+
+
+def start():
+    executor.add_finish_listener(_on_finish)
+
+
+def stop():
+    executor.remove_finish_listener(_on_finish)
+
+
+def find_cycle(jobs: dict[str, JobConfig]) -> Optional[list[str]]:
+    """A dependency cycle as [a, b, ..., a], or None if the graph is a DAG."""
+    state: dict[str, int] = {}  # 1 = on the current path, 2 = done
+    for root in jobs:
+        if root in state:
+            continue
+        path = [root]
+        stack = [iter(jobs[root].depends_on)]
+        state[root] = 1
+        while stack:
+            upstream = next(stack[-1], None)
+            if upstream is None:
+                state[path.pop()] = 2
+                stack.pop()
+                continue
+            if upstream not in jobs or state.get(upstream) == 2:
+                continue
+            if state.get(upstream) == 1:
+                return path[path.index(upstream):] + [upstream]
+            state[upstream] = 1
+            path.append(upstream)
+            stack.append(iter(jobs[upstream].depends_on))
+    return None
+
+
+def validate(changed: Iterable[JobConfig]) -> dict[str, str]:
+    """Errors by job id if saving `changed` would leave unknown upstreams,
+    self-dependencies or a cycle. Empty if the change is fine."""
+    changed = list(changed)
+    graph = {job.id: job for job in registry.all_jobs()}
+    graph.update((job.id, job) for job in changed)
+    errors: dict[str, str] = {}
+    for job in changed:
+        missing = [u for u in job.depends_on if u not in graph]
+        if job.id in job.depends_on:
+            errors[job.id] = "A job cannot depend on itself"
+        elif missing:
+            errors[job.id] = f"Unknown upstream job(s): {', '.join(missing)}"
+    if errors:
+        return errors
+    cycle = find_cycle(graph)
+    if cycle:
+        msg = "Dependency cycle: " + " -> ".join(cycle)
+        for job in changed:
+            if job.id in cycle:
+                errors[job.id] = msg
+    return errors
+
+
+def _index() -> dict[str, list[JobConfig]]:
+    global _indexed, _downstream, _cyclic
+    jobs = registry.all_jobs()
+    if jobs is not _indexed:
+        downstream: dict[str, list[JobConfig]] = {}
+        for job in jobs:
+            for upstream in job.depends_on:
+                downstream.setdefault(upstream, []).append(job)
+        cyclic: set[str] = set()
+        graph = {job.id: job for job in jobs}
+        while (cycle := find_cycle(graph)) is not None:
+            print(f"[CRONUI] Ignoring dependency cycle: {' -> '.join(cycle)}")
+            cyclic.update(cycle)
+            for job_id in cycle:
+                graph.pop(job_id, None)
+        _indexed, _downstream, _cyclic = jobs, downstream, cyclic
+    return _downstream
+
+
+def _on_finish(job_id: str, run_id: str, status: RunStatus):
+    if status != RunStatus.success:
+        return
+    for job in _index().get(job_id, ()):
+        if not job.enabled or job.id in _cyclic:
+            continue
+        done = _satisfied.setdefault(job.id, set())
+        done.add(job_id)
+        # Upstreams deleted since the job was saved no longer hold it back
+        if all(u in done or registry.get(u) is None for u in job.depends_on):
+            _satisfied.pop(job.id, None)
+            task = asyncio.create_task(_run(job, run_id))
+            _tasks.add(task)
+            task.add_done_callback(_tasks.discard)
+
+
+async def _run(job: JobConfig, upstream_run: str):
+    try:
+        await executor.run_job(job.id, job.script_path, job.timeout_seconds, TriggerType.dependency,
+                               max_concurrency=job.max_concurrency, overlap=job.overlap,
+                               priority=job.priority, warm=job.warm, limits=job.limits,
+                               profile=job.profile)
+    except Exception as exc:
+        print(f"[CRONUI] Dependent run of {job.id} after {upstream_run} failed to start: {exc}")
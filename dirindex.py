@@ -0,0 +1,182 @@
+"""Directory listings and script search for the file picker.
+
+Listings come from os.scandir, so whether an entry is a directory is read
+from its dirent instead of a stat per entry, and are cached per directory
+until its mtime changes (adding, removing or renaming an entry bumps it).
+
+The script index lists every .py/.sh file under ROOT for typing-to-search.
+It walks the whole home directory, so it is off unless
+CRONUI_SCRIPT_INDEX_SECONDS is set; a background task then rebuilds it at
+that interval, re-reading only directories whose mtime changed.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path.home()
+HIDDEN_DIRS = {".git", "node_modules", "__pycache__", ".tox", ".mypy_cache"}
+SCRIPT_SUFFIXES = (".py", ".sh")
+# Directories whose listings stay cached
+CACHE_DIRS = 256
+# Seconds between script index rebuilds (0, the default, disables the index)
+INDEX_INTERVAL = float(os.environ.get("CRONUI_SCRIPT_INDEX_SECONDS", "0"))
+INDEX_MAX_DEPTH = 8
+INDEX_MAX_FILES = 100000
+# Not descended into by the index: dot dirs, plus trees full of library code
+_INDEX_SKIP = HIDDEN_DIRS | {"site-packages", "venv", "dist", "build"}
+
+# dir path -> (mtime_ns, [(name, is_dir)] sorted by name)
+_listings: OrderedDict[str, tuple[int, list[tuple[str, bool]]]] = OrderedDict()
+# Listings are read from the threadpool running sync routes
+_listings_lock = threading.Lock()
+
+# dir path -> (mtime_ns, script paths, subdir paths), from the last index build
+_index_dirs: dict[str, tuple[int, list[str], list[str]]] = {}
+# (lowercased, as is) indexed script paths relative to ROOT, sorted; None
+# until the first build
+_scripts: Optional[list[tuple[str, str]]] = None
+_indexer: Optional[asyncio.Task] = None
+
+
+def listing(path: Path) -> list[tuple[str, bool]]:
+    """(name, is_dir) of a directory's visible entries, sorted by name."""
+    key = str(path)
+    mtime = os.stat(path).st_mtime_ns
+    with _listings_lock:
+        hit = _listings.get(key)
+        if hit and hit[0] == mtime:
+            _listings.move_to_end(key)
+            return hit[1]
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name in HIDDEN_DIRS:
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, is_dir))
+    entries.sort()
+    with _listings_lock:
+        _listings[key] = (mtime, entries)
+        if len(_listings) > CACHE_DIRS:
+            _listings.popitem(last=False)
+    return entries
+
+
+def page(entries: list[tuple[str, bool]], q: str = "", cursor: Optional[str] = None,
+         limit: int = 500) -> tuple[list[tuple[str, bool]], Optional[str]]:
+    """Entries after `cursor` (a name) whose name starts with `q`, case
+    insensitively. Returns the page and the cursor of the next one."""
+    start = bisect.bisect_right(entries, cursor, key=lambda e: e[0]) if cursor else 0
+    prefix = q.lower()
+    items = []
+    for i in range(start, len(entries)):
+        if entries[i][0].lower().startswith(prefix):
+            if len(items) == limit:
+                return items, items[-1][0]
+            items.append(entries[i])
+    return items, None
+
+
+# ── Script index ──────────────────────────────────────────────
+
+def start():
+    global _indexer
+    if INDEX_INTERVAL > 0:
+        _indexer = asyncio.create_task(_index_loop())
+
+
+async def stop():
+    global _indexer
+    if _indexer:
+        _indexer.cancel()
+        try:
+            await _indexer
+        except asyncio.CancelledError:
+            pass
+        _indexer = None
+
+
+async def _index_loop():
+    global _scripts
+    while True:
+        try:
+            _scripts = await asyncio.to_thread(_build_index, ROOT)
+        except Exception as exc:
+            print(f"[CRONUI] Script index build failed: {exc}")
+        await asyncio.sleep(INDEX_INTERVAL)
+
+
+def _build_index(root: Path) -> list[tuple[str, str]]:
+    """Walk `root` breadth first, reusing the last build's entries for
+    directories whose mtime is unchanged."""
+    global _index_dirs
+    seen: dict[str, tuple[int, list[str], list[str]]] = {}
+    scripts: list[str] = []
+    level = [str(root)]
+    for _ in range(INDEX_MAX_DEPTH + 1):
+        below = []
+        for path in level:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            hit = _index_dirs.get(path)
+            if hit is None or hit[0] != mtime:
+                hit = (mtime, *_scan_dir(path))
+            seen[path] = hit
+            scripts.extend(hit[1])
+            below.extend(hit[2])
+            if len(scripts) >= INDEX_MAX_FILES:
+                break
+        if len(scripts) >= INDEX_MAX_FILES or not below:
+            break
+        level = below
+    _index_dirs = seen
+    prefix = len(str(root)) + 1
+    return sorted((p[prefix:].lower(), p[prefix:]) for p in scripts[:INDEX_MAX_FILES])
+
+
+def _scan_dir(path: str) -> tuple[list[str], list[str]]:
+    scripts, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith(".") and entry.name not in _INDEX_SKIP:
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(SCRIPT_SUFFIXES):
+                        scripts.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return scripts, subdirs
+
+
+def find_scripts(q: str, limit: int = 50) -> Optional[list[str]]:
+    """Indexed scripts (relative to ROOT) whose path contains `q`, those
+    whose file name starts with it first. None while the index is building."""
+    if _scripts is None:
+        return None
+    needle = q.lower()
+    by_name, by_path = [], []
+    for low, rel in _scripts:
+        if needle not in low:
+            continue
+        if low.rpartition("/")[2].startswith(needle):
+            by_name.append(rel)
+            if len(by_name) >= limit:
+                break
+        elif len(by_path) < limit:
+            by_path.append(rel)
+    return (by_name + by_path)[:limit]
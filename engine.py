@@ -0,0 +1,162 @@
+"""In-process scheduler: fires jobs from a min-heap of next-fire times.
+
+Used instead of crontab when CRONUI_SCHEDULER=native. A single asyncio
+timer is armed for the earliest entry; on wake-up every due job is handed
+straight to executor.run_job, with no cron/curl/HTTP hop in between.
+Jobs with a jitter window (see jitter.py) sit in the heap at their cron
+fire time plus their offset.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import time
+from typing import Optional
+
+import cron
+import jitter
+import metrics
+import registry
+from cron import CronExpr
+from executor import run_job
+from models import JobConfig, TriggerType
+
+# (fire_ts, generation, job_id); entries whose generation no longer matches
+# _entries are stale and skipped when popped.
+_heap: list[tuple[float, int, str]] = []
+# job_id -> (generation, compiled expression, jitter offset in seconds)
+_entries: dict[str, tuple[int, CronExpr, int]] = {}
+_generation = 0
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_timer: Optional[asyncio.TimerHandle] = None
+_tasks: set[asyncio.Task] = set()
+_LAG = metrics.TRIGGER_LAG.labels("native")
+
+
+def start(jobs: list[JobConfig]):
+    """Build the heap from `jobs` and arm the timer. Call from the event loop."""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    for job in jobs:
+        _add(job)
+    _arm()
+
+
+def stop():
+    global _loop, _timer
+    if _timer:
+        _timer.cancel()
+        _timer = None
+    _heap.clear()
+    _entries.clear()
+    _loop = None
+
+
+def sync_job(job: JobConfig):
+    _call(_add, job)
+
+
+def remove_job(job_id: str):
+    _call(_remove, job_id)
+
+
+def _call(fn, *args):
+    """Run a heap mutation on the engine's loop; routes may call from a thread."""
+    if _loop is None:
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    def apply():
+        fn(*args)
+        _arm()
+
+    if running is _loop:
+        apply()
+    else:
+        _loop.call_soon_threadsafe(apply)
+
+
+def _push(job_id: str, gen: int, expr: CronExpr, offset: int, after: float):
+    # The first cron fire whose jittered start is after `after`
+    nxt = expr.next_fire(after - offset)
+    if nxt is not None:
+        heapq.heappush(_heap, (nxt + offset, gen, job_id))
+
+
+def _add(job: JobConfig):
+    global _generation
+    _remove(job.id)
+    if not job.enabled or not job.schedule.timed:
+        return
+    try:
+        source = job.schedule.to_cron()
+        expr = cron.parse(source)
+    except ValueError as exc:
+        print(f"[CRONUI] Not scheduling {job.id}: {exc}")
+        return
+    _generation += 1
+    offset = jitter.offset(job, source)
+    _entries[job.id] = (_generation, expr, offset)
+    _push(job.id, _generation, expr, offset, time.time())
+
+
+def _remove(job_id: str):
+    _entries.pop(job_id, None)
+    # Stale heap entries are dropped lazily; compact if they pile up.
+    if len(_heap) > 2 * len(_entries) + 64:
+        _heap[:] = [e for e in _heap if _is_live(e)]
+        heapq.heapify(_heap)
+
+
+def _is_live(entry: tuple[float, int, str]) -> bool:
+    cur = _entries.get(entry[2])
+    return cur is not None and cur[0] == entry[1]
+
+
+def _arm():
+    global _timer
+    if _timer:
+        _timer.cancel()
+        _timer = None
+    while _heap and not _is_live(_heap[0]):
+        heapq.heappop(_heap)
+    if _heap and _loop is not None:
+        delay = max(0.0, _heap[0][0] - time.time())
+        _timer = _loop.call_later(delay, _tick)
+
+
+def _tick():
+    now = time.time()
+    while _heap and _heap[0][0] <= now:
+        fire_ts, gen, job_id = heapq.heappop(_heap)
+        if not _is_live((fire_ts, gen, job_id)):
+            continue
+        _fire(job_id, fire_ts)
+        # Catch up from "now" so a suspended host fires once, not once per missed minute
+        _, expr, offset = _entries[job_id]
+        _push(job_id, gen, expr, offset, max(fire_ts, now))
+    _arm()
+
+
+def _fire(job_id: str, fire_ts: float):
+    job = registry.get(job_id)
+    if job is None or not job.enabled:
+        return
+    task = _loop.create_task(_run(job, fire_ts))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _run(job: JobConfig, fire_ts: float):
+    _LAG.observe(max(0.0, time.time() - fire_ts))
+    try:
+        await run_job(job.id, job.script_path, job.timeout_seconds, TriggerType.scheduled,
+                      max_concurrency=job.max_concurrency, overlap=job.overlap,
+                      priority=job.priority, warm=job.warm, limits=job.limits,
+                      profile=job.profile)
+    except Exception as exc:
+        print(f"[CRONUI] Scheduled run of {job.id} failed to start: {exc}")
@@ -0,0 +1,125 @@
+"""In-process event bus for job and run changes.
+
+Every change gets a sequence number and is kept in a bounded history, so
+a reconnecting client can ask for everything after the last id it saw.
+publish() may be called from route threadpool threads as well as the loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+# Events kept for resuming clients; older cursors get a "reset" event
+HISTORY = 5000
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT = 15.0
+
+_lock = threading.Lock()
+# (seq, kind, data)
+_history: deque[tuple[int, str, Any]] = deque(maxlen=HISTORY)
+_seq = 0
+# kind -> (seq, wall time) of its latest change, for conditional GETs
+_versions: dict[str, tuple[int, float]] = {}
+_started_at = time.time()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_changed: Optional[asyncio.Event] = None
+
+
+def start():
+    """Bind the bus to the running loop. Called from the app lifespan."""
+    global _loop, _changed
+    _loop = asyncio.get_running_loop()
+    _changed = asyncio.Event()
+
+
+def cursor() -> int:
+    return _seq
+
+
+def version(*kinds: str) -> tuple[int, float]:
+    """Seq and time of the latest change of any of `kinds`; changes only
+    move it forward, so it can back an ETag / Last-Modified."""
+    latest = [_versions.get(k, (0, _started_at)) for k in kinds]
+    return max(v[0] for v in latest), max(v[1] for v in latest)
+
+
+def touch(kind: str):
+    """Record a change of `kind` that has no event (e.g. a bulk delete)."""
+    global _seq
+    with _lock:
+        _seq += 1
+        _versions[kind] = (_seq, time.time())
+
+
+def publish(kind: str, data: Any):
+    global _seq
+    with _lock:
+        _seq += 1
+        _history.append((_seq, kind, data))
+        _versions[kind] = (_seq, time.time())
+    if _loop is None:
+        return
+    try:
+        in_loop = asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        in_loop = False
+    if in_loop:
+        _wake()
+    else:
+        _loop.call_soon_threadsafe(_wake)
+
+
+def _wake():
+    global _changed
+    # Swap in a fresh Event so every current waiter is released exactly once
+    changed, _changed = _changed, asyncio.Event()
+    if changed:
+        changed.set()
+
+
+def since(after: int) -> Optional[list[tuple[int, str, Any]]]:
+    """Events with seq > after, or None if some were already evicted."""
+    with _lock:
+        if not _history:
+            return [] if after >= _seq else None
+        oldest = _history[0][0]
+        if after < oldest - 1:
+            return None
+        return [e for e in _history if e[0] > after]
+
+
+def _sse(seq: int, kind: str, data: Any) -> str:
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(after: Optional[int] = None):
+    """Server-Sent Events of changes after cursor `after`.
+
+    Without a cursor the stream starts with a "hello" event carrying the
+    current cursor; the client loads full state once and then applies
+    deltas. A "reset" event means the cursor is too old to resume.
+    """
+    if after is None or after > _seq:
+        after = _seq
+        yield _sse(after, "hello", {"cursor": after})
+    while True:
+        waiter = _changed
+        batch = since(after)
+        if batch is None:
+            after = _seq
+            yield _sse(after, "reset", {"cursor": after})
+            continue
+        for seq, kind, data in batch:
+            after = seq
+            yield _sse(seq, kind, data)
+        if batch:
+            continue
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout=HEARTBEAT)
+        except asyncio.TimeoutError:
+            yield ": ping\n\n"
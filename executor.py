@@ -1,46 +1,211 @@
-"""Async script executor with venv detection and timeout support."""
+"""Async script executor with venv detection, timeout and concurrency limits."""
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
 import os
+import signal
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, NamedTuple, Optional
 
 import db
-from models import RunRecord, RunStatus, TriggerType
+import events
+import governor
+import logstore
+import metrics
+import procstats
+import profiling
+import warmpool
+from logstore import LogTail
+from models import Limits, OverlapPolicy, RunRecord, RunStatus, TriggerType
 
-LOGS_DIR = Path(__file__).parent / "logs"
+LOGS_DIR = Path(os.environ.get("CRONUI_LOGS_DIR", Path(__file__).parent / "logs"))
 LOGS_DIR.mkdir(exist_ok=True)
 
+
+def log_file_path(run_id: str) -> Path:
+    """Where a run's log is written (see logstore for compressed forms)."""
+    return LOGS_DIR / f"{run_id}.log"
+
+
+# Max runs executing at once across all jobs, and max runs waiting for a slot.
+MAX_CONCURRENCY = int(os.environ.get("CRONUI_MAX_CONCURRENCY", "8"))
+MAX_QUEUE = int(os.environ.get("CRONUI_MAX_QUEUE", "1000"))
+
+
+# "local" runs scripts in this process; "queue" only inserts queued runs,
+# which worker.py processes claim and execute
+EXECUTION = os.environ.get("CRONUI_EXECUTION", "local")
+# Seconds between the API's polls for runs that workers started or finished
+QUEUE_POLL = float(os.environ.get("CRONUI_QUEUE_POLL", "1"))
+# Set in worker processes; their runs are finished only while still held
+WORKER_ID: Optional[str] = None
+
+
+class QueueFullError(RuntimeError):
+    """Raised by run_job when the run queue is at MAX_QUEUE."""
+
+
 # ── Process tracking ──────────────────────────────────────────
-# run_id -> Process
-_running: dict[str, asyncio.subprocess.Process] = {}
-# job_id -> set of run_ids
+# run_id -> child process
+_running: dict[str, procstats.Child] = {}
+# job_id -> set of run_ids holding an execution slot (process may not exist yet)
 _job_runs: dict[str, set[str]] = {}
+# run_id -> in-memory tail of output, for live streaming
+_tails: dict[str, LogTail] = {}
+# run_id -> cgroup holding the run's processes, for runs with cgroup quotas
+_cgroups: dict[str, governor.Cgroup] = {}
+# Runs killed by kill_job/kill_run, recorded as cancelled rather than failed
+_cancelled: set[str] = set()
+# Seconds to keep draining the pipe after the child exits; grandchildren
+# that inherited stdout could otherwise hold it open forever.
+DRAIN_TIMEOUT = 5.0
+
+
+# Called as fn(job_id, run_id, status) once a started run's outcome is recorded
+_finish_listeners: list[Callable[[str, str, RunStatus], None]] = []
+
+
+def add_finish_listener(fn: Callable[[str, str, RunStatus], None]):
+    _finish_listeners.append(fn)
+
+
+def remove_finish_listener(fn: Callable[[str, str, RunStatus], None]):
+    if fn in _finish_listeners:
+        _finish_listeners.remove(fn)
+
+
+def get_tail(run_id: str) -> Optional[LogTail]:
+    """Live output buffer of a running run, or None once it has finished."""
+    return _tails.get(run_id)
+
+
+# ── Run queue ─────────────────────────────────────────────────
+
+class _Pending(NamedTuple):
+    run_id: str
+    job_id: str
+    script_path: str
+    timeout_seconds: int
+    log_path: Path
+    max_concurrency: int
+    overlap: OverlapPolicy
+    queued_at: datetime
+    warm: bool
+    limits: Optional[dict]
+    profile: bool
+
+
+# (-priority, seq, pending); seq keeps FIFO order within a priority
+_queue: list[tuple[int, int, _Pending]] = []
+_seq = itertools.count()
+
+
+def _active_count() -> int:
+    return sum(len(runs) for runs in _job_runs.values())
+
+
+def queue_depth() -> int:
+    return len(_queue)
+
+
+metrics.RUNS_RUNNING.labels().set_function(lambda: len(_running))
+metrics.QUEUE_DEPTH.labels().set_function(queue_depth)
+_STARTED = {t: metrics.RUNS_STARTED.labels(t.value) for t in TriggerType}
+_WAIT = metrics.RUN_WAIT.labels()
+
+
+def _has_slot(job_id: str, max_concurrency: int, overlap: OverlapPolicy) -> bool:
+    if _active_count() >= MAX_CONCURRENCY:
+        return False
+    if overlap == OverlapPolicy.allow:
+        return True
+    return len(_job_runs.get(job_id, ())) < max_concurrency
+
+
+def _reserve(job_id: str, run_id: str):
+    _job_runs.setdefault(job_id, set()).add(run_id)
+
+
+def _launch(p: _Pending, queued: bool):
+    asyncio.create_task(
+        _execute(p.run_id, p.job_id, p.script_path, p.timeout_seconds, p.log_path,
+                 queued_at=p.queued_at if queued else None, warm=p.warm, limits=p.limits,
+                 profile=p.profile)
+    )
+
+
+def _dispatch():
+    """Start queued runs, highest priority first, while slots are free."""
+    blocked = []
+    while _queue and _active_count() < MAX_CONCURRENCY:
+        item = heapq.heappop(_queue)
+        p = item[2]
+        if _has_slot(p.job_id, p.max_concurrency, p.overlap):
+            _reserve(p.job_id, p.run_id)
+            _launch(p, queued=True)
+        else:
+            blocked.append(item)
+    for item in blocked:
+        heapq.heappush(_queue, item)
+
+
+# script dir -> (interpreter or None, (dir, mtime_ns) of every dir the lookup looked in)
+_python_cache: dict[str, tuple[Optional[str], tuple[tuple[str, int], ...]]] = {}
+
+
+def _dir_mtime(path: Path | str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
 
 
 def _find_venv_python(script_path: str) -> str | None:
-    """Walk up to 5 parent dirs from script looking for .venv/bin/python3."""
+    """Walk up to 5 parent dirs from script looking for .venv/bin/python3.
+
+    Cached per script dir. Creating or removing a .venv (or its python3)
+    changes the mtime of a directory the lookup looked in, so an entry is
+    reused only while all of those mtimes are unchanged.
+    """
+    key = os.path.dirname(script_path)
+    hit = _python_cache.get(key)
+    if hit and all(_dir_mtime(d) == m for d, m in hit[1]):
+        return hit[0]
     p = Path(script_path).resolve().parent
+    stamps = []
+    found = None
     for _ in range(5):
-        candidate = p / ".venv" / "bin" / "python3"
-        if candidate.exists():
-            return str(candidate)
+        stamps.append((str(p), _dir_mtime(p)))
+        bin_dir = p / ".venv" / "bin"
+        if bin_dir.is_dir():
+            stamps.append((str(bin_dir), _dir_mtime(bin_dir)))
+            candidate = bin_dir / "python3"
+            if candidate.exists():
+                found = str(candidate)
+                break
         p = p.parent
-    return None
+    _python_cache[key] = (found, tuple(stamps))
+    return found
+
+
+def python_for(script_path: str) -> str:
+    """Interpreter a .py job runs under: its venv's python3, else python3."""
+    return _find_venv_python(script_path) or "python3"
 
 
 def _build_command(script_path: str) -> list[str]:
     if script_path.endswith(".sh"):
         return ["/bin/zsh", script_path]
     if script_path.endswith(".py"):
-        python = _find_venv_python(script_path) or "python3"
-        return [python, script_path]
+        return [python_for(script_path), script_path]
     return ["/bin/zsh", script_path]
 
 
-def _register(job_id: str, run_id: str, proc: asyncio.subprocess.Process):
+def _register(job_id: str, run_id: str, proc: procstats.Child):
     _running[run_id] = proc
     _job_runs.setdefault(job_id, set()).add(run_id)
 
@@ -51,81 +216,381 @@ def _unregister(job_id: str, run_id: str):
         _job_runs[job_id].discard(run_id)
         if not _job_runs[job_id]:
             del _job_runs[job_id]
+    _dispatch()
+
+
+async def _cancel_queued(job_id: str) -> int:
+    """Drop a job's queued runs and mark them cancelled."""
+    dropped = [item[2] for item in _queue if item[2].job_id == job_id]
+    if not dropped:
+        return 0
+    _queue[:] = [item for item in _queue if item[2].job_id != job_id]
+    heapq.heapify(_queue)
+    for p in dropped:
+        await db.finish_run(p.run_id, RunStatus.cancelled, exit_code=None,
+                            error_msg="Cancelled while queued")
+    return len(dropped)
 
 
 async def kill_job(job_id: str) -> int:
-    """Kill all running processes for a job. Returns number of processes killed."""
-    run_ids = list(_job_runs.get(job_id, set()))
-    killed = 0
-    for run_id in run_ids:
-        proc = _running.get(run_id)
-        if proc and proc.returncode is None:
-            proc.kill()
+    """Kill all running processes and queued runs for a job. Returns the count."""
+    if EXECUTION == "queue":
+        # Workers kill the processes when their next lease renewal fails
+        return await db.cancel_active(job_id)
+    killed = await _cancel_queued(job_id)
+    for run_id in list(_job_runs.get(job_id, set())):
+        # _execute records the run as cancelled once the process is gone
+        if kill_run(run_id):
             killed += 1
-            # _execute will handle cleanup and db update via the exception path
     return killed
 
 
+def _kill_tree(run_id: str, proc):
+    """Kill the run's process group and, with quotas, everything in its cgroup."""
+    proc.kill()
+    cgroup = _cgroups.get(run_id)
+    if cgroup:
+        cgroup.kill()
+
+
 async def run_job(job_id: str, script_path: str, timeout_seconds: int,
-                  trigger: TriggerType = TriggerType.scheduled) -> str:
-    """Execute a script asynchronously. Returns run_id."""
+                  trigger: TriggerType = TriggerType.scheduled, *,
+                  max_concurrency: int = 1,
+                  overlap: OverlapPolicy = OverlapPolicy.allow,
+                  priority: int = 0,
+                  warm: bool = False,
+                  limits: Optional[Limits] = None,
+                  profile: bool = False) -> Optional[str]:
+    """Start or queue a script run. Returns run_id, or None if skipped.
+
+    The global limit is MAX_CONCURRENCY. Once a job has `max_concurrency`
+    runs active, `overlap` decides whether a new trigger is skipped, queued,
+    replaces the running ones, or (allow) ignores the per-job limit.
+    `warm` forks .py scripts from a preloaded server (see warmpool).
+    `limits` are applied to the run's processes (see governor).
+    `profile` runs .py scripts under cProfile (see profiling).
+    """
+    limits = limits.model_dump(mode="json", exclude_none=True) if limits else None
+    if EXECUTION == "queue":
+        return await _enqueue_for_workers(job_id, script_path, timeout_seconds, trigger,
+                                          max_concurrency, overlap, priority, warm, limits,
+                                          profile)
+    active = len(_job_runs.get(job_id, ())) + sum(
+        1 for item in _queue if item[2].job_id == job_id
+    )
+    if overlap != OverlapPolicy.allow and active >= max_concurrency:
+        if overlap == OverlapPolicy.skip:
+            print(f"[CRONUI] Skipped {job_id}: {active} run(s) already active")
+            return None
+        if overlap == OverlapPolicy.replace:
+            await kill_job(job_id)
+
+    now = datetime.now(timezone.utc)
     run_id = uuid.uuid4().hex[:12]
-    log_path = LOGS_DIR / f"{run_id}.log"
+    log_path = log_file_path(run_id)
+    pending = _Pending(run_id, job_id, script_path, timeout_seconds, log_path,
+                       max_concurrency, overlap, now, warm, limits, profile)
+
+    start_now = _has_slot(job_id, max_concurrency, overlap)
+    if not start_now and len(_queue) >= MAX_QUEUE:
+        raise QueueFullError(f"Run queue is full ({MAX_QUEUE} pending)")
+    if start_now:
+        # Hold the slot across the insert so concurrent triggers see it taken
+        _reserve(job_id, run_id)
 
     run = RunRecord(
         id=run_id,
         job_id=job_id,
-        status=RunStatus.running,
+        status=RunStatus.running if start_now else RunStatus.queued,
         trigger=trigger,
-        started_at=datetime.now(timezone.utc),
+        started_at=now,
         log_file=str(log_path),
+        queued_at=None if start_now else now,
     )
-    await db.insert_run(run)
+    try:
+        await db.insert_run(run)
+    except Exception:
+        if start_now:
+            _unregister(job_id, run_id)
+        raise
+    _STARTED[trigger].inc()
 
-    asyncio.create_task(_execute(run_id, job_id, script_path, timeout_seconds, log_path))
+    if start_now:
+        _launch(pending, queued=False)
+    else:
+        heapq.heappush(_queue, (-priority, next(_seq), pending))
+        _dispatch()
     return run_id
 
 
-async def _execute(run_id: str, job_id: str, script_path: str, timeout_seconds: int, log_path: Path):
-    cmd = _build_command(script_path)
+async def _execute(run_id: str, job_id: str, script_path: str, timeout_seconds: int, log_path: Path,
+                   queued_at: Optional[datetime] = None, warm: bool = False,
+                   limits: Optional[dict] = None, profile: bool = False):
     env = os.environ.copy()
     work_dir = str(Path(script_path).resolve().parent)
 
+    tail = LogTail()
+    _tails[run_id] = tail
+    pump = sampler = cgroup = None
+
+    def note(msg: str):
+        data = msg.encode()
+        with open(log_path, "ab") as lf:
+            lf.write(data)
+        tail.write(data)
+
     try:
-        with open(log_path, "w") as log_file:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=log_file,
-                stderr=asyncio.subprocess.STDOUT,
-                cwd=work_dir,
-                env=env,
-            )
+        if queued_at is not None:
+            started = datetime.now(timezone.utc)
+            wait = (started - queued_at).total_seconds()
+            _WAIT.observe(wait)
+            await db.start_run(run_id, started, int(wait * 1000))
+        if run_id in _cancelled:
+            # Killed while its slot was reserved, before there was a process
+            note("[CRONUI] Run cancelled by user before it started\n")
+            await _finish(job_id, run_id, RunStatus.cancelled, exit_code=None,
+                          error_msg="Cancelled by user")
+            return
+        spec, cgroup = governor.prepare(run_id, limits)
+        if cgroup:
+            _cgroups[run_id] = cgroup
+        with open(log_path, "wb") as log_file:
+            prof = logstore.profile_path(log_path) if profile and script_path.endswith(".py") else None
+            proc = await _spawn(script_path, work_dir, env, warm, spec, prof)
             _register(job_id, run_id, proc)
+            if run_id in _cancelled:
+                # Cancelled while the process was being spawned
+                _kill_tree(run_id, proc)
+            pump = asyncio.create_task(_pump(proc.stdout, log_file, tail))
+            if procstats.SAMPLE_INTERVAL > 0 and procstats.CAN_SAMPLE:
+                sampler = asyncio.create_task(procstats.sample(
+                    proc, logstore.samples_path(log_path), procstats.SAMPLE_INTERVAL))
             try:
                 await asyncio.wait_for(proc.wait(), timeout=timeout_seconds)
             except asyncio.TimeoutError:
-                proc.kill()
+                _kill_tree(run_id, proc)
                 await proc.wait()
-                with open(log_path, "a") as lf:
-                    lf.write(f"\n[CRONUI] Process killed: timeout after {timeout_seconds}s\n")
-                await db.finish_run(run_id, RunStatus.timeout, exit_code=-1,
-                                    error_msg=f"Timeout after {timeout_seconds}s")
+                await _drain(pump)
+                log_file.close()
+                note(f"\n[CRONUI] Process killed: timeout after {timeout_seconds}s\n")
+                await _finish(job_id, run_id, RunStatus.timeout, exit_code=-1,
+                              error_msg=f"Timeout after {timeout_seconds}s", usage=proc.usage)
                 return
+            await _drain(pump)
 
         exit_code = proc.returncode
-        # returncode -9 means SIGKILL (from our kill_job)
-        if exit_code == -9:
-            with open(log_path, "a") as lf:
-                lf.write("\n[CRONUI] Process cancelled by user\n")
-            await db.finish_run(run_id, RunStatus.cancelled, exit_code=-9,
-                                error_msg="Cancelled by user")
+        if run_id in _cancelled:
+            note("\n[CRONUI] Process cancelled by user\n")
+            await _finish(job_id, run_id, RunStatus.cancelled, exit_code=exit_code,
+                          error_msg="Cancelled by user", usage=proc.usage)
+        elif exit_code == 0:
+            await _finish(job_id, run_id, RunStatus.success, exit_code=0, usage=proc.usage)
         else:
-            status = RunStatus.success if exit_code == 0 else RunStatus.failed
-            await db.finish_run(run_id, status, exit_code=exit_code)
+            reason = _limit_reason(exit_code, limits, cgroup, proc.usage)
+            if reason:
+                note(f"\n[CRONUI] Process killed: {reason}\n")
+            await _finish(job_id, run_id, RunStatus.failed, exit_code=exit_code,
+                          error_msg=reason, usage=proc.usage)
 
     except Exception as exc:
-        with open(log_path, "a") as lf:
-            lf.write(f"\n[CRONUI] Execution error: {exc}\n")
-        await db.finish_run(run_id, RunStatus.failed, exit_code=-1, error_msg=str(exc))
+        if pump:
+            pump.cancel()
+        note(f"\n[CRONUI] Execution error: {exc}\n")
+        await _finish(job_id, run_id, RunStatus.failed, exit_code=-1, error_msg=str(exc))
     finally:
+        if sampler:
+            sampler.cancel()
+        if cgroup:
+            _cgroups.pop(run_id, None)
+            cgroup.remove()
+        _cancelled.discard(run_id)
+        tail.close()
+        _tails.pop(run_id, None)
         _unregister(job_id, run_id)
+        logstore.compress_later(log_path)
+
+
+async def _finish(job_id: str, run_id: str, status: RunStatus, **kwargs):
+    await db.finish_run(run_id, status, worker=WORKER_ID, **kwargs)
+    for fn in _finish_listeners:
+        try:
+            fn(job_id, run_id, status)
+        except Exception as exc:
+            print(f"[CRONUI] Finish listener failed for {run_id}: {exc}")
+
+
+def _limit_reason(exit_code: Optional[int], limits: Optional[dict],
+                  cgroup: Optional[governor.Cgroup], usage: Optional[dict]) -> Optional[str]:
+    """Which of the run's limits killed it, if any did."""
+    if not limits:
+        return None
+    if cgroup and cgroup.oom_killed():
+        return f"out of memory (cgroup_memory_mb {limits['cgroup_memory_mb']})"
+    cpu_limit = limits.get("cpu_seconds")
+    if cpu_limit and exit_code in (-signal.SIGXCPU, -signal.SIGKILL):
+        cpu_ms = (usage or {}).get("cpu_user_ms", 0) + (usage or {}).get("cpu_sys_ms", 0)
+        if exit_code == -signal.SIGXCPU or cpu_ms >= cpu_limit * 1000:
+            return f"CPU time limit exceeded (cpu_seconds {cpu_limit})"
+    return None
+
+
+async def _spawn(script_path: str, work_dir: str, env: dict[str, str], warm: bool,
+                 limits: Optional[dict] = None, profile: Optional[Path] = None):
+    """Start the script; with `profile`, under cProfile writing stats there."""
+    if warm and warmpool.ENABLED and script_path.endswith(".py"):
+        try:
+            return await warmpool.spawn(python_for(script_path), script_path, work_dir, env, limits,
+                                        profile)
+        except warmpool.WarmError as exc:
+            print(f"[CRONUI] Warm start of {script_path} failed, running cold: {exc}")
+    if profile:
+        cmd = profiling.profile_command(python_for(script_path), script_path, profile)
+    else:
+        cmd = _build_command(script_path)
+    return await procstats.spawn(cmd, cwd=work_dir, env=env, limits=limits)
+
+
+async def _pump(stream: asyncio.StreamReader, log_file, tail: LogTail):
+    """Copy child output to the log file and the in-memory tail."""
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            return
+        log_file.write(chunk)
+        log_file.flush()
+        tail.write(chunk)
+
+
+async def _drain(pump: asyncio.Task):
+    try:
+        await asyncio.wait_for(pump, timeout=DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+
+
+# ── Queue mode ────────────────────────────────────────────────
+# In the API process: enqueue runs and follow what workers do with them.
+# In worker processes: execute claimed runs with the machinery above.
+
+# run_id -> last seen status of queued/running runs, in the API process
+_watched: dict[str, RunStatus] = {}
+_watcher: Optional[asyncio.Task] = None
+
+
+async def _enqueue_for_workers(job_id: str, script_path: str, timeout_seconds: int,
+                               trigger: TriggerType, max_concurrency: int, overlap: OverlapPolicy,
+                               priority: int, warm: bool, limits: Optional[dict],
+                               profile: bool) -> Optional[str]:
+    if overlap != OverlapPolicy.allow:
+        active = await db.count_active(job_id)
+        if active >= max_concurrency:
+            if overlap == OverlapPolicy.skip:
+                print(f"[CRONUI] Skipped {job_id}: {active} run(s) already active")
+                return None
+            if overlap == OverlapPolicy.replace:
+                await kill_job(job_id)
+
+    now = datetime.now(timezone.utc)
+    run_id = uuid.uuid4().hex[:12]
+    run = RunRecord(
+        id=run_id,
+        job_id=job_id,
+        status=RunStatus.queued,
+        trigger=trigger,
+        started_at=now,
+        log_file=str(log_file_path(run_id)),
+        queued_at=now,
+    )
+    spec = {"script_path": script_path, "timeout_seconds": timeout_seconds, "warm": warm,
+            "limits": limits, "profile": profile}
+    await db.enqueue_run(run, spec, priority,
+                         None if overlap == OverlapPolicy.allow else max_concurrency)
+    _watched[run_id] = RunStatus.queued
+    _STARTED[trigger].inc()
+    return run_id
+
+
+def start():
+    """Follow worker progress when running in queue mode."""
+    global _watcher
+    if EXECUTION == "queue":
+        _watcher = asyncio.create_task(_watch_queue())
+
+
+async def stop():
+    global _watcher
+    if _watcher:
+        _watcher.cancel()
+        try:
+            await _watcher
+        except asyncio.CancelledError:
+            pass
+        _watcher = None
+
+
+async def _watch_queue():
+    while True:
+        try:
+            await _poll_queue()
+        except Exception as exc:
+            print(f"[CRONUI] Polling the run queue failed: {exc}")
+        await asyncio.sleep(QUEUE_POLL)
+
+
+async def _poll_queue():
+    """Publish run events for changes made by workers and hand finished
+    runs to the finish listeners, as a local run would."""
+    active = await db.list_active()
+    for run_id, seen in list(_watched.items()):
+        if active.get(run_id) == seen:
+            continue
+        run = await db.get_run(run_id)
+        if run is None:
+            _watched.pop(run_id, None)
+            continue
+        if run.status == seen:
+            continue
+        events.publish("run", run.model_dump(mode="json"))
+        if run.status in (RunStatus.queued, RunStatus.running):
+            _watched[run_id] = run.status
+            continue
+        _watched.pop(run_id, None)
+        for fn in _finish_listeners:
+            try:
+                fn(run.job_id, run_id, run.status)
+            except Exception as exc:
+                print(f"[CRONUI] Finish listener failed for {run_id}: {exc}")
+    for run_id, status in active.items():
+        _watched.setdefault(run_id, status)
+
+
+def execute_claimed(run: RunRecord, spec: dict) -> asyncio.Task:
+    """Execute a run this worker process has claimed from the queue."""
+    _reserve(run.job_id, run.id)
+    return asyncio.create_task(
+        _execute(run.id, run.job_id, spec["script_path"], spec["timeout_seconds"],
+                 Path(run.log_file or log_file_path(run.id)), warm=spec.get("warm", False),
+                 limits=spec.get("limits"), profile=spec.get("profile", False))
+    )
+
+
+def active_run_ids() -> list[str]:
+    """Runs holding an execution slot in this process."""
+    return [run_id for runs in _job_runs.values() for run_id in runs]
+
+
+def kill_run(run_id: str) -> bool:
+    """Kill a run's process tree if it is still alive, or cancel it if it
+    holds a slot but has no process yet; returns whether either happened."""
+    proc = _running.get(run_id)
+    if proc is None:
+        # Between the slot reservation and the spawn; _execute checks for this
+        if run_id in _cancelled or not any(run_id in runs for runs in _job_runs.values()):
+            return False
+        _cancelled.add(run_id)
+        return True
+    if proc.returncode is None:
+        _cancelled.add(run_id)
+        _kill_tree(run_id, proc)
+        return True
+    return False
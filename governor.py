@@ -0,0 +1,204 @@
+"""Per-job resource limits: niceness, I/O class, rlimits and cgroup quotas.
+
+A job's `limits` become a plain dict spec that `apply` enforces in the
+run's process before the script starts: join the run's cgroup, then set
+niceness, I/O priority, RLIMIT_AS and RLIMIT_CPU. Everything it forks
+inherits them. Cold runs are started through this file as an exec shim
+(`command`), which applies the spec and then execs the real command, since
+the app's threads make Popen's preexec_fn unsafe. Warm runs call `apply`
+in warmserver's forked child under the job's interpreter. So the
+child-side code here uses only the standard library.
+
+cgroup v2 quotas (memory.max, cpu.max) cover the whole process tree, not
+each process. They need a delegated cgroup named by CRONUI_CGROUP_ROOT
+that this process can write and that has the memory and cpu controllers
+available. Without one, cgroup settings are skipped and the other limits
+still apply.
+"""
+from __future__ import annotations
+
+import ctypes
+import json
+import os
+import platform
+import resource
+import sys
+from pathlib import Path
+from typing import Optional
+
+# Delegated cgroup v2 directory runs get their sub-cgroups in ("" = off)
+CGROUP_ROOT = os.environ.get("CRONUI_CGROUP_ROOT", "")
+CPU_PERIOD_US = 100000
+
+# ioprio_set(2) has no libc wrapper; its syscall number per architecture
+_IOPRIO_SET = {"x86_64": 251, "aarch64": 30}.get(platform.machine())
+_IOPRIO_CLASS = {"best-effort": 2, "idle": 3}
+_IOPRIO_WHO_PROCESS = 1
+_libc = ctypes.CDLL(None, use_errno=True) if _IOPRIO_SET is not None else None
+
+_cgroups_ok: Optional[bool] = None
+# Run cgroups whose removal failed because processes were still exiting
+_leftover: list[Cgroup] = []
+
+
+# ── In the child ──────────────────────────────────────────────
+
+def apply(spec: dict):
+    """Enforce `spec` on the calling process. Runs between fork and the
+    script; raises if the run's cgroup can't be joined."""
+    cgroup = spec.get("cgroup")
+    if cgroup:
+        with open(os.path.join(cgroup, "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+    if spec.get("nice") is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, spec["nice"])
+        except OSError:
+            pass  # raising priority needs CAP_SYS_NICE; keep the inherited one
+    if spec.get("io_class") or spec.get("io_priority") is not None:
+        _ionice(spec.get("io_class") or "best-effort", spec.get("io_priority"))
+    if spec.get("memory_mb"):
+        _lower(resource.RLIMIT_AS, spec["memory_mb"] * 1024 * 1024)
+    if spec.get("cpu_seconds"):
+        # SIGXCPU at the soft limit, SIGKILL five seconds of CPU later
+        _lower(resource.RLIMIT_CPU, spec["cpu_seconds"], grace=5)
+
+
+def _ionice(io_class: str, level: Optional[int]):
+    if _libc is None:
+        return
+    cls = _IOPRIO_CLASS[io_class]
+    # The idle class has no levels; best-effort defaults to the middle one
+    level = 0 if io_class == "idle" else (4 if level is None else level)
+    _libc.syscall(_IOPRIO_SET, _IOPRIO_WHO_PROCESS, 0, (cls << 13) | level)
+
+
+def _lower(which: int, soft: int, grace: int = 0):
+    _, hard = resource.getrlimit(which)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+        new_hard = min(soft + grace, hard)
+    else:
+        new_hard = soft + grace
+    resource.setrlimit(which, (soft, new_hard))
+
+
+def _exec_shim():
+    """python governor.py <spec json> <cmd...>: apply, then become cmd."""
+    apply(json.loads(sys.argv[1]))
+    try:
+        os.execvp(sys.argv[2], sys.argv[2:])
+    except OSError as exc:
+        print(f"[CRONUI] Could not execute {sys.argv[2]}: {exc}", file=sys.stderr)
+        os._exit(127)
+
+
+# ── In the app ────────────────────────────────────────────────
+
+def command(cmd: list[str], spec: dict) -> list[str]:
+    """`cmd` run through the exec shim, which applies `spec` first. The
+    shim keeps the pid, so the process group and cgroup are cmd's."""
+    return [sys.executable, "-I", str(Path(__file__).resolve()), json.dumps(spec), *cmd]
+
+
+def prepare(run_id: str, limits: Optional[dict]) -> tuple[Optional[dict], Optional[Cgroup]]:
+    """Child spec for a run's limits (None if there are none), creating its
+    cgroup when quotas are set and cgroups are available."""
+    if not limits:
+        return None, None
+    for cg in list(_leftover):
+        cg.remove(retry=True)
+    spec = dict(limits)
+    cgroup = None
+    memory_mb = spec.pop("cgroup_memory_mb", None)
+    cpu_percent = spec.pop("cgroup_cpu_percent", None)
+    if (memory_mb or cpu_percent) and cgroups_available():
+        cgroup = Cgroup.create(run_id, memory_mb, cpu_percent)
+        spec["cgroup"] = str(cgroup.path)
+    return spec, cgroup
+
+
+def cgroups_available() -> bool:
+    """Whether CRONUI_CGROUP_ROOT is a usable cgroup v2 directory; checked once."""
+    global _cgroups_ok
+    if _cgroups_ok is None:
+        _cgroups_ok = False
+        root = Path(CGROUP_ROOT) if CGROUP_ROOT else None
+        if root is None:
+            print("[CRONUI] cgroup quotas skipped: CRONUI_CGROUP_ROOT is not set")
+        else:
+            try:
+                available = (root / "cgroup.controllers").read_text().split()
+                wanted = [c for c in ("memory", "cpu") if c in available]
+                enabled = (root / "cgroup.subtree_control").read_text().split()
+                missing = [c for c in wanted if c not in enabled]
+                if missing:
+                    (root / "cgroup.subtree_control").write_text(" ".join("+" + c for c in missing))
+                _cgroups_ok = bool(wanted)
+                if not _cgroups_ok:
+                    print(f"[CRONUI] cgroup quotas skipped: no memory/cpu controller in {root}")
+            except OSError as exc:
+                print(f"[CRONUI] cgroup quotas skipped: {root} is not usable: {exc}")
+    return _cgroups_ok
+
+
+class Cgroup:
+    """A run's sub-cgroup under CGROUP_ROOT."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @classmethod
+    def create(cls, run_id: str, memory_mb: Optional[int], cpu_percent: Optional[int]) -> Cgroup:
+        path = Path(CGROUP_ROOT) / f"run-{run_id}"
+        path.mkdir(exist_ok=True)
+        cg = cls(path)
+        try:
+            if memory_mb:
+                (path / "memory.max").write_text(str(memory_mb * 1024 * 1024))
+                # An OOM kill takes the whole tree, not one arbitrary process
+                (path / "memory.oom.group").write_text("1")
+            if cpu_percent:
+                quota = cpu_percent * CPU_PERIOD_US // 100
+                (path / "cpu.max").write_text(f"{quota} {CPU_PERIOD_US}")
+        except OSError:
+            cg.remove()
+            raise
+        return cg
+
+    def oom_killed(self) -> bool:
+        """Whether the memory quota killed anything in this cgroup."""
+        try:
+            for line in (self.path / "memory.events").read_text().splitlines():
+                key, _, value = line.partition(" ")
+                if key == "oom_kill":
+                    return int(value) > 0
+        except (OSError, ValueError):
+            pass
+        return False
+
+    def kill(self):
+        """SIGKILL every process in the cgroup, including any that left the
+        run's process group (Linux 5.14+; a no-op before)."""
+        try:
+            (self.path / "cgroup.kill").write_text("1")
+        except OSError:
+            pass
+
+    def remove(self, retry: bool = False):
+        # Fails while processes that outlived the run are still inside;
+        # retried before the next run with limits is prepared
+        try:
+            self.path.rmdir()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            if not retry:
+                _leftover.append(self)
+            return
+        if retry:
+            _leftover.remove(self)
+
+
+if __name__ == "__main__":
+    _exec_shim()
@@ -0,0 +1,70 @@
+"""Start-time jitter: spread jobs that share a cron minute over a window.
+
+Daily and hourly schedules default to the top of the hour, so many jobs
+start in the same second. A job's window is its `schedule.jitter_seconds`,
+or CRONUI_SMOOTH_SECONDS when that is unset (0 keeps exact times). Each
+job starts a fixed offset into its window, taken from a hash of its id, so
+the offset is the same on every fire and across restarts, and jobs sharing
+a minute land at different points of it.
+
+The window is capped below the shortest gap between the expression's
+fires, so a delayed start never passes the next one.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+
+import cron
+from models import JobConfig
+
+# Window in seconds for jobs without their own jitter_seconds
+SMOOTH_SECONDS = int(os.environ.get("CRONUI_SMOOTH_SECONDS", "0"))
+# Fires looked at to find an expression's shortest gap
+_PERIOD_SAMPLES = 8
+
+# cron expression -> shortest gap between its fires, in seconds
+_periods: dict[str, float] = {}
+
+
+def window(job: JobConfig) -> int:
+    """Jitter window of the job in seconds, before the period cap."""
+    if job.schedule.jitter_seconds is not None:
+        return job.schedule.jitter_seconds
+    return SMOOTH_SECONDS
+
+
+def _period(expr: str) -> float:
+    period = _periods.get(expr)
+    if period is None:
+        compiled = cron.parse(expr)
+        fires = []
+        ts = time.time()
+        for _ in range(_PERIOD_SAMPLES):
+            ts = compiled.next_fire(ts)
+            if ts is None:
+                break
+            fires.append(ts)
+        gaps = [b - a for a, b in zip(fires, fires[1:])]
+        period = min(gaps) if gaps else float("inf")
+        _periods[expr] = period
+    return period
+
+
+def offset(job: JobConfig, expr: str | None = None) -> int:
+    """Seconds after each cron fire at which the job actually starts."""
+    size = window(job)
+    if size <= 0:
+        return 0
+    expr = expr or job.schedule.to_cron()
+    try:
+        period = _period(expr)
+    except ValueError:
+        return 0
+    if period != float("inf"):
+        size = min(size, int(period) - 1)
+    if size <= 0:
+        return 0
+    digest = hashlib.blake2b(job.id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % (size + 1)
@@ -0,0 +1,535 @@
+"""Run log access: in-memory tails of running jobs, ranged file reads,
+background compression and search.
+
+Readers seek into log files instead of loading them, so a 500 MB log
+costs no more to page through than a small one.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import codecs
+import gzip
+import json
+import os
+import re
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+# Bytes of recent output kept in memory per running job
+RING_BYTES = 256 * 1024
+# Chunks a live subscriber may fall behind before it is dropped
+SUBSCRIBER_BACKLOG = 1024
+READ_BLOCK = 64 * 1024
+
+
+class LogTail:
+    """Ring buffer of a running job's output with live subscribers.
+
+    `offset` is the total number of bytes ever written, i.e. the file
+    position just past the newest byte; the buffer holds the bytes ending
+    there. Subscribers receive `(offset, data)` chunks and a final None.
+    """
+
+    def __init__(self, capacity: int = RING_BYTES):
+        self.capacity = capacity
+        self.offset = 0
+        self.closed = False
+        self._buf = bytearray()
+        self._subs: set[asyncio.Queue] = set()
+
+    def write(self, data: bytes):
+        start = self.offset
+        self._buf += data
+        if len(self._buf) > self.capacity:
+            del self._buf[:len(self._buf) - self.capacity]
+        self.offset += len(data)
+        for q in list(self._subs):
+            try:
+                q.put_nowait((start, data))
+            except asyncio.QueueFull:
+                # Too slow; it can reconnect with an offset and read the file.
+                self._subs.discard(q)
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(None)
+
+    def snapshot(self) -> tuple[int, bytes]:
+        """Return (start offset, buffered bytes)."""
+        return self.offset - len(self._buf), bytes(self._buf)
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        if self.closed:
+            q.put_nowait(None)
+        else:
+            self._subs.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self._subs.discard(q)
+
+    def close(self):
+        self.closed = True
+        for q in self._subs:
+            try:
+                q.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+        self._subs.clear()
+
+
+# ── Log files ─────────────────────────────────────────────────
+# A running job writes a plain `{run_id}.log`. Once the run has finished the
+# compressor rewrites it as `{run_id}.log.gz`, a multi-member gzip file with
+# one member ("frame") per FRAME_BYTES of raw output, so it stays readable
+# with zcat, plus `{run_id}.log.idx`, a JSON index of where each frame
+# starts in raw bytes, compressed bytes and lines. Every reader below takes
+# the `.log` path and picks whichever form exists, decompressing only the
+# frames it touches.
+
+COMPRESS = os.environ.get("CRONUI_LOG_COMPRESS", "1") != "0"
+# Logs smaller than this stay plain; gzip overhead isn't worth it
+COMPRESS_MIN_BYTES = 4096
+FRAME_BYTES = 256 * 1024
+COMPRESS_LEVEL = 6
+
+
+def _gz_path(path: Path) -> Path:
+    return path.with_name(path.name + ".gz")
+
+
+def _idx_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def samples_path(path: Path) -> Path:
+    """JSON-lines resource samples recorded next to a run's log."""
+    return path.with_name(path.name + ".samples")
+
+
+def profile_path(path: Path) -> Path:
+    """cProfile stats of a profiled run, next to its log."""
+    return path.with_name(path.name + ".prof")
+
+
+class _PlainLog:
+    def __init__(self, f):
+        self._f = f
+
+    @property
+    def size(self) -> int:
+        return os.fstat(self._f.fileno()).st_size
+
+    def read(self, offset: int, n: int = -1) -> bytes:
+        self._f.seek(offset)
+        return self._f.read(n)
+
+    def blocks(self, offset: int = 0):
+        """Yield (offset, block) pairs up to the current end of file."""
+        while True:
+            block = self.read(offset, READ_BLOCK)
+            if not block:
+                return
+            yield offset, block
+            offset += len(block)
+
+    def line_offset(self, line: int) -> int:
+        """Byte offset where 0-based `line` starts (scans; there is no index)."""
+        seen = 0
+        for pos, block in self.blocks():
+            count = block.count(b"\n")
+            if seen + count >= line:
+                cut = -1
+                for _ in range(line - seen):
+                    cut = block.index(b"\n", cut + 1)
+                return pos + cut + 1
+            seen += count
+        return self.size
+
+    def close(self):
+        self._f.close()
+
+
+class _FramedLog:
+    def __init__(self, f, index: dict):
+        self._f = f
+        self.size = index["size"]
+        # [raw_offset, compressed_offset, compressed_length, first_line]
+        self._frames = index["frames"]
+        self._raw = [fr[0] for fr in self._frames]
+        self._lines = [fr[3] for fr in self._frames]
+        self._cached: tuple[int, bytes] = (-1, b"")
+
+    def _frame(self, i: int) -> bytes:
+        if self._cached[0] != i:
+            _, comp_off, comp_len, _ = self._frames[i]
+            self._f.seek(comp_off)
+            self._cached = (i, zlib.decompress(self._f.read(comp_len), wbits=31))
+        return self._cached[1]
+
+    def read(self, offset: int, n: int = -1) -> bytes:
+        end = self.size if n < 0 else min(self.size, offset + n)
+        out = []
+        i = bisect.bisect_right(self._raw, offset) - 1
+        while offset < end and 0 <= i < len(self._frames):
+            data = self._frame(i)
+            piece = data[offset - self._raw[i]:end - self._raw[i]]
+            out.append(piece)
+            offset += len(piece)
+            i += 1
+        return b"".join(out)
+
+    def blocks(self, offset: int = 0):
+        i = max(bisect.bisect_right(self._raw, offset) - 1, 0)
+        for i in range(i, len(self._frames)):
+            data = self._frame(i)[max(offset - self._raw[i], 0):]
+            if data:
+                yield max(offset, self._raw[i]), data
+
+    def line_offset(self, line: int) -> int:
+        """Byte offset where 0-based `line` starts, via the frame line index."""
+        i = bisect.bisect_right(self._lines, line) - 1
+        if i < 0:
+            return 0
+        data = self._frame(i)
+        cut = -1
+        for _ in range(line - self._lines[i]):
+            cut = data.find(b"\n", cut + 1)
+            if cut < 0:
+                return self.size
+        return self._raw[i] + cut + 1
+
+    def close(self):
+        self._f.close()
+
+
+@contextmanager
+def open_log(path: Path):
+    """Open a run log, plain or compressed. Raises FileNotFoundError."""
+    try:
+        log = _PlainLog(open(path, "rb"))
+    except FileNotFoundError:
+        # Open the data before reading the index; both are written before the
+        # plain file is removed, so a missing index means neither exists.
+        f = open(_gz_path(path), "rb")
+        try:
+            index = json.loads(_idx_path(path).read_bytes())
+        except BaseException:
+            f.close()
+            raise
+        log = _FramedLog(f, index)
+    try:
+        yield log
+    finally:
+        log.close()
+
+
+def log_exists(path: Path) -> bool:
+    return path.exists() or _gz_path(path).exists()
+
+
+def log_stat(path: Path) -> os.stat_result:
+    """Stat of the log as stored: the plain file, else its compressed form."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return os.stat(_gz_path(path))
+
+
+def file_size(path: Path) -> int:
+    with open_log(path) as log:
+        return log.size
+
+
+def read_range(path: Path, offset: int = 0, limit: Optional[int] = None) -> tuple[int, bytes]:
+    """Read up to `limit` bytes starting at `offset`. Returns (offset, data)."""
+    offset = max(offset, 0)
+    with open_log(path) as log:
+        data = log.read(offset, -1 if limit is None else limit)
+    return offset, data
+
+
+def read_tail(path: Path, lines: int) -> tuple[int, bytes]:
+    """Read the last `lines` lines by scanning backwards in blocks."""
+    with open_log(path) as log:
+        end = pos = log.size
+        if lines <= 0:
+            return end, b""
+        blocks = []
+        newlines = 0
+        # One extra newline is needed to find where the first wanted line starts
+        while pos > 0 and newlines <= lines:
+            step = min(READ_BLOCK, pos)
+            pos -= step
+            block = log.read(pos, step)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+    data = b"".join(reversed(blocks))
+    cut = len(data) - 1 if data.endswith(b"\n") else len(data)
+    for _ in range(lines):
+        cut = data.rfind(b"\n", 0, cut)
+        if cut < 0:
+            break
+    start = cut + 1
+    return pos + start, data[start:]
+
+
+def read_lines(path: Path, line: int, count: int) -> tuple[int, bytes]:
+    """Read `count` lines starting at 1-based `line`. Returns (offset, data)."""
+    with open_log(path) as log:
+        start = log.line_offset(max(line, 1) - 1)
+        out = []
+        found = 0
+        for _, block in log.blocks(start):
+            out.append(block)
+            found += block.count(b"\n")
+            if found >= count:
+                break
+    data = b"".join(out)
+    cut = -1
+    for _ in range(count):
+        cut = data.find(b"\n", cut + 1)
+        if cut < 0:
+            return start, data
+    return start, data[:cut + 1]
+
+
+def iter_range(path: Path, offset: int = 0):
+    """Yield (offset, block) pairs from `offset` to the current end of the log."""
+    with open_log(path) as log:
+        yield from log.blocks(offset)
+
+
+def read_samples(path: Path) -> list[dict]:
+    """Resource samples of a run, oldest first; empty if it wasn't sampled."""
+    try:
+        with open(samples_path(path)) as f:
+            return [json.loads(line) for line in f if line.endswith("\n")]
+    except FileNotFoundError:
+        return []
+
+
+def remove_log(path: Path) -> bool:
+    """Delete a run log in whichever forms exist. Returns True if any did."""
+    removed = False
+    for p in (path, _gz_path(path), _idx_path(path), samples_path(path), profile_path(path)):
+        try:
+            p.unlink()
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+# ── Compression ───────────────────────────────────────────────
+
+def compress_log(path: Path) -> bool:
+    """Rewrite a finished plain log as framed gzip plus index.
+
+    Returns False if the log is missing or too small to bother.
+    """
+    try:
+        if os.stat(path).st_size < COMPRESS_MIN_BYTES:
+            return False
+    except FileNotFoundError:
+        return False
+    gz, idx = _gz_path(path), _idx_path(path)
+    gz_tmp, idx_tmp = gz.with_name(gz.name + ".tmp"), idx.with_name(idx.name + ".tmp")
+    frames = []
+    raw_off = comp_off = line = 0
+    with open(path, "rb") as src, open(gz_tmp, "wb") as dst:
+        while block := src.read(FRAME_BYTES):
+            data = gzip.compress(block, COMPRESS_LEVEL, mtime=0)
+            dst.write(data)
+            frames.append([raw_off, comp_off, len(data), line])
+            raw_off += len(block)
+            comp_off += len(data)
+            line += block.count(b"\n")
+    idx_tmp.write_text(json.dumps({"size": raw_off, "lines": line, "frames": frames}))
+    # Index first, then data, then drop the plain file: readers try the plain
+    # file first, so at every moment one complete form is visible.
+    os.replace(idx_tmp, idx)
+    os.replace(gz_tmp, gz)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        # Removed by retention while we were compressing
+        remove_log(path)
+        return False
+    return True
+
+
+_compress_queue: Optional[asyncio.Queue] = None
+_compressor: Optional[asyncio.Task] = None
+
+
+def start(log_dir: Path, scan: bool = True):
+    """Start the background compressor and queue logs left by earlier runs.
+
+    Called from the app lifespan before any run can start, so every plain
+    log found here is finished. With queue workers sharing the directory
+    that no longer holds, so they pass scan=False and only compress their
+    own runs' logs.
+    """
+    global _compress_queue, _compressor
+    if not COMPRESS:
+        return
+    _compress_queue = asyncio.Queue()
+    for tmp in log_dir.glob("*.tmp") if scan else ():
+        tmp.unlink(missing_ok=True)
+    for path in sorted(log_dir.glob("*.log")) if scan else ():
+        _compress_queue.put_nowait(path)
+    _compressor = asyncio.create_task(_compress_loop())
+
+
+async def stop():
+    global _compressor
+    if _compressor:
+        _compressor.cancel()
+        try:
+            await _compressor
+        except asyncio.CancelledError:
+            pass
+        _compressor = None
+
+
+def compress_later(path: Path):
+    """Queue a finished run's log for background compression."""
+    if _compress_queue is not None:
+        _compress_queue.put_nowait(path)
+
+
+async def _compress_loop():
+    while True:
+        path = await _compress_queue.get()
+        try:
+            await asyncio.to_thread(compress_log, path)
+        except Exception as exc:
+            print(f"[CRONUI] Failed to compress log {path}: {exc}")
+
+
+# ── Search ────────────────────────────────────────────────────
+
+def _line_chunks(log):
+    """Yield (first_line, chunk) with each chunk ending on a line boundary
+    (except possibly the last); first_line is 0-based."""
+    carry = b""
+    line = 0
+    for _, block in log.blocks():
+        block = carry + block
+        cut = block.rfind(b"\n") + 1
+        carry = block[cut:]
+        if cut:
+            yield line, block[:cut]
+            line += block.count(b"\n", 0, cut)
+    if carry:
+        yield line, carry
+
+
+def search(path: Path, pattern: re.Pattern, context: int = 2, max_matches: int = 100) -> list[dict]:
+    """Find lines matching `pattern` (a bytes regex) with `context` lines around.
+
+    Whole chunks (a frame of a compressed log) are tested first and only
+    chunks with a hit are split into lines. Returns dicts with the 1-based
+    `line`, its `text`, and `before`/`after` context.
+    """
+    matches: list[dict] = []
+    before: deque[bytes] = deque(maxlen=context)
+    waiting: list[dict] = []  # matches still collecting `after` lines
+
+    def text(b: bytes) -> str:
+        return b.decode(errors="replace").rstrip("\r")
+
+    with open_log(path) as log:
+        for first, chunk in _line_chunks(log):
+            if not waiting and not pattern.search(chunk):
+                if context:
+                    before.extend(chunk.rstrip(b"\n").rsplit(b"\n", context)[-context:])
+                continue
+            lines = chunk.split(b"\n")
+            if chunk.endswith(b"\n"):
+                lines.pop()
+            for n, line in enumerate(lines, first + 1):
+                for m in waiting:
+                    m["after"].append(text(line))
+                waiting = [m for m in waiting if len(m["after"]) < context]
+                if len(matches) < max_matches and pattern.search(line):
+                    m = {"line": n, "text": text(line), "before": [text(b) for b in before], "after": []}
+                    matches.append(m)
+                    if context:
+                        waiting.append(m)
+                before.append(line)
+                if len(matches) >= max_matches and not waiting:
+                    return matches
+    return matches
+
+
+# ── Live streaming ────────────────────────────────────────────
+
+def _sse(next_offset: int, text: str, event: Optional[str] = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}id: {next_offset}\ndata: {json.dumps(text)}\n\n"
+
+
+async def sse_stream(path: Path, tail: Optional[LogTail], offset: int = 0):
+    """Server-Sent Events for a log from byte `offset` onwards.
+
+    Bytes older than the in-memory tail are read from the file, then live
+    chunks follow until the run ends. Each event's id is the byte offset
+    to resume from; a final "end" event closes the stream.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    queue = tail.subscribe() if tail else None
+    try:
+        if tail:
+            buf_start, buffered = tail.snapshot()
+        else:
+            buf_start, buffered = await asyncio.to_thread(file_size, path), b""
+
+        pos = max(offset, 0)
+        # Catch up from disk for anything that already left the ring buffer
+        while pos < buf_start:
+            _, block = await asyncio.to_thread(
+                read_range, path, pos, min(READ_BLOCK, buf_start - pos))
+            if not block:
+                break
+            pos += len(block)
+            yield _sse(pos, decoder.decode(block))
+        pos = max(pos, buf_start)
+        if pos < buf_start + len(buffered):
+            block = buffered[pos - buf_start:]
+            pos += len(block)
+            yield _sse(pos, decoder.decode(block))
+
+        while queue is not None:
+            item = await queue.get()
+            if item is None:
+                break
+            start, data = item
+            if start + len(data) <= pos:
+                continue
+            if start < pos:
+                data = data[pos - start:]
+            pos += len(data)
+            yield _sse(pos, decoder.decode(data))
+
+        if tail and not tail.closed:
+            # Dropped for falling behind; the client reconnects with the
+            # Last-Event-ID offset and catches up from the file.
+            return
+        if tail:
+            # Notes appended after the pipe closed (timeout/cancel) are only in the file
+            while True:
+                _, block = await asyncio.to_thread(read_range, path, pos, READ_BLOCK)
+                if not block:
+                    break
+                pos += len(block)
+                yield _sse(pos, decoder.decode(block))
+        yield _sse(pos, decoder.decode(b"", final=True), event="end")
+    finally:
+        if tail and queue is not None:
+            tail.unsubscribe(queue)
@@ -1,85 +1,246 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import re
+import time
 import uuid
 from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
+from typing import Any, Optional
 
-import yaml
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import iterate_in_threadpool
 
+import dag
 import db
+import dirindex
+import events
+import executor
+import logstore
+import metrics
+import profiling
+import registry
+import retention
 import scheduler
-from executor import kill_job, run_job
+import warmpool
+from executor import LOGS_DIR, QueueFullError, get_tail, kill_job, log_file_path, python_for, run_job
 from models import (
+    BulkItemResult,
+    BulkResult,
+    BulkToggle,
+    DailyStats,
     JobConfig,
     JobCreate,
+    JobImport,
+    JobPatch,
     JobUpdate,
     JobWithRecentRuns,
+    LogMatch,
+    Regression,
+    ResourceSample,
+    RunListItem,
+    RunStatus,
+    ScheduleDensity,
     TriggerType,
+    UpcomingSchedule,
 )
+from storage import decode_cursor, encode_cursor
 
 BASE_DIR = Path(__file__).parent
-CONFIG_DIR = BASE_DIR / "config"
-CONFIG_DIR.mkdir(exist_ok=True)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    queued = executor.EXECUTION == "queue"
     await db.init_pool()
     await db.ensure_table()
-    await db.cleanup_stale_runs()
+    if not queued:
+        # In queue mode runs belong to workers and outlive this process
+        await db.cleanup_stale_runs()
+    events.start()
+    registry.load_all()
+    logstore.start(LOGS_DIR, scan=not queued)
+    scheduler.start(registry.all_jobs())
+    retention.start()
+    dag.start()
+    executor.start()
+    dirindex.start()
+    if warmpool.ENABLED and not queued:
+        await warmpool.prestart({python_for(j.script_path) for j in registry.all_jobs()
+                                 if j.warm and j.enabled and j.script_path.endswith(".py")})
     yield
+    await dirindex.stop()
+    await executor.stop()
+    dag.stop()
+    await retention.stop()
+    scheduler.stop()
+    await warmpool.stop()
+    await logstore.stop()
+    await db.flush()
     await db.close_pool()
 
 
 app = FastAPI(title="FastCronUI", lifespan=lifespan)
 
+# (method, route, status) -> bound histogram child
+_http_hists: dict[tuple[str, str, int], object] = {}
+_CRONTAB_LAG = metrics.TRIGGER_LAG.labels("crontab")
 
-# ── Job YAML helpers ──────────────────────────────────────────
+
+class _LatencyMiddleware:
+    """Observe time to response start per route template (plain ASGI, so
+    streaming responses pass through untouched)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                key = (scope["method"], route.path if route else "unmatched", message["status"])
+                hist = _http_hists.get(key)
+                if hist is None:
+                    hist = _http_hists[key] = metrics.HTTP_REQUEST.labels(*key)
+                hist.observe(time.perf_counter() - start)
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+
+app.add_middleware(_LatencyMiddleware)
+# Job lists and logs compress well; small bodies aren't worth the CPU.
+# SSE streams are passed through uncompressed by the middleware.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
+
+# ── Conditional GET ───────────────────────────────────────────
+# ETags come from change counters (events.version, registry.version) and
+# log file stats, and are checked before any storage query, so a poll
+# that finds nothing new costs a few dict lookups and an empty 304.
+
+# Keeps ETags of a previous process, whose counters restarted, from matching
+_BOOT = uuid.uuid4().hex[:8]
+
+
+def _etag(request: Request, *parts) -> str:
+    query = hashlib.md5(request.url.query.encode(), usedforsecurity=False).hexdigest()[:12]
+    return f'W/"{_BOOT}-{"-".join(map(str, parts))}-{query}"'
+
+
+def _cache_headers(etag: str, modified: float) -> dict[str, str]:
+    return {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True), "Cache-Control": "no-cache"}
+
+
+def _not_modified(request: Request, etag: str, modified: float) -> bool:
+    """Whether the client's copy is current; If-None-Match wins over If-Modified-Since."""
+    match = request.headers.get("if-none-match")
+    if match is not None:
+        tags = [t.strip().removeprefix("W/") for t in match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    since = request.headers.get("if-modified-since")
+    if since:
+        try:
+            return parsedate_to_datetime(since).timestamp() >= int(modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+# ── Job config helpers ────────────────────────────────────────
 
 def _load_job(job_id: str) -> JobConfig:
-    path = CONFIG_DIR / f"{job_id}.yaml"
-    if not path.exists():
+    job = registry.get(job_id)
+    if job is None:
         raise HTTPException(404, f"Job {job_id} not found")
-    with open(path) as f:
-        return JobConfig(**yaml.safe_load(f))
+    return job
 
 
 def _save_job(job: JobConfig):
-    path = CONFIG_DIR / f"{job.id}.yaml"
-    with open(path, "w") as f:
-        yaml.dump(job.model_dump(mode="json"), f, default_flow_style=False)
+    errors = dag.validate([job])
+    if errors:
+        raise HTTPException(400, errors[job.id])
+    registry.save(job)
+    events.publish("job", job.model_dump(mode="json"))
 
 
 def _all_jobs() -> list[JobConfig]:
-    jobs = []
-    for p in sorted(CONFIG_DIR.glob("*.yaml")):
-        with open(p) as f:
-            data = yaml.safe_load(f)
-            if data:
-                jobs.append(JobConfig(**data))
-    return jobs
+    return registry.all_jobs()
 
 
 # ── API: Jobs ─────────────────────────────────────────────────
 
-@app.get("/api/jobs")
-async def list_jobs() -> list[JobWithRecentRuns]:
+_JOBS_JSON = TypeAdapter(list[JobWithRecentRuns])
+# (etag, body) of the last job list built
+_jobs_body: Optional[tuple[str, bytes]] = None
+
+
+@app.get("/api/jobs", response_model=list[JobWithRecentRuns])
+async def list_jobs(request: Request):
+    """Every job with its recent runs. Unchanged since the client's copy
+    (no job or run change, same minute for next_run) answers 304."""
+    global _jobs_body
+    generation, jobs_changed = registry.version()
+    seq, runs_changed = events.version("job", "job_deleted", "run")
+    minute = int(time.time() // 60)
+    etag = _etag(request, "jobs", generation, seq, minute)
+    modified = max(jobs_changed, runs_changed, minute * 60)
+    headers = _cache_headers(etag, modified)
+    if _not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+    if _jobs_body and _jobs_body[0] == etag:
+        return Response(_jobs_body[1], media_type="application/json", headers=headers)
+
+    jobs = _all_jobs()
+    runs_by_job = await db.get_dashboard_runs([job.id for job in jobs], per_job=10)
     result = []
-    for job in _all_jobs():
-        latest = await db.get_latest_run(job.id)
-        recent = await db.get_recent_runs(job.id, limit=10)
-        cron_expr = job.schedule.to_cron()
+    for job in jobs:
+        recent = runs_by_job.get(job.id, [])
+        latest = recent[0] if recent else None
+        cron_expr = job.schedule.to_cron() if job.schedule.timed else ""
         result.append(JobWithRecentRuns(
             config=job,
             last_status=latest.status if latest else None,
             last_run=latest.started_at if latest else None,
-            next_run=cron_expr,
+            schedule=cron_expr,
+            next_run=scheduler.next_run(job),
             recent_runs=recent,
         ))
-    return result
+    body = _JOBS_JSON.dump_json(result)
+    _jobs_body = (etag, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/schedule/upcoming")
+def upcoming_fires(hours: float = Query(24, gt=0, le=24 * 7),
+                   per_job: int = Query(10, ge=1, le=1000),
+                   top: int = Query(20, ge=1, le=1000),
+                   spread: bool = True) -> UpcomingSchedule:
+    """Projected start times across all jobs, with the busiest minutes.
+    spread=false shows the exact cron times, without jitter."""
+    now = time.time()
+    return scheduler.upcoming(_all_jobs(), now, now + hours * 3600, per_job=per_job, top=top,
+                              spread=spread)
+
+
+@app.get("/api/schedule/density")
+def schedule_density(hours: float = Query(24, gt=0, le=24 * 7),
+                     bucket: int = Query(60, ge=1, le=3600),
+                     spread: bool = True) -> ScheduleDensity:
+    """Projected job starts per `bucket` seconds over the next `hours`."""
+    now = time.time()
+    return scheduler.density(_all_jobs(), now, now + hours * 3600, bucket=bucket, spread=spread)
 
 
 @app.get("/api/jobs/{job_id}")
@@ -95,12 +256,22 @@ def create_job(body: JobCreate) -> JobConfig:
     return job
 
 
+# Optional per-job overrides an explicit null in an update removes
+_CLEARABLE = {"retention", "limits"}
+
+
+def _job_updates(body: JobUpdate, **kwargs) -> dict[str, Any]:
+    """Fields a JobUpdate changes: null clears the _CLEARABLE ones and is
+    ignored for the rest, as is anything left out."""
+    return {k: v for k, v in body.model_dump(exclude_unset=True, **kwargs).items()
+            if v is not None or k in _CLEARABLE}
+
+
 @app.put("/api/jobs/{job_id}")
 def update_job(job_id: str, body: JobUpdate) -> JobConfig:
     job = _load_job(job_id)
-    updates = body.model_dump(exclude_none=True)
     merged = job.model_dump()
-    merged.update(updates)
+    merged.update(_job_updates(body))
     job = JobConfig(**merged)
     _save_job(job)
     scheduler.sync_job(job)
@@ -109,22 +280,158 @@ def update_job(job_id: str, body: JobUpdate) -> JobConfig:
 
 @app.delete("/api/jobs/{job_id}")
 def delete_job(job_id: str):
-    path = CONFIG_DIR / f"{job_id}.yaml"
-    if path.exists():
-        path.unlink()
+    if registry.delete(job_id):
+        db.forget_job(job_id)
+        events.publish("job_deleted", {"id": job_id})
     scheduler.remove_job(job_id)
     return {"ok": True}
 
 
+# ── API: Bulk jobs ────────────────────────────────────────────
+# Every item is validated first; configs are written only if all of them
+# are valid, in one all-or-nothing pass, and scheduled in one reconcile.
+
+def _validation_error(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'body'}: {e['msg']}" for e in exc.errors())
+
+
+def _apply_bulk(results: list[BulkItemResult], jobs: list[JobConfig]):
+    if jobs:
+        # Dependencies are checked against the batch as a whole
+        errors = dag.validate(jobs)
+        for r in results:
+            if r.id in errors and r.status != "error":
+                r.status, r.error = "error", errors[r.id]
+    if any(r.status == "error" for r in results):
+        body = BulkResult(ok=False, results=results)
+        return JSONResponse(body.model_dump(mode="json"), status_code=422)
+    if jobs:
+        try:
+            registry.save_many(jobs)
+        except OSError as exc:
+            raise HTTPException(500, f"Could not write job configs: {exc}")
+        for job in jobs:
+            events.publish("job", job.model_dump(mode="json"))
+            scheduler.sync_job(job)
+    return BulkResult(ok=True, results=results)
+
+
+@app.get("/api/jobs/bulk/export")
+def export_jobs(ids: Optional[str] = None) -> list[JobConfig]:
+    """Job configs, all or a comma-separated subset, in the import format."""
+    jobs = _all_jobs()
+    if ids:
+        wanted = set(ids.split(","))
+        jobs = [j for j in jobs if j.id in wanted]
+    return jobs
+
+
+@app.post("/api/jobs/bulk/import", response_model=BulkResult)
+def import_jobs(items: list[dict[str, Any]]):
+    """Create jobs, or overwrite existing ones whose id is given."""
+    results: list[BulkItemResult] = []
+    jobs: list[JobConfig] = []
+    seen: set[str] = set()
+    for i, item in enumerate(items):
+        try:
+            body = JobImport.model_validate(item)
+        except ValidationError as exc:
+            results.append(BulkItemResult(index=i, id=item.get("id"), status="error",
+                                          error=_validation_error(exc)))
+            continue
+        job_id = body.id or uuid.uuid4().hex[:8]
+        if job_id in seen:
+            results.append(BulkItemResult(index=i, id=job_id, status="error",
+                                          error="Duplicate id in batch"))
+            continue
+        seen.add(job_id)
+        job = JobConfig(**{**body.model_dump(), "id": job_id})
+        existing = registry.get(job_id)
+        if existing == job:
+            results.append(BulkItemResult(index=i, id=job_id, status="unchanged"))
+            continue
+        results.append(BulkItemResult(index=i, id=job_id,
+                                      status="updated" if existing else "created"))
+        jobs.append(job)
+    return _apply_bulk(results, jobs)
+
+
+@app.post("/api/jobs/bulk/patch", response_model=BulkResult)
+def patch_jobs(items: list[dict[str, Any]]):
+    """Apply a JobUpdate to each listed job."""
+    results: list[BulkItemResult] = []
+    jobs: list[JobConfig] = []
+    seen: set[str] = set()
+    for i, item in enumerate(items):
+        try:
+            patch = JobPatch.model_validate(item)
+            job = registry.get(patch.id)
+            if job is None:
+                raise LookupError(f"Job {patch.id} not found")
+            if patch.id in seen:
+                raise LookupError("Duplicate id in batch")
+            seen.add(patch.id)
+            merged = job.model_dump()
+            merged.update(_job_updates(patch, exclude={"id"}))
+            updated = JobConfig(**merged)
+        except ValidationError as exc:
+            results.append(BulkItemResult(index=i, id=item.get("id"), status="error",
+                                          error=_validation_error(exc)))
+            continue
+        except LookupError as exc:
+            results.append(BulkItemResult(index=i, id=item.get("id"), status="error",
+                                          error=str(exc)))
+            continue
+        if updated == job:
+            results.append(BulkItemResult(index=i, id=job.id, status="unchanged"))
+            continue
+        results.append(BulkItemResult(index=i, id=job.id, status="updated"))
+        jobs.append(updated)
+    return _apply_bulk(results, jobs)
+
+
+@app.post("/api/jobs/bulk/toggle", response_model=BulkResult)
+def toggle_jobs(body: BulkToggle):
+    """Enable or disable many jobs."""
+    results: list[BulkItemResult] = []
+    jobs: list[JobConfig] = []
+    seen: set[str] = set()
+    for i, job_id in enumerate(body.ids):
+        job = registry.get(job_id)
+        if job is None or job_id in seen:
+            error = "Duplicate id in batch" if job else f"Job {job_id} not found"
+            results.append(BulkItemResult(index=i, id=job_id, status="error", error=error))
+            continue
+        seen.add(job_id)
+        if job.enabled == body.enabled:
+            results.append(BulkItemResult(index=i, id=job_id, status="unchanged"))
+        else:
+            results.append(BulkItemResult(index=i, id=job_id, status="updated"))
+            jobs.append(job.model_copy(update={"enabled": body.enabled}))
+    return _apply_bulk(results, jobs)
+
+
 # ── API: Runs ─────────────────────────────────────────────────
 
 @app.post("/api/jobs/{job_id}/run")
-async def trigger_run(job_id: str, request: Request):
+async def trigger_run(job_id: str, request: Request, profile: bool = False):
+    """Start a run now; ?profile=true profiles this run of a .py job."""
     job = _load_job(job_id)
     trigger_header = request.headers.get("X-Trigger", "manual")
     trigger = TriggerType.scheduled if trigger_header == "scheduled" else TriggerType.manual
-    run_id = await run_job(job.id, job.script_path, job.timeout_seconds, trigger)
-    return {"run_id": run_id}
+    if trigger == TriggerType.scheduled:
+        # cron fires on the minute; the lag is how far into it we got here,
+        # less the sleep the entry adds for the job's jitter
+        jitter = request.headers.get("X-Jitter", "")
+        _CRONTAB_LAG.observe((time.time() - (int(jitter) if jitter.isdigit() else 0)) % 60)
+    try:
+        run_id = await run_job(job.id, job.script_path, job.timeout_seconds, trigger,
+                               max_concurrency=job.max_concurrency, overlap=job.overlap,
+                               priority=job.priority, warm=job.warm, limits=job.limits,
+                               profile=job.profile or profile)
+    except QueueFullError as exc:
+        raise HTTPException(429, str(exc))
+    return {"run_id": run_id, "skipped": run_id is None}
 
 
 @app.post("/api/jobs/{job_id}/kill")
@@ -133,35 +440,237 @@ async def kill_job_runs(job_id: str):
     return {"ok": True, "killed": killed}
 
 
+async def _run_page(request: Request, response: Response, limit: int, cursor: Optional[str],
+                    **filters) -> list[RunListItem] | Response:
+    """Fetch one keyset page; sets X-Next-Cursor when more rows follow.
+    Answers 304 if no run has changed since the client's copy."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    seq, modified = events.version("run")
+    etag = _etag(request, "runs", seq)
+    headers = _cache_headers(etag, modified)
+    if _not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    runs = await db.list_runs(limit + 1, after=after, **filters)
+    if len(runs) > limit:
+        runs = runs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(runs[-1].started_at, runs[-1].id)
+    return runs
+
+
 @app.get("/api/jobs/{job_id}/runs")
-async def get_runs(job_id: str, limit: int = 50):
-    return await db.get_runs_for_job(job_id, limit=limit)
+async def get_runs(job_id: str, request: Request, response: Response, limit: int = Query(50, ge=1, le=1000),
+                   cursor: Optional[str] = None,
+                   status: Optional[list[RunStatus]] = Query(None),
+                   trigger: Optional[list[TriggerType]] = Query(None),
+                   since: Optional[datetime] = None, until: Optional[datetime] = None) -> list[RunListItem]:
+    """Runs of one job, newest first. Pass X-Next-Cursor back as ?cursor= for the next page."""
+    return await _run_page(request, response, limit, cursor, job_id=job_id, statuses=status or (),
+                           triggers=trigger or (), since=since, until=until)
 
 
 @app.get("/api/runs")
-async def list_all_runs(limit: int = 100):
-    return await db.get_all_recent_runs(limit=limit)
+async def list_all_runs(request: Request, response: Response, limit: int = Query(100, ge=1, le=1000),
+                        cursor: Optional[str] = None, job_id: Optional[str] = None,
+                        status: Optional[list[RunStatus]] = Query(None),
+                        trigger: Optional[list[TriggerType]] = Query(None),
+                        since: Optional[datetime] = None, until: Optional[datetime] = None) -> list[RunListItem]:
+    return await _run_page(request, response, limit, cursor, job_id=job_id, statuses=status or (),
+                           triggers=trigger or (), since=since, until=until)
 
 
-@app.get("/api/runs/{run_id}/log")
-async def get_log(run_id: str):
+# ── API: Stats ────────────────────────────────────────────────
+
+def _stats_since(days: int) -> date:
+    return datetime.now(timezone.utc).date() - timedelta(days=max(days, 1))
+
+
+@app.get("/api/stats")
+async def all_stats(days: int = 30) -> list[DailyStats]:
+    """Daily per-job rollups of complete UTC days, oldest first."""
+    return await db.get_daily_stats(_stats_since(days))
+
+
+@app.get("/api/jobs/{job_id}/regressions")
+async def job_regressions(job_id: str, days: int = Query(30, ge=1),
+                          threshold: float = Query(profiling.REGRESSION_THRESHOLD, gt=1),
+                          baseline: int = Query(20, ge=1, le=500),
+                          limit: int = Query(1000, ge=1, le=profiling.MAX_REGRESSION_RUNS)) -> list[Regression]:
+    """Successful runs among the newest `limit` of the last `days` that took
+    over `threshold` times the median of the `baseline` successful runs
+    before them, newest first. Runs before the window count as baseline."""
+    _load_job(job_id)
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    success = [RunStatus.success]
+    runs = await db.list_runs(limit, job_id=job_id, statuses=success, since=since)
+    earlier = await db.list_runs(baseline, job_id=job_id, statuses=success, until=since)
+    flagged = profiling.regressions(runs + earlier, threshold, baseline,
+                                    min_history=min(5, baseline), since=since)
+    for reg in flagged:
+        reg.profiled = logstore.profile_path(log_file_path(reg.run_id)).exists()
+    return flagged
+
+
+@app.get("/api/jobs/{job_id}/stats")
+async def job_stats(job_id: str, days: int = 30) -> list[DailyStats]:
+    return await db.get_daily_stats(_stats_since(days), job_id)
+
+
+async def _log_path(run_id: str) -> Path:
     run = await db.get_run(run_id)
     if not run or not run.log_file:
         raise HTTPException(404, "Log not found")
     log_path = Path(run.log_file)
-    if not log_path.exists():
+    if not logstore.log_exists(log_path):
+        raise HTTPException(404, "Log file not found on disk")
+    return log_path
+
+
+@app.get("/api/runs/{run_id}/log")
+async def get_log(run_id: str, request: Request, offset: Optional[int] = None, limit: Optional[int] = None,
+                  tail: Optional[int] = None, line: Optional[int] = None, lines: int = 50):
+    """Whole log, a byte range (?offset=&limit=), the last N lines (?tail=N)
+    or N lines from a 1-based line number (?line=&lines=N).
+
+    Ranged responses carry X-Log-Offset / X-Log-Next-Offset so clients can
+    page or hand the next offset to the stream endpoint. Compressed logs
+    are decompressed transparently. The ETag follows the log file, so
+    polling a finished or idle log answers 304.
+    """
+    log_path = await _log_path(run_id)
+    try:
+        st = await asyncio.to_thread(logstore.log_stat, log_path)
+    except FileNotFoundError:
         raise HTTPException(404, "Log file not found on disk")
-    return PlainTextResponse(log_path.read_text(errors="replace"))
+    etag = _etag(request, "log", st.st_mtime_ns, st.st_size)
+    headers = _cache_headers(etag, st.st_mtime)
+    if _not_modified(request, etag, st.st_mtime):
+        return Response(status_code=304, headers=headers)
+    if tail is not None:
+        start, data = await asyncio.to_thread(logstore.read_tail, log_path, tail)
+    elif line is not None:
+        start, data = await asyncio.to_thread(logstore.read_lines, log_path, line, lines)
+    elif offset is not None or limit is not None:
+        start, data = await asyncio.to_thread(logstore.read_range, log_path, offset or 0, limit)
+    elif log_path.exists():
+        return FileResponse(log_path, media_type="text/plain; charset=utf-8", headers=headers)
+    else:
+        return StreamingResponse(
+            iterate_in_threadpool(block for _, block in logstore.iter_range(log_path)),
+            media_type="text/plain; charset=utf-8", headers=headers,
+        )
+    return PlainTextResponse(data.decode(errors="replace"), headers={
+        **headers,
+        "X-Log-Offset": str(start),
+        "X-Log-Next-Offset": str(start + len(data)),
+    })
+
+
+@app.get("/api/runs/{run_id}/samples")
+async def get_samples(run_id: str) -> list[ResourceSample]:
+    """Memory/CPU curve of a run's process tree (needs CRONUI_SAMPLE_SECONDS)."""
+    run = await db.get_run(run_id)
+    if not run or not run.log_file:
+        raise HTTPException(404, "Run not found")
+    return await asyncio.to_thread(logstore.read_samples, Path(run.log_file))
+
+
+@app.get("/api/runs/{run_id}/profile")
+async def get_profile(run_id: str, top: int = Query(30, ge=1, le=1000),
+                      sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+                      raw: bool = False):
+    """Hottest functions of a profiled run; ?raw=true downloads the cProfile
+    stats file for pstats or snakeviz."""
+    run = await db.get_run(run_id)
+    if not run or not run.log_file:
+        raise HTTPException(404, "Run not found")
+    path = logstore.profile_path(Path(run.log_file))
+    if not path.exists():
+        raise HTTPException(404, "Run was not profiled, or is still running")
+    if raw:
+        return FileResponse(path, media_type="application/octet-stream",
+                            filename=f"{run_id}.prof")
+    try:
+        return await asyncio.to_thread(profiling.summarize, run_id, path, top, sort)
+    except (OSError, EOFError, ValueError, TypeError) as exc:
+        raise HTTPException(422, f"Unreadable profile: {exc}")
+
+
+@app.get("/api/runs/{run_id}/log/stream")
+async def stream_log(run_id: str, request: Request, offset: int = 0):
+    """Server-Sent Events tail of a log; follows live output while the run is active."""
+    log_path = await _log_path(run_id)
+    resume = request.headers.get("Last-Event-ID")
+    if resume and resume.isdigit():
+        offset = int(resume)
+    return StreamingResponse(
+        logstore.sse_stream(log_path, get_tail(run_id), offset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/jobs/{job_id}/logs/search")
+async def search_logs(job_id: str, q: str, regex: bool = False, ignore_case: bool = False,
+                      context: int = Query(2, ge=0, le=20), runs: int = Query(20, ge=1, le=500),
+                      limit: int = Query(100, ge=1, le=1000)) -> list[LogMatch]:
+    """Grep the logs of a job's last `runs` runs, newest run first."""
+    try:
+        pattern = re.compile((q if regex else re.escape(q)).encode(),
+                             re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except re.error as exc:
+        raise HTTPException(400, f"Invalid pattern: {exc}")
+    results: list[LogMatch] = []
+    for item in await db.list_runs(runs, job_id=job_id):
+        # List rows carry no log_file; rotated or moved logs are only found
+        # through the stored path, as the log endpoints do
+        run = await db.get_run(item.id)
+        path = Path(run.log_file) if run and run.log_file else log_file_path(item.id)
+        try:
+            found = await asyncio.to_thread(logstore.search, path, pattern, context, limit - len(results))
+        except FileNotFoundError:
+            continue
+        results.extend(LogMatch(run_id=item.id, started_at=item.started_at, **m) for m in found)
+        if len(results) >= limit:
+            break
+    return results
+
+
+# ── API: Metrics ──────────────────────────────────────────────
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# ── API: Events ───────────────────────────────────────────────
+
+@app.get("/api/events")
+async def event_stream(request: Request, cursor: Optional[int] = None):
+    """Server-Sent Events of run/job changes; resume with ?cursor= or Last-Event-ID."""
+    resume = request.headers.get("Last-Event-ID")
+    if resume and resume.isdigit():
+        cursor = int(resume)
+    return StreamingResponse(
+        events.sse_stream(cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ── API: File Browser ─────────────────────────────────────────
 
-BROWSE_ROOT = Path.home()
-HIDDEN_DIRS = {".git", "node_modules", "__pycache__", ".tox", ".mypy_cache"}
+BROWSE_ROOT = dirindex.ROOT
 
 
 @app.get("/api/browse")
-def browse(path: str = ""):
+def browse(path: str = "", q: str = "", cursor: Optional[str] = None,
+           limit: int = Query(500, ge=1, le=5000)):
+    """One page of a directory, optionally filtered by name prefix `q`;
+    pass the returned `next_cursor` as `cursor` for the next page."""
     target = (BROWSE_ROOT / path).resolve()
     if not str(target).startswith(str(BROWSE_ROOT)):
         raise HTTPException(403, "Access denied")
@@ -171,20 +680,32 @@ def browse(path: str = ""):
     if target.is_file():
         return {"type": "file", "path": str(target)}
 
-    items = []
     try:
-        for entry in sorted(target.iterdir()):
-            if entry.name in HIDDEN_DIRS:
-                continue
-            if entry.is_dir():
-                items.append({"name": entry.name, "type": "dir"})
-            else:
-                items.append({"name": entry.name, "type": "file", "path": str(entry)})
+        entries = dirindex.listing(target)
     except PermissionError:
-        pass
+        entries = []
+    found, next_cursor = dirindex.page(entries, q, cursor, limit)
+    items = [
+        {"name": name, "type": "dir"} if is_dir
+        else {"name": name, "type": "file", "path": str(target / name)}
+        for name, is_dir in found
+    ]
 
     rel = str(target.relative_to(BROWSE_ROOT))
-    return {"type": "dir", "path": rel, "items": items}
+    return {"type": "dir", "path": rel, "items": items, "next_cursor": next_cursor}
+
+
+@app.get("/api/browse/scripts")
+def find_scripts(q: str = Query(..., min_length=1), limit: int = Query(50, ge=1, le=500)):
+    """.py/.sh files under the browse root whose path contains `q`, from the
+    background script index (`ready` is false until its first build,
+    `enabled` false when CRONUI_SCRIPT_INDEX_SECONDS is unset)."""
+    found = dirindex.find_scripts(q, limit)
+    return {
+        "enabled": dirindex.INDEX_INTERVAL > 0,
+        "ready": found is not None,
+        "items": [{"name": rel.rpartition("/")[2], "path": str(BROWSE_ROOT / rel)} for rel in found or ()],
+    }
 
 
 # ── Static files ──────────────────────────────────────────────
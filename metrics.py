@@ -0,0 +1,202 @@
+"""Prometheus text-format metrics without a client library.
+
+Instrumented code binds label values once (``CHILD = METRIC.labels(...)``
+at import or first use) and then only does attribute arithmetic on the
+hot path: no locks, no label lookups. Updates happen on the event loop
+thread, so plain ``+=`` is safe. Gauges that mirror existing state (queue
+depth, pool size) are read through callbacks at scrape time instead of
+being updated on every change.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Callable, Optional
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# Job runs last seconds to hours
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0)
+
+_registry: list[_Metric] = []
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child for one label set; bind it once and reuse it."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values: str):
+        self._children.pop(tuple(str(v) for v in values), None)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        head = f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n"
+        return head + "".join(line + "\n" for line in self._samples())
+
+
+class _Value:
+    __slots__ = ("value", "fn")
+
+    def __init__(self):
+        self.value = 0.0
+        self.fn: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, fn: Callable[[], float]):
+        """Read the value from `fn` at scrape time."""
+        self.fn = fn
+
+    def get(self) -> float:
+        return self.fn() if self.fn else self.value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}_total{_labels(self.labelnames, k)} {_fmt(c.get())}"
+                for k, c in list(self._children.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def _samples(self) -> list[str]:
+        out = []
+        for k, c in list(self._children.items()):
+            try:
+                value = c.get()
+            except Exception:
+                continue
+            out.append(f"{self.name}{_labels(self.labelnames, k)} {_fmt(value)}")
+        return out
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def _samples(self) -> list[str]:
+        out = []
+        for k, h in list(self._children.items()):
+            total = 0
+            for bound, count in zip(self.buckets + (math.inf,), list(h.counts)):
+                total += count
+                le = f'le="{_fmt(bound)}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, le)} {total}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_fmt(h.sum)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {total}")
+        return out
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format 0.0.4."""
+    return "".join(m.render() for m in _registry)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ── Metrics ───────────────────────────────────────────────────
+
+TRIGGER_LAG = Histogram(
+    "cronui_trigger_lag_seconds",
+    "Delay from a run's scheduled fire time to run_job.",
+    ("scheduler",),
+)
+RUNS_STARTED = Counter("cronui_runs_started", "Runs started or queued.", ("trigger",))
+RUNS_FINISHED = Counter("cronui_runs_finished", "Runs finished, by final status.", ("status",))
+RUN_DURATION = Histogram(
+    "cronui_run_duration_seconds",
+    "Wall-clock duration of finished runs.",
+    ("job_id",),
+    buckets=DURATION_BUCKETS,
+)
+RUN_WAIT = Histogram(
+    "cronui_run_queue_wait_seconds",
+    "Time runs spent queued for a concurrency slot.",
+    buckets=DURATION_BUCKETS,
+)
+RUNS_RUNNING = Gauge("cronui_runs_running", "Child processes currently running.")
+QUEUE_DEPTH = Gauge("cronui_run_queue_depth", "Runs waiting for a concurrency slot.")
+
+DB_QUERY = Histogram("cronui_db_query_seconds", "Latency of run storage operations.", ("op",))
+DB_POOL = Gauge("cronui_db_pool_connections", "Database connections by state.", ("state",))
+
+HTTP_REQUEST = Histogram(
+    "cronui_http_request_seconds",
+    "API latency until the response starts, by route template.",
+    ("method", "route", "status"),
+)
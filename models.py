@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 
@@ -13,6 +13,7 @@ class Frequency(str, Enum):
     weekly = "weekly"
     monthly = "monthly"
     custom = "custom"
+    none = "none"  # no time trigger: runs manually or after its upstream jobs
 
 
 class Schedule(BaseModel):
@@ -23,8 +24,18 @@ class Schedule(BaseModel):
     day_of_month: Optional[int] = None  # 1-28
     interval: Optional[int] = None  # for hourly: 5/10/15/20/30
     cron_expression: Optional[str] = None  # for custom: raw 5-field cron
+    # Spread the start over this many seconds after the fire time (a fixed
+    # per-job offset); None uses CRONUI_SMOOTH_SECONDS, 0 starts exactly
+    jitter_seconds: Optional[int] = Field(None, ge=0, le=86400)
+
+    @property
+    def timed(self) -> bool:
+        """Whether the schedule fires on its own (i.e. has a cron expression)."""
+        return self.frequency != Frequency.none
 
     def to_cron(self) -> str:
+        if self.frequency == Frequency.none:
+            raise ValueError("Schedule has no time trigger")
         if self.frequency == Frequency.custom:
             if not self.cron_expression:
                 raise ValueError("cron_expression is required for custom frequency")
@@ -48,6 +59,36 @@ class Schedule(BaseModel):
         raise ValueError(f"Unknown frequency: {self.frequency}")
 
 
+class OverlapPolicy(str, Enum):
+    """What to do when a job is triggered while at its max_concurrency."""
+    allow = "allow"      # ignore the per-job limit
+    skip = "skip"        # drop the new trigger
+    queue = "queue"      # wait until a running instance finishes
+    replace = "replace"  # kill the running instances, then start
+
+
+class Retention(BaseModel):
+    """Per-job override of the global run history retention."""
+    keep_runs: Optional[int] = Field(None, ge=1)  # keep only the newest N runs
+    keep_days: Optional[int] = Field(None, ge=1)  # drop runs older than D days
+
+
+class IOClass(str, Enum):
+    best_effort = "best-effort"
+    idle = "idle"  # only gets disk time nobody else wants
+
+
+class Limits(BaseModel):
+    """OS resource limits for a job's runs (see governor.py)."""
+    nice: Optional[int] = Field(None, ge=-20, le=19)  # CPU niceness; higher yields more
+    io_class: Optional[IOClass] = None  # ionice class
+    io_priority: Optional[int] = Field(None, ge=0, le=7)  # best-effort level, 0 is highest
+    memory_mb: Optional[int] = Field(None, ge=1)  # RLIMIT_AS of each process
+    cpu_seconds: Optional[int] = Field(None, ge=1)  # RLIMIT_CPU of each process
+    cgroup_memory_mb: Optional[int] = Field(None, ge=1)  # memory.max of the whole tree
+    cgroup_cpu_percent: Optional[int] = Field(None, ge=1)  # cpu.max; 100 = one core
+
+
 class JobConfig(BaseModel):
     id: str
     name: str
@@ -55,6 +96,14 @@ class JobConfig(BaseModel):
     schedule: Schedule
     enabled: bool = True
     timeout_seconds: int = 3600
+    max_concurrency: int = Field(1, ge=1)
+    overlap: OverlapPolicy = OverlapPolicy.allow
+    priority: int = 0  # higher runs first when the global queue is backed up
+    warm: bool = False  # fork .py scripts from a preloaded interpreter
+    depends_on: list[str] = []  # upstream job ids; runs once all have succeeded
+    retention: Optional[Retention] = None
+    limits: Optional[Limits] = None
+    profile: bool = False  # run .py scripts under cProfile, saving stats by the log
 
 
 class JobCreate(BaseModel):
@@ -63,6 +112,14 @@ class JobCreate(BaseModel):
     schedule: Schedule
     enabled: bool = True
     timeout_seconds: int = 3600
+    max_concurrency: int = Field(1, ge=1)
+    overlap: OverlapPolicy = OverlapPolicy.allow
+    priority: int = 0
+    warm: bool = False
+    depends_on: list[str] = []
+    retention: Optional[Retention] = None
+    limits: Optional[Limits] = None
+    profile: bool = False
 
 
 class JobUpdate(BaseModel):
@@ -71,9 +128,46 @@ class JobUpdate(BaseModel):
     schedule: Optional[Schedule] = None
     enabled: Optional[bool] = None
     timeout_seconds: Optional[int] = None
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    overlap: Optional[OverlapPolicy] = None
+    priority: Optional[int] = None
+    warm: Optional[bool] = None
+    depends_on: Optional[list[str]] = None
+    retention: Optional[Retention] = None
+    limits: Optional[Limits] = None
+    profile: Optional[bool] = None
+
+
+class JobImport(JobCreate):
+    """A job in a bulk import; `id` keeps an existing or exported id."""
+    id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class JobPatch(JobUpdate):
+    """A JobUpdate for one job in a bulk patch."""
+    id: str
+
+
+class BulkToggle(BaseModel):
+    ids: list[str]
+    enabled: bool
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str  # created | updated | unchanged | error
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    """Per-item outcome of a bulk job operation. Nothing is applied unless ok."""
+    ok: bool
+    results: list[BulkItemResult] = []
 
 
 class RunStatus(str, Enum):
+    queued = "queued"
     running = "running"
     success = "success"
     failed = "failed"
@@ -84,6 +178,7 @@ class RunStatus(str, Enum):
 class TriggerType(str, Enum):
     scheduled = "scheduled"
     manual = "manual"
+    dependency = "dependency"  # started by the success of its upstream jobs
 
 
 class RunRecord(BaseModel):
@@ -97,6 +192,16 @@ class RunRecord(BaseModel):
     exit_code: Optional[int] = None
     log_file: Optional[str] = None
     error_msg: Optional[str] = None
+    queued_at: Optional[datetime] = None
+    wait_ms: Optional[int] = None  # time spent queued before started_at
+    # Resource usage of the process tree, from wait4() rusage
+    cpu_user_ms: Optional[int] = None
+    cpu_sys_ms: Optional[int] = None
+    max_rss_kb: Optional[int] = None  # peak RSS of the largest single process
+    io_read_blocks: Optional[int] = None
+    io_write_blocks: Optional[int] = None
+    ctx_voluntary: Optional[int] = None
+    ctx_involuntary: Optional[int] = None
 
 
 class JobWithStatus(BaseModel):
@@ -104,7 +209,63 @@ class JobWithStatus(BaseModel):
     config: JobConfig
     last_status: Optional[RunStatus] = None
     last_run: Optional[datetime] = None
-    next_run: Optional[str] = None
+    schedule: Optional[str] = None  # cron expression
+    next_run: Optional[datetime] = None
+
+
+class RunListItem(BaseModel):
+    """Run row for list views; omits log_file and error_msg."""
+    id: str
+    job_id: str
+    status: RunStatus
+    trigger: TriggerType
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+    exit_code: Optional[int] = None
+    wait_ms: Optional[int] = None
+    cpu_user_ms: Optional[int] = None
+    cpu_sys_ms: Optional[int] = None
+    max_rss_kb: Optional[int] = None
+
+
+class ResourceSample(BaseModel):
+    """One /proc sample of a running job's process tree."""
+    t: float  # seconds since the process started
+    rss_kb: int
+    cpu_ms: int
+    procs: int
+
+
+class ProfileFunction(BaseModel):
+    """One function's totals in a run's cProfile stats."""
+    function: str
+    file: str
+    line: int
+    calls: int
+    primitive_calls: int  # calls that were not recursive
+    tottime_ms: float  # in the function itself
+    cumtime_ms: float  # including everything it called
+
+
+class RunProfile(BaseModel):
+    """Hottest functions of a profiled run."""
+    run_id: str
+    total_calls: int
+    total_ms: float
+    sort: str
+    functions: list[ProfileFunction] = []
+
+
+class Regression(BaseModel):
+    """A successful run that took much longer than the runs before it."""
+    run_id: str
+    job_id: str
+    started_at: datetime
+    duration_ms: int
+    baseline_ms: int  # median duration of the preceding successful runs
+    ratio: float
+    profiled: bool = False  # a profile of this run is available
 
 
 class RecentRunSummary(BaseModel):
@@ -119,5 +280,62 @@ class JobWithRecentRuns(BaseModel):
     config: JobConfig
     last_status: Optional[RunStatus] = None
     last_run: Optional[datetime] = None
-    next_run: Optional[str] = None
+    schedule: Optional[str] = None  # cron expression
+    next_run: Optional[datetime] = None
     recent_runs: list[RecentRunSummary] = []
+
+
+class LogMatch(BaseModel):
+    """A log line matching a search, with surrounding context lines."""
+    run_id: str
+    started_at: datetime
+    line: int  # 1-based
+    text: str
+    before: list[str] = []
+    after: list[str] = []
+
+
+class DailyStats(BaseModel):
+    """Per-job rollup of finished runs for one UTC day."""
+    day: date
+    job_id: str
+    runs: int
+    successes: int
+    failures: int
+    avg_ms: Optional[int] = None
+    p50_ms: Optional[int] = None
+    p95_ms: Optional[int] = None
+    max_ms: Optional[int] = None
+
+
+class UpcomingFire(BaseModel):
+    job_id: str
+    at: datetime
+
+
+class FireSlot(BaseModel):
+    """Number of jobs due to start in the same minute."""
+    at: datetime
+    count: int
+    job_ids: list[str] = []
+
+
+class UpcomingSchedule(BaseModel):
+    """Projected fire times across all enabled jobs for a time window."""
+    start: datetime
+    end: datetime
+    fires: list[UpcomingFire] = []
+    hot_spots: list[FireSlot] = []
+
+
+class ScheduleDensity(BaseModel):
+    """Projected job starts per time bucket, to see how evenly load is spread."""
+    start: datetime
+    end: datetime
+    bucket_seconds: int
+    spread: bool  # jitter offsets applied
+    counts: list[int] = []
+    total: int = 0
+    peak: int = 0
+    peak_at: Optional[datetime] = None
+    mean_busy: float = 0.0  # average count over buckets with any start
@@ -0,0 +1,171 @@
+"""Child processes with resource accounting.
+
+Each child is reaped with os.wait4 on its own thread instead of by asyncio's
+child watcher, which gives us the kernel's rusage for the child plus every
+descendant it waited for: CPU time, peak RSS, block I/O and context
+switches. On Linux a run can also be sampled periodically from /proc to
+record the memory curve of the whole process tree.
+
+Every child leads its own process group, so kill() also takes down the
+grandchildren a shell script started.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import governor
+
+# Seconds between /proc samples of a running job's process tree; 0 disables
+SAMPLE_INTERVAL = float(os.environ.get("CRONUI_SAMPLE_SECONDS", "0"))
+CAN_SAMPLE = Path("/proc/self/stat").exists()
+
+USAGE_FIELDS = (
+    "cpu_user_ms", "cpu_sys_ms", "max_rss_kb", "io_read_blocks", "io_write_blocks",
+    "ctx_voluntary", "ctx_involuntary",
+)
+
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def usage_from_rusage(ru) -> dict[str, int]:
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    max_rss = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+    return {
+        "cpu_user_ms": int(ru.ru_utime * 1000),
+        "cpu_sys_ms": int(ru.ru_stime * 1000),
+        "max_rss_kb": max_rss,
+        "io_read_blocks": ru.ru_inblock,
+        "io_write_blocks": ru.ru_oublock,
+        "ctx_voluntary": ru.ru_nvcsw,
+        "ctx_involuntary": ru.ru_nivcsw,
+    }
+
+
+class Child:
+    """A spawned process whose stdout is an asyncio StreamReader.
+
+    Mirrors the parts of asyncio.subprocess.Process the executor uses:
+    pid, stdout, returncode, kill() and wait(). After exit, `usage` holds
+    the rusage of the process tree as a dict keyed by USAGE_FIELDS.
+    """
+
+    def __init__(self, popen: subprocess.Popen, stdout: asyncio.StreamReader):
+        self.pid = popen.pid
+        self.stdout = stdout
+        self.returncode: Optional[int] = None
+        self.usage: Optional[dict[str, int]] = None
+        # Keep the Popen alive: once garbage collected with no returncode,
+        # subprocess would try to reap the pid itself.
+        self._popen = popen
+        self._loop = asyncio.get_running_loop()
+        self._done = self._loop.create_future()
+        threading.Thread(target=self._reap, name=f"cronui-wait-{self.pid}", daemon=True).start()
+
+    def _reap(self):
+        _, status, ru = os.wait4(self.pid, 0)
+        code = os.waitstatus_to_exitcode(status)
+        # Set before anything else so kill() never signals a recycled pid
+        self.returncode = self._popen.returncode = code
+        self._loop.call_soon_threadsafe(self._finish, code, usage_from_rusage(ru))
+
+    def _finish(self, code: int, usage: dict[str, int]):
+        self.usage = usage
+        if not self._done.done():
+            self._done.set_result(code)
+
+    def kill(self):
+        if self.returncode is None:
+            kill_group(self.pid)
+
+    async def wait(self) -> int:
+        # Shielded so a cancelled wait_for() doesn't cancel the shared future
+        return await asyncio.shield(self._done)
+
+
+def kill_group(pid: int):
+    """SIGKILL the process group led by `pid`, or just `pid` if it has none."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+async def spawn(cmd: list[str], cwd: str, env: dict[str, str],
+                limits: Optional[dict] = None) -> Child:
+    """Start `cmd` in a new process group with stdout and stderr merged
+    into one pipe. `limits` is a governor spec applied before `cmd` runs."""
+    if limits:
+        cmd = governor.command(cmd, limits)
+    popen = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             stdin=subprocess.DEVNULL, cwd=cwd, env=env, bufsize=0,
+                             process_group=0)
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), popen.stdout)
+    return Child(popen, reader)
+
+
+# ── /proc sampling ────────────────────────────────────────────
+
+def tree_stats(root: int) -> Optional[tuple[int, int, int]]:
+    """(rss_kb, cpu_ms, process count) summed over `root` and its
+    descendants, or None once `root` is gone. Linux only."""
+    children: dict[int, list[int]] = {}
+    stats: dict[int, tuple[int, int]] = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", "rb") as f:
+                raw = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces and parentheses; fields resume after the last ')'
+        fields = raw[raw.rfind(b")") + 2:].split()
+        pid = int(entry.name)
+        children.setdefault(int(fields[1]), []).append(pid)
+        cpu_ticks = int(fields[11]) + int(fields[12])
+        stats[pid] = (int(fields[21]) * _PAGE_KB, cpu_ticks * 1000 // _CLK_TCK)
+    if root not in stats:
+        return None
+    rss = cpu = count = 0
+    todo = [root]
+    while todo:
+        pid = todo.pop()
+        if pid in stats:
+            rss += stats[pid][0]
+            cpu += stats[pid][1]
+            count += 1
+        todo.extend(children.get(pid, ()))
+    return rss, cpu, count
+
+
+async def sample(child: Child, path: Path, interval: float):
+    """Append a JSON line {t, rss_kb, cpu_ms, procs} to `path` every
+    `interval` seconds until the child exits."""
+    start = time.monotonic()
+    with open(path, "a") as out:
+        while child.returncode is None:
+            stats = await asyncio.to_thread(tree_stats, child.pid)
+            if stats is None:
+                return
+            rss_kb, cpu_ms, procs = stats
+            out.write(json.dumps({
+                "t": round(time.monotonic() - start, 3),
+                "rss_kb": rss_kb, "cpu_ms": cpu_ms, "procs": procs,
+            }) + "\n")
+            out.flush()
+            await asyncio.sleep(interval)
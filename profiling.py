@@ -0,0 +1,76 @@
+"""Profiles of Python runs and duration regressions.
+
+A run with profiling on (the job's `profile`, or ?profile=true on a manual
+trigger) executes its script under cProfile and leaves the stats next to
+its log as {run_id}.log.prof. Cold runs use `python -m cProfile -o`; warm
+runs enable a cProfile.Profile around runpy in the forked child. Either
+way the stats are written when the script exits, including via sys.exit,
+but not when it is killed. The file can be opened with pstats, snakeviz
+and similar tools.
+
+Regressions compare each successful run's duration with the median of the
+successful runs before it, so slow outliers point at the runs (or the
+next run) worth profiling.
+"""
+from __future__ import annotations
+
+import os
+import pstats
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from models import ProfileFunction, Regression, RunListItem, RunProfile, RunStatus
+
+# A run this many times slower than its baseline counts as a regression
+REGRESSION_THRESHOLD = float(os.environ.get("CRONUI_REGRESSION_THRESHOLD", "1.5"))
+# Most runs of a window a regression check reads
+MAX_REGRESSION_RUNS = 10000
+SORT_KEYS = {"cumulative": "cumtime_ms", "tottime": "tottime_ms", "calls": "calls"}
+
+
+def profile_command(python: str, script_path: str, out: Path) -> list[str]:
+    return [python, "-m", "cProfile", "-o", str(out), script_path]
+
+
+def summarize(run_id: str, path: Path, top: int = 30, sort: str = "cumulative") -> RunProfile:
+    """The `top` functions of a saved profile, by `sort` (see SORT_KEYS)."""
+    stats = pstats.Stats(str(path))
+    functions = []
+    for (filename, line, name), (prim, calls, tottime, cumtime, _) in stats.stats.items():
+        functions.append(ProfileFunction(
+            function=name, file=filename, line=line, calls=calls, primitive_calls=prim,
+            tottime_ms=round(tottime * 1000, 3), cumtime_ms=round(cumtime * 1000, 3),
+        ))
+    key = SORT_KEYS[sort]
+    functions.sort(key=lambda f: getattr(f, key), reverse=True)
+    return RunProfile(run_id=run_id, total_calls=stats.total_calls,
+                      total_ms=round(stats.total_tt * 1000, 3), sort=sort, functions=functions[:top])
+
+
+def regressions(runs: list[RunListItem], threshold: float = REGRESSION_THRESHOLD,
+                baseline: int = 20, min_history: int = 5,
+                since: Optional[datetime] = None) -> list[Regression]:
+    """Successful runs lasting over `threshold` times the median of up to
+    `baseline` successful runs before them, newest first. `runs` may be in
+    any order; runs with fewer than `min_history` predecessors are skipped.
+    Runs before `since` only serve as baseline and are never flagged."""
+    done = sorted((r for r in runs if r.status == RunStatus.success and r.duration_ms is not None),
+                  key=lambda r: (r.started_at, r.id))
+    flagged = []
+    for i, run in enumerate(done):
+        if since is not None and run.started_at < since:
+            continue
+        history = [r.duration_ms for r in done[max(0, i - baseline):i]]
+        if len(history) < min_history:
+            continue
+        median = statistics.median(history)
+        if median > 0 and run.duration_ms > threshold * median:
+            flagged.append(Regression(
+                run_id=run.id, job_id=run.job_id, started_at=run.started_at,
+                duration_ms=run.duration_ms, baseline_ms=int(median),
+                ratio=round(run.duration_ms / median, 2),
+            ))
+    flagged.reverse()
+    return flagged
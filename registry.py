@@ -0,0 +1,202 @@
+"""In-memory job registry backed by config/{job_id}.yaml files.
+
+YAML is parsed once at startup and again only when a file's mtime changes,
+so request handlers read jobs from a dict instead of hitting the disk.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from models import JobConfig
+
+CONFIG_DIR = Path(os.environ.get("CRONUI_CONFIG_DIR", Path(__file__).parent / "config"))
+CONFIG_DIR.mkdir(exist_ok=True)
+
+# Minimum seconds between stat sweeps of CONFIG_DIR for external edits.
+CHECK_INTERVAL = 2.0
+
+_lock = threading.RLock()
+# job_id -> JobConfig
+_jobs: dict[str, JobConfig] = {}
+# file name -> (st_mtime_ns, st_size) at last parse
+_stamps: dict[str, tuple[int, int]] = {}
+# job_id -> file name the job was loaded from
+_files: dict[str, str] = {}
+# Jobs ordered by id, rebuilt only when the registry changes
+_sorted: list[JobConfig] = []
+_last_check = 0.0
+# Bumped on every change, with its wall time
+_generation = 0
+_changed_at = time.time()
+
+
+def _path(job_id: str) -> Path:
+    return CONFIG_DIR / f"{job_id}.yaml"
+
+
+def _parse(path: Path) -> Optional[JobConfig]:
+    with open(path) as f:
+        data = yaml.safe_load(f)
+    return JobConfig(**data) if data else None
+
+
+def _rebuild_sorted():
+    global _sorted, _generation, _changed_at
+    _sorted = sorted(_jobs.values(), key=lambda j: j.id)
+    _generation += 1
+    _changed_at = time.time()
+
+
+def _drop_file(name: str):
+    _stamps.pop(name, None)
+    for job_id, fname in list(_files.items()):
+        if fname == name:
+            del _files[job_id]
+            _jobs.pop(job_id, None)
+
+
+def _scan():
+    """Re-parse new or modified YAML files and forget deleted ones."""
+    changed = False
+    seen = set()
+    for p in CONFIG_DIR.glob("*.yaml"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        seen.add(p.name)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if _stamps.get(p.name) == stamp:
+            continue
+        _drop_file(p.name)
+        _stamps[p.name] = stamp
+        changed = True
+        try:
+            job = _parse(p)
+        except Exception as exc:
+            print(f"[CRONUI] Failed to load {p.name}: {exc}")
+            continue
+        if job:
+            _jobs[job.id] = job
+            _files[job.id] = p.name
+    for name in set(_stamps) - seen:
+        _drop_file(name)
+        changed = True
+    if changed:
+        _rebuild_sorted()
+
+
+def load_all():
+    """Parse every config file. Called once from the app lifespan."""
+    global _last_check
+    with _lock:
+        _jobs.clear()
+        _stamps.clear()
+        _files.clear()
+        _scan()
+        _rebuild_sorted()
+        _last_check = time.monotonic()
+
+
+def refresh(force: bool = False):
+    """Pick up external edits, at most once every CHECK_INTERVAL seconds."""
+    global _last_check
+    now = time.monotonic()
+    if not force and now - _last_check < CHECK_INTERVAL:
+        return
+    with _lock:
+        _scan()
+        _last_check = now
+
+
+def all_jobs() -> list[JobConfig]:
+    refresh()
+    return _sorted
+
+
+def version() -> tuple[int, float]:
+    """Generation and time of the last change, picking up external edits."""
+    refresh()
+    return _generation, _changed_at
+
+
+def get(job_id: str) -> Optional[JobConfig]:
+    refresh()
+    return _jobs.get(job_id)
+
+
+def _dump(job: JobConfig, path: Path):
+    with open(path, "w") as f:
+        yaml.dump(job.model_dump(mode="json"), f, default_flow_style=False)
+
+
+def _record(job: JobConfig):
+    path = _path(job.id)
+    st = path.stat()
+    _stamps[path.name] = (st.st_mtime_ns, st.st_size)
+    _jobs[job.id] = job
+    _files[job.id] = path.name
+
+
+def save(job: JobConfig):
+    """Write the job's YAML and update the registry in place."""
+    with _lock:
+        _dump(job, _path(job.id))
+        _record(job)
+        _rebuild_sorted()
+
+
+def save_many(jobs: list[JobConfig]):
+    """Write several jobs' YAML, all or nothing.
+
+    Every file is first written to a .tmp next to its target, then renamed
+    into place. If any write fails nothing is renamed; if a rename fails the
+    ones already done are reverted to the previous configs.
+    """
+    with _lock:
+        staged: list[Path] = []
+        try:
+            for job in jobs:
+                tmp = CONFIG_DIR / f"{job.id}.yaml.tmp"
+                staged.append(tmp)
+                _dump(job, tmp)
+        except OSError:
+            for tmp in staged:
+                tmp.unlink(missing_ok=True)
+            raise
+        previous = {job.id: _jobs.get(job.id) for job in jobs}
+        done: list[JobConfig] = []
+        try:
+            for job, tmp in zip(jobs, staged):
+                os.replace(tmp, _path(job.id))
+                done.append(job)
+        except OSError:
+            for job in done:
+                old = previous[job.id]
+                if old is None:
+                    _path(job.id).unlink(missing_ok=True)
+                else:
+                    _dump(old, _path(job.id))
+            for tmp in staged:
+                tmp.unlink(missing_ok=True)
+            raise
+        for job in jobs:
+            _record(job)
+        _rebuild_sorted()
+
+
+def delete(job_id: str) -> bool:
+    """Remove the job's YAML and registry entry. Returns True if it existed."""
+    with _lock:
+        path = CONFIG_DIR / _files.get(job_id, _path(job_id).name)
+        existed = job_id in _jobs or path.exists()
+        path.unlink(missing_ok=True)
+        _drop_file(path.name)
+        _rebuild_sorted()
+    return existed
@@ -0,0 +1,131 @@
+"""Run history retention and daily rollups.
+
+A background task that, every RETENTION_INTERVAL:
+  1. creates upcoming monthly partitions of `runs` (Postgres),
+  2. rolls finished runs up into run_daily_stats per job and UTC day,
+  3. deletes runs outside the global or per-job retention policy and drops
+     whole partitions that are entirely past the longest policy,
+  4. unlinks the log files of every deleted run.
+
+Runs are only deleted once their day has been rolled up, so the daily stats
+outlive the raw rows.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import db
+import logstore
+import registry
+from executor import LOGS_DIR
+
+# Global policy; 0 disables a limit. Jobs override with JobConfig.retention.
+RETENTION_DAYS = int(os.environ.get("CRONUI_RETENTION_DAYS", "90"))
+RETENTION_RUNS = int(os.environ.get("CRONUI_RETENTION_RUNS", "0"))
+RETENTION_INTERVAL = float(os.environ.get("CRONUI_RETENTION_INTERVAL", "3600"))
+
+# cronui_meta key: last UTC day fully rolled up
+_ROLLUP_KEY = "rollup_through"
+_EPOCH = date(1970, 1, 1)
+
+_task: Optional[asyncio.Task] = None
+
+
+def start():
+    global _task
+    _task = asyncio.create_task(_loop())
+
+
+async def stop():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+async def _loop():
+    while True:
+        try:
+            await run_once()
+        except Exception as exc:
+            print(f"[CRONUI] Retention pass failed: {exc}")
+        await asyncio.sleep(RETENTION_INTERVAL)
+
+
+async def run_once(now: Optional[datetime] = None):
+    now = now or datetime.now(timezone.utc)
+    await db.flush()
+    await db.maintain_partitions(now)
+    rolled = await _rollup(now)
+    # Never delete rows of a day whose stats could still be recomputed
+    safe = datetime.combine(rolled, time(), timezone.utc)
+    logs = await _prune(now, safe)
+    if logs:
+        removed = await asyncio.to_thread(_unlink_logs, logs)
+        print(f"[CRONUI] Retention removed {removed} log file(s) of pruned runs")
+
+
+async def _rollup(now: datetime) -> date:
+    """Roll up complete UTC days; returns the first day not safe to delete from.
+
+    The last rolled-up day is recomputed once more on the next pass, so runs
+    that finished after midnight are counted under the day they started.
+    """
+    yesterday = now.date() - timedelta(days=1)
+    mark = await db.get_meta(_ROLLUP_KEY)
+    # Without a watermark this is the first pass: roll up the whole history
+    start = date.fromisoformat(mark) if mark else _EPOCH
+    if start <= yesterday:
+        await db.rollup_daily(start, yesterday)
+        await db.set_meta(_ROLLUP_KEY, yesterday.isoformat())
+        return yesterday
+    return start
+
+
+async def _prune(now: datetime, safe: datetime) -> list[str]:
+    logs: list[str] = []
+    overrides = {job.id: job.retention for job in registry.all_jobs() if job.retention}
+
+    def cutoff(days: int) -> datetime:
+        return min(now - timedelta(days=days), safe)
+
+    if RETENTION_DAYS:
+        logs += await db.delete_runs_before(cutoff(RETENTION_DAYS), exclude=list(overrides))
+    for job_id, policy in overrides.items():
+        days = policy.keep_days or RETENTION_DAYS
+        if days:
+            logs += await db.delete_runs_before(cutoff(days), job_id=job_id)
+    for job in registry.all_jobs():
+        policy = overrides.get(job.id)
+        keep = (policy.keep_runs if policy else None) or RETENTION_RUNS
+        if keep:
+            logs += await db.delete_runs_beyond(job.id, keep, safe)
+
+    # Whole partitions past every policy go in one cheap DROP; a day of
+    # margin because partitions are keyed by created_at, not started_at
+    if RETENTION_DAYS:
+        longest = max([RETENTION_DAYS] + [p.keep_days or RETENTION_DAYS for p in overrides.values()])
+        logs += await db.drop_partitions_before(cutoff(longest + 1))
+    return logs
+
+
+def _unlink_logs(paths: list[str]) -> int:
+    removed = 0
+    root = LOGS_DIR.resolve()
+    for p in paths:
+        path = Path(p).resolve()
+        if root not in path.parents:
+            continue
+        try:
+            removed += logstore.remove_log(path)
+        except OSError as exc:
+            print(f"[CRONUI] Could not remove log {path}: {exc}")
+    return removed
@@ -1,12 +1,32 @@
-"""Manage crontab entries tagged with # CRONUI:{job_id}."""
+"""Schedule jobs via crontab entries tagged with # CRONUI:{job_id}.
+
+The crontab is reconciled as a whole: job changes only mark it dirty, and
+after a short debounce the desired entries of every job in the registry
+are diffed against the managed lines and written back in one `crontab -`.
+
+Set CRONUI_SCHEDULER=native to fire jobs from the in-process engine
+instead; crontab remains the default backend.
+"""
 from __future__ import annotations
 
+import os
 import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Optional
 
-from models import JobConfig
+import cron
+import engine
+import jitter
+import registry
+from models import FireSlot, JobConfig, ScheduleDensity, UpcomingFire, UpcomingSchedule
 
 MARKER = "CRONUI"
 API_BASE = "http://127.0.0.1:8787"
+MODE = os.environ.get("CRONUI_SCHEDULER", "crontab")  # "crontab" | "native"
+# Seconds to wait after a job change so a burst of changes is one write
+DEBOUNCE = float(os.environ.get("CRONUI_CRONTAB_DEBOUNCE", "0.2"))
 
 
 def _read_crontab() -> str:
@@ -25,6 +45,14 @@ def _write_crontab(content: str):
 def _build_entry(job: JobConfig) -> str:
     cron_expr = job.schedule.to_cron()
     url = f"{API_BASE}/api/jobs/{job.id}/run"
+    offset = jitter.offset(job, cron_expr)
+    if offset:
+        # The header lets the trigger lag metric leave the sleep out
+        return (
+            f'{cron_expr} sleep {offset}; /usr/bin/curl -s -X POST {url} '
+            f'-H "X-Trigger: scheduled" -H "X-Jitter: {offset}" > /dev/null 2>&1 '
+            f"# {MARKER}:{job.id}"
+        )
     return (
         f'{cron_expr} /usr/bin/curl -s -X POST {url} '
         f'-H "X-Trigger: scheduled" > /dev/null 2>&1 '
@@ -32,33 +60,257 @@ def _build_entry(job: JobConfig) -> str:
     )
 
 
-def sync_job(job: JobConfig):
-    """Add or update the crontab entry for a job."""
-    current = _read_crontab()
-    tag = f"# {MARKER}:{job.id}"
-    lines = [ln for ln in current.splitlines() if tag not in ln]
+def start(jobs: list[JobConfig]):
+    """Start the configured backend. Called from the app lifespan."""
+    if MODE != "native":
+        # Repair drift between the YAML configs and the crontab
+        try:
+            changes = reconcile()
+            if any(changes.values()):
+                print(f"[CRONUI] Crontab repaired at startup: {changes}")
+        except (OSError, RuntimeError) as exc:
+            print(f"[CRONUI] Could not reconcile crontab: {exc}")
+        return
+    # Leftover crontab entries would fire every job a second time.
+    try:
+        managed = list_managed_entries()
+        if managed:
+            _write_crontab(_strip_managed(_read_crontab()))
+            print(f"[CRONUI] Removed {len(managed)} crontab entr(ies) in native mode")
+    except (OSError, RuntimeError) as exc:
+        print(f"[CRONUI] Could not clean crontab: {exc}")
+    engine.start(jobs)
+
+
+def stop():
+    if MODE == "native":
+        engine.stop()
+    else:
+        flush()
 
-    if job.enabled:
-        lines.append(_build_entry(job))
 
+def _managed_id(line: str) -> Optional[str]:
+    tag = f"# {MARKER}:"
+    i = line.find(tag)
+    return line[i + len(tag):].strip() if i >= 0 else None
+
+
+def _strip_managed(content: str) -> str:
+    lines = [ln for ln in content.splitlines() if _managed_id(ln) is None]
     new_content = "\n".join(lines)
     if not new_content.endswith("\n"):
         new_content += "\n"
-    _write_crontab(new_content)
+    return new_content
+
+
+def sync_job(job: JobConfig):
+    """Add or update the schedule for a job."""
+    _next_cache.pop(job.id, None)
+    if MODE == "native":
+        engine.sync_job(job)
+        return
+    _mark_dirty()
 
 
 def remove_job(job_id: str):
-    """Remove the crontab entry for a job."""
-    current = _read_crontab()
-    tag = f"# {MARKER}:{job_id}"
-    lines = [ln for ln in current.splitlines() if tag not in ln]
-    new_content = "\n".join(lines)
-    if not new_content.endswith("\n"):
-        new_content += "\n"
-    _write_crontab(new_content)
+    """Remove the schedule for a job."""
+    _next_cache.pop(job_id, None)
+    if MODE == "native":
+        engine.remove_job(job_id)
+        return
+    _mark_dirty()
 
 
 def list_managed_entries() -> list[str]:
     """Return all CRONUI-managed crontab lines."""
     current = _read_crontab()
-    return [ln for ln in current.splitlines() if f"# {MARKER}:" in ln]
+    return [ln for ln in current.splitlines() if _managed_id(ln) is not None]
+
+
+# ── Crontab reconciler ────────────────────────────────────────
+# Held while reading, diffing and writing the crontab
+_reconcile_lock = threading.Lock()
+_timer_lock = threading.Lock()
+_timer: Optional[threading.Timer] = None
+
+
+def _mark_dirty():
+    """Reconcile after DEBOUNCE; changes until then share the write."""
+    global _timer
+    with _timer_lock:
+        if _timer is None:
+            _timer = threading.Timer(DEBOUNCE, _debounced)
+            _timer.daemon = True
+            _timer.start()
+
+
+def _debounced():
+    global _timer
+    with _timer_lock:
+        _timer = None
+    try:
+        reconcile()
+    except (OSError, RuntimeError) as exc:
+        print(f"[CRONUI] Crontab reconcile failed: {exc}")
+
+
+def flush():
+    """Apply a pending debounced reconcile now."""
+    global _timer
+    with _timer_lock:
+        timer, _timer = _timer, None
+    if timer is not None:
+        timer.cancel()
+        _debounced()
+
+
+def reconcile() -> dict[str, int]:
+    """Make the managed crontab lines match the enabled jobs in the registry.
+
+    Unmanaged lines are kept as they are. Writes only if something differs.
+    Returns how many entries were added, updated and removed.
+    """
+    with _reconcile_lock:
+        desired: dict[str, str] = {}
+        for job in registry.all_jobs():
+            if not job.enabled or not job.schedule.timed:
+                continue
+            try:
+                desired[job.id] = _build_entry(job)
+            except ValueError as exc:
+                print(f"[CRONUI] Not scheduling {job.id}: {exc}")
+        current = _read_crontab()
+        other: list[str] = []
+        managed: dict[str, list[str]] = {}
+        for ln in current.splitlines():
+            job_id = _managed_id(ln)
+            if job_id is None:
+                other.append(ln)
+            else:
+                managed.setdefault(job_id, []).append(ln)
+
+        changes = {
+            "added": sum(1 for j in desired if j not in managed),
+            # Duplicate lines for one job count as an update
+            "updated": sum(1 for j, e in desired.items() if j in managed and managed[j] != [e]),
+            "removed": sum(1 for j in managed if j not in desired),
+        }
+        if any(changes.values()):
+            lines = other + [desired[j] for j in sorted(desired)]
+            _write_crontab("\n".join(lines) + "\n")
+        return changes
+
+
+# ── Next-fire index ───────────────────────────────────────────
+# job_id -> (cron expression, jitter offset, next start epoch seconds)
+_next_cache: dict[str, tuple[str, int, Optional[float]]] = {}
+
+
+def next_run(job: JobConfig, now: Optional[float] = None) -> Optional[datetime]:
+    """Next time the job starts (jitter included), cached until that moment passes."""
+    if not job.enabled or not job.schedule.timed:
+        return None
+    now = time.time() if now is None else now
+    expr = job.schedule.to_cron()
+    offset = jitter.offset(job, expr)
+    cached = _next_cache.get(job.id)
+    if cached and cached[:2] == (expr, offset) and cached[2] is not None and cached[2] > now:
+        ts = cached[2]
+    else:
+        try:
+            ts = cron.parse(expr).next_fire(now - offset)
+        except ValueError:
+            ts = None
+        if ts is not None:
+            ts += offset
+        _next_cache[job.id] = (expr, offset, ts)
+    return datetime.fromtimestamp(ts).astimezone() if ts is not None else None
+
+
+def _projected(jobs: list[JobConfig], start: float, end: float, per_job: int,
+               spread: bool = True) -> list[tuple[float, str]]:
+    """(start time, job id) of the next `per_job` starts of every enabled
+    job within [start, end), with jitter offsets unless `spread` is off.
+
+    Cron fire times are computed once per distinct expression, so thousands
+    of jobs sharing "0 * * * *" cost the same as one.
+    """
+    by_expr: dict[str, list[tuple[str, int]]] = {}
+    for job in jobs:
+        if not job.enabled or not job.schedule.timed:
+            continue
+        try:
+            expr = job.schedule.to_cron()
+        except ValueError:
+            continue
+        offset = jitter.offset(job, expr) if spread else 0
+        by_expr.setdefault(expr, []).append((job.id, offset))
+
+    out: list[tuple[float, str]] = []
+    for expr, members in by_expr.items():
+        try:
+            compiled = cron.parse(expr)
+        except ValueError:
+            continue
+        # Offsets are below the shortest gap, so one extra fire before
+        # `start` covers every job whose jittered start falls after it
+        ts = start - 1 - max(off for _, off in members)  # next_fire is exclusive
+        fires = []
+        for _ in range(per_job + 1):
+            ts = compiled.next_fire(ts)
+            if ts is None or ts >= end:
+                break
+            fires.append(ts)
+        for job_id, off in members:
+            starts = [f + off for f in fires if start <= f + off < end]
+            out.extend((ts, job_id) for ts in starts[:per_job])
+    return out
+
+
+def upcoming(jobs: list[JobConfig], start: float, end: float,
+             per_job: int = 10, top: int = 20, spread: bool = True) -> UpcomingSchedule:
+    """Next `per_job` start times of every enabled job within [start, end).
+
+    `hot_spots` lists the `top` busiest minutes.
+    """
+    fires: list[UpcomingFire] = []
+    slots: dict[float, list[str]] = {}
+    for ts, job_id in _projected(jobs, start, end, per_job, spread):
+        fires.append(UpcomingFire(job_id=job_id, at=datetime.fromtimestamp(ts).astimezone()))
+        slots.setdefault(ts - ts % 60, []).append(job_id)
+
+    fires.sort(key=lambda f: (f.at, f.job_id))
+    busiest = sorted(slots.items(), key=lambda kv: (-len(kv[1]), kv[0]))[:top]
+    return UpcomingSchedule(
+        start=datetime.fromtimestamp(start).astimezone(),
+        end=datetime.fromtimestamp(end).astimezone(),
+        fires=fires,
+        hot_spots=[
+            FireSlot(at=datetime.fromtimestamp(ts).astimezone(), count=len(ids), job_ids=ids)
+            for ts, ids in busiest
+        ],
+    )
+
+
+def density(jobs: list[JobConfig], start: float, end: float, bucket: int = 60,
+            spread: bool = True) -> ScheduleDensity:
+    """How many jobs start in each `bucket`-second slot of [start, end)."""
+    start -= start % bucket
+    counts = [0] * max(1, int((end - start + bucket - 1) // bucket))
+    # Enough starts per job for an every-minute schedule to fill the window
+    per_job = int((end - start) // 60) + 1
+    for ts, _ in _projected(jobs, start, end, per_job, spread):
+        counts[int((ts - start) // bucket)] += 1
+    peak = max(range(len(counts)), key=counts.__getitem__)
+    busy = [c for c in counts if c]
+    return ScheduleDensity(
+        start=datetime.fromtimestamp(start).astimezone(),
+        end=datetime.fromtimestamp(end).astimezone(),
+        bucket_seconds=bucket,
+        spread=spread,
+        counts=counts,
+        total=sum(counts),
+        peak=counts[peak],
+        peak_at=datetime.fromtimestamp(start + peak * bucket).astimezone(),
+        mean_busy=round(sum(busy) / len(busy), 2) if busy else 0.0,
+    )
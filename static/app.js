@@ -62,12 +62,17 @@ function switchDetailSubTab(subTab) {
 }
 
 // ── Auto Refresh ─────────────────────────────────────────────
+// Changes arrive over /api/events; the timers are only a slow safety net.
 
+const SAFETY_REFRESH_MS = 60000;
 let detailRefreshTimer = null;
+let eventSource = null;
+let jobsReloadTimer = null;
+let detailReloadTimer = null;
 
 function startAutoRefresh() {
     stopAutoRefresh();
-    refreshTimer = setInterval(loadJobs, 10000);
+    refreshTimer = setInterval(loadJobs, SAFETY_REFRESH_MS);
 }
 
 function stopAutoRefresh() {
@@ -84,7 +89,7 @@ function startDetailAutoRefresh(jobId, jobName) {
         if (currentTab === 'job-detail') {
             loadJobDetail(jobId, jobName);
         }
-    }, 5000);
+    }, SAFETY_REFRESH_MS);
 }
 
 function stopDetailAutoRefresh() {
@@ -94,6 +99,42 @@ function stopDetailAutoRefresh() {
     }
 }
 
+// ── Live Events ──────────────────────────────────────────────
+
+function connectEvents() {
+    // EventSource reconnects by itself and resumes via Last-Event-ID
+    eventSource = new EventSource(`${API}/api/events`);
+    eventSource.addEventListener('reset', () => scheduleJobsReload());
+    eventSource.addEventListener('run', e => applyRunEvent(JSON.parse(e.data)));
+    eventSource.addEventListener('job', () => scheduleJobsReload());
+    eventSource.addEventListener('job_deleted', () => scheduleJobsReload());
+}
+
+function scheduleJobsReload() {
+    clearTimeout(jobsReloadTimer);
+    jobsReloadTimer = setTimeout(() => {
+        if (currentTab === 'monitor') loadJobs();
+    }, 300);
+}
+
+function applyRunEvent(run) {
+    const job = allJobs.find(j => j.config.id === run.job_id);
+    if (job) {
+        const summary = { id: run.id, status: run.status, started_at: run.started_at, duration_ms: run.duration_ms };
+        const recent = (job.recent_runs || []).filter(r => r.id !== run.id);
+        recent.push(summary);
+        recent.sort((a, b) => new Date(b.started_at) - new Date(a.started_at));
+        job.recent_runs = recent.slice(0, 10);
+        job.last_status = job.recent_runs[0].status;
+        job.last_run = job.recent_runs[0].started_at;
+        if (currentTab === 'monitor') applyFilters(allJobs);
+    }
+    if (currentTab === 'job-detail' && run.job_id === currentDetailJobId) {
+        clearTimeout(detailReloadTimer);
+        detailReloadTimer = setTimeout(() => loadJobDetail(currentDetailJobId, currentDetailJobName), 300);
+    }
+}
+
 // ── Load Jobs ────────────────────────────────────────────────
 
 async function loadJobs() {
@@ -160,10 +201,13 @@ function renderJobs(jobs) {
     tbody.innerHTML = jobs.map(j => {
         const c = j.config;
         const scriptExt = c.script_path.endsWith('.py') ? 'Python' : 'Shell';
-        const triggerType = c.enabled ? 'Scheduled' : 'None';
+        const triggers = [];
+        if (c.enabled && c.schedule.frequency !== 'none') triggers.push('Scheduled');
+        if (c.enabled && (c.depends_on || []).length) triggers.push('After ' + c.depends_on.join(', '));
+        const triggerType = triggers.length ? escHtml(triggers.join(' + ')) : 'None';
         const recentDots = renderRecentRunDots(j.recent_runs || []);
 
-        const hasRunning = (j.recent_runs || []).some(r => r.status === 'running');
+        const hasRunning = (j.recent_runs || []).some(r => r.status === 'running' || r.status === 'queued');
         const stopBtn = hasRunning
             ? `<button class="action-btn kill" onclick="killJob('${c.id}')">Stop</button>`
             : '';
@@ -173,7 +217,10 @@ function renderJobs(jobs) {
                 <span class="job-link" onclick="switchTab('job-detail', '${c.id}', '${escHtml(c.name)}')">${escHtml(c.name)}</span>
             </td>
             <td class="px-4 py-3 text-gray-500 text-xs">${scriptExt}</td>
-            <td class="px-4 py-3 text-gray-500 text-xs font-mono">${j.next_run || '—'}</td>
+            <td class="px-4 py-3 text-gray-500 text-xs">
+                <div class="font-mono">${j.schedule || '—'}</div>
+                ${j.next_run ? `<div class="text-gray-400" title="Next run">next ${new Date(j.next_run).toLocaleString()}</div>` : ''}
+            </td>
             <td class="px-4 py-3 text-gray-500 text-xs">${triggerType}</td>
             <td class="px-4 py-3">${recentDots}</td>
             <td class="px-4 py-3 flex gap-2">
@@ -206,6 +253,7 @@ function getStatusIcon(status) {
     const icons = {
         success: `<svg class="inline w-4 h-4 mr-1" viewBox="0 0 16 16" fill="none"><circle cx="8" cy="8" r="7" fill="#dcfce7"/><path d="M5 8l2 2 4-4" stroke="#16a34a" stroke-width="1.5" stroke-linecap="round" stroke-linejoin="round"/></svg><span class="text-green-700">Succeeded</span>`,
         failed: `<svg class="inline w-4 h-4 mr-1" viewBox="0 0 16 16" fill="none"><circle cx="8" cy="8" r="7" fill="#fee2e2"/><path d="M5.5 5.5l5 5M10.5 5.5l-5 5" stroke="#dc2626" stroke-width="1.5" stroke-linecap="round"/></svg><span class="text-red-700">Failed</span>`,
+        queued: `<svg class="inline w-4 h-4 mr-1" viewBox="0 0 16 16" fill="none"><circle cx="8" cy="8" r="7" fill="#f3f4f6"/><path d="M5 8h6M5 5.5h6M5 10.5h6" stroke="#6b7280" stroke-width="1.5" stroke-linecap="round"/></svg><span class="text-gray-600">Queued</span>`,
         running: `<svg class="inline w-4 h-4 mr-1 animate-spin" viewBox="0 0 16 16" fill="none"><circle cx="8" cy="8" r="7" stroke="#bfdbfe" stroke-width="1.5"/><path d="M8 1a7 7 0 0 1 7 7" stroke="#2563eb" stroke-width="1.5" stroke-linecap="round"/></svg><span class="text-blue-700">Running</span>`,
         timeout: `<svg class="inline w-4 h-4 mr-1" viewBox="0 0 16 16" fill="none"><circle cx="8" cy="8" r="7" fill="#fef9c3"/><path d="M8 4v5l3 1.5" stroke="#ca8a04" stroke-width="1.5" stroke-linecap="round" stroke-linejoin="round"/></svg><span class="text-yellow-700">Timeout</span>`,
         cancelled: `<svg class="inline w-4 h-4 mr-1" viewBox="0 0 16 16" fill="none"><circle cx="8" cy="8" r="7" fill="#ffedd5"/><path d="M5.5 5.5l5 5M10.5 5.5l-5 5" stroke="#ea580c" stroke-width="1.5" stroke-linecap="round"/></svg><span class="text-orange-700">Cancelled</span>`,
@@ -246,7 +294,7 @@ async function loadJobDetail(jobId, jobName) {
             : `<span class="badge badge-none">no runs</span>`;
 
         // Show/hide Stop button based on whether any run is in progress
-        const hasRunning = runs.some(r => r.status === 'running');
+        const hasRunning = runs.some(r => r.status === 'running' || r.status === 'queued');
         const stopBtn = document.getElementById('detail-stop-btn');
         if (hasRunning) {
             stopBtn.classList.remove('hidden');
@@ -269,14 +317,16 @@ async function loadJobDetail(jobId, jobName) {
 function renderDetailRuns(runs) {
     const tbody = document.getElementById('detail-run-table-body');
     if (runs.length === 0) {
-        tbody.innerHTML = '<tr><td colspan="7" class="px-4 py-8 text-center text-gray-400">No runs yet</td></tr>';
+        tbody.innerHTML = '<tr><td colspan="9" class="px-4 py-8 text-center text-gray-400">No runs yet</td></tr>';
         return;
     }
     tbody.innerHTML = runs.map(r => {
         const dur = r.duration_ms != null ? formatDuration(r.duration_ms) : '—';
+        const cpu = r.cpu_user_ms != null ? formatDuration(r.cpu_user_ms + r.cpu_sys_ms) : '—';
+        const rss = r.max_rss_kb != null ? formatKb(r.max_rss_kb) : '—';
         const started = r.started_at ? new Date(r.started_at).toLocaleString() : '—';
         const exitCode = r.exit_code != null ? r.exit_code : '—';
-        const stopAction = r.status === 'running'
+        const stopAction = (r.status === 'running' || r.status === 'queued')
             ? `<button class="action-btn kill" onclick="killJob('${r.job_id}')">Stop</button>`
             : '';
         return `<tr class="hover:bg-gray-50">
@@ -284,6 +334,8 @@ function renderDetailRuns(runs) {
             <td class="px-4 py-3 font-mono text-xs text-gray-500">${r.id}</td>
             <td class="px-4 py-3 text-gray-500 text-xs">${r.trigger}</td>
             <td class="px-4 py-3 text-gray-600 text-xs">${dur}</td>
+            <td class="px-4 py-3 text-gray-600 text-xs">${cpu}</td>
+            <td class="px-4 py-3 text-gray-600 text-xs">${rss}</td>
             <td class="px-4 py-3">${getStatusIcon(r.status)}</td>
             <td class="px-4 py-3 text-gray-500 text-xs font-mono">${exitCode}</td>
             <td class="px-4 py-3 flex gap-2">
@@ -317,6 +369,7 @@ function renderRunChart(runs) {
     const statusColor = {
         success: '#22c55e',
         failed: '#ef4444',
+        queued: '#9ca3af',
         running: '#3b82f6',
         timeout: '#eab308',
         cancelled: '#f97316',
@@ -360,9 +413,14 @@ function renderTaskInfo(job) {
     } else if (freq === 'weekly') {
         const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
         schedDesc = `Weekly on ${days[job.schedule.day_of_week || 0]} at ${String(job.schedule.hour).padStart(2, '0')}:${String(job.schedule.minute).padStart(2, '0')}`;
+    } else if (freq === 'none') {
+        schedDesc = 'No time trigger';
     } else if (freq === 'monthly') {
         schedDesc = `Monthly on day ${job.schedule.day_of_month || 1} at ${String(job.schedule.hour).padStart(2, '0')}:${String(job.schedule.minute).padStart(2, '0')}`;
     }
+    if (freq !== 'none' && job.schedule.jitter_seconds) {
+        schedDesc += ` (jitter ${job.schedule.jitter_seconds}s)`;
+    }
 
     el.innerHTML = `
         <div class="space-y-4">
@@ -386,69 +444,133 @@ function renderTaskInfo(job) {
             </div>
             <div>
                 <h4 class="text-xs font-medium text-gray-500 uppercase tracking-wide mb-1">Cron Expression</h4>
-                <p class="text-sm font-mono text-gray-800">${job.schedule.frequency === 'custom' ? escHtml(job.schedule.cron_expression || '') : job.schedule.frequency === 'hourly' ? `*/${job.schedule.interval || 30} * * * *` : `${job.schedule.minute} ${job.schedule.hour} * * *`}</p>
+                <p class="text-sm font-mono text-gray-800">${job.schedule.frequency === 'none' ? '—' : job.schedule.frequency === 'custom' ? escHtml(job.schedule.cron_expression || '') : job.schedule.frequency === 'hourly' ? `*/${job.schedule.interval || 30} * * * *` : `${job.schedule.minute} ${job.schedule.hour} * * *`}</p>
             </div>
+            ${(job.depends_on || []).length ? `
+            <div>
+                <h4 class="text-xs font-medium text-gray-500 uppercase tracking-wide mb-1">Runs After</h4>
+                <p class="text-sm font-mono text-gray-800">${escHtml(job.depends_on.join(', '))}</p>
+            </div>` : ''}
         </div>`;
 }
 
 // ── Load All Runs (global "Job runs" tab) ────────────────────
 
+const RUNS_PAGE_SIZE = 100;
+let allRunsCursor = null;
+
 async function loadAllRuns() {
     const tbody = document.getElementById('all-runs-table-body');
     tbody.innerHTML = '<tr><td colspan="7" class="px-4 py-6 text-center text-gray-400">Loading...</td></tr>';
+    allRunsCursor = null;
     try {
-        const res = await fetch(`${API}/api/runs?limit=100`);
-        const runs = await res.json();
+        const runs = await fetchRunsPage();
         if (runs.length === 0) {
             tbody.innerHTML = '<tr><td colspan="7" class="px-4 py-8 text-center text-gray-400">No runs yet</td></tr>';
             return;
         }
-        tbody.innerHTML = runs.map(r => {
-            const dur = r.duration_ms != null ? formatDuration(r.duration_ms) : '—';
-            const started = r.started_at ? new Date(r.started_at).toLocaleString() : '—';
-            const jobName = jobConfigCache[r.job_id] ? jobConfigCache[r.job_id].name : r.job_id;
-            const stopAction = r.status === 'running'
-                ? `<button class="action-btn kill" onclick="killJob('${r.job_id}')">Stop</button>`
-                : '';
-            return `<tr class="hover:bg-gray-50">
-                <td class="px-4 py-3 font-mono text-xs text-gray-500">${r.id}</td>
-                <td class="px-4 py-3">
-                    <span class="job-link" onclick="switchTab('job-detail', '${r.job_id}', '${escHtml(jobName)}')">${escHtml(jobName)}</span>
-                </td>
-                <td class="px-4 py-3">${getStatusIcon(r.status)}</td>
-                <td class="px-4 py-3 text-gray-500 text-xs">${r.trigger}</td>
-                <td class="px-4 py-3 text-gray-600 text-xs">${started}</td>
-                <td class="px-4 py-3 text-gray-600 text-xs">${dur}</td>
-                <td class="px-4 py-3 flex gap-2">
-                    <button class="action-btn edit" onclick="viewLog('${r.id}')">Log</button>
-                    ${stopAction}
-                </td>
-            </tr>`;
-        }).join('');
+        tbody.innerHTML = runs.map(renderAllRunsRow).join('');
     } catch (err) {
         console.error('Failed to load all runs:', err);
         tbody.innerHTML = '<tr><td colspan="7" class="px-4 py-6 text-center text-red-400">Failed to load runs</td></tr>';
     }
 }
 
+async function loadMoreRuns() {
+    if (!allRunsCursor) return;
+    try {
+        const runs = await fetchRunsPage(allRunsCursor);
+        document.getElementById('all-runs-table-body')
+            .insertAdjacentHTML('beforeend', runs.map(renderAllRunsRow).join(''));
+    } catch (err) {
+        console.error('Failed to load more runs:', err);
+    }
+}
+
+// Fetch one keyset page; the server returns the next cursor in X-Next-Cursor
+async function fetchRunsPage(cursor) {
+    let url = `${API}/api/runs?limit=${RUNS_PAGE_SIZE}`;
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+    const res = await fetch(url);
+    const runs = await res.json();
+    allRunsCursor = res.headers.get('X-Next-Cursor');
+    document.getElementById('all-runs-more').classList.toggle('hidden', !allRunsCursor);
+    return runs;
+}
+
+function renderAllRunsRow(r) {
+    const dur = r.duration_ms != null ? formatDuration(r.duration_ms) : '—';
+    const started = r.started_at ? new Date(r.started_at).toLocaleString() : '—';
+    const jobName = jobConfigCache[r.job_id] ? jobConfigCache[r.job_id].name : r.job_id;
+    const stopAction = (r.status === 'running' || r.status === 'queued')
+        ? `<button class="action-btn kill" onclick="killJob('${r.job_id}')">Stop</button>`
+        : '';
+    return `<tr class="hover:bg-gray-50">
+        <td class="px-4 py-3 font-mono text-xs text-gray-500">${r.id}</td>
+        <td class="px-4 py-3">
+            <span class="job-link" onclick="switchTab('job-detail', '${r.job_id}', '${escHtml(jobName)}')">${escHtml(jobName)}</span>
+        </td>
+        <td class="px-4 py-3">${getStatusIcon(r.status)}</td>
+        <td class="px-4 py-3 text-gray-500 text-xs">${r.trigger}</td>
+        <td class="px-4 py-3 text-gray-600 text-xs">${started}</td>
+        <td class="px-4 py-3 text-gray-600 text-xs">${dur}</td>
+        <td class="px-4 py-3 flex gap-2">
+            <button class="action-btn edit" onclick="viewLog('${r.id}')">Log</button>
+            ${stopAction}
+        </td>
+    </tr>`;
+}
+
 // ── Log Viewer ───────────────────────────────────────────────
 
+const LOG_TAIL_LINES = 5000;
+let logStream = null;
+
 async function viewLog(runId) {
+    closeLogStream();
     document.getElementById('log-modal').classList.remove('hidden');
     document.getElementById('log-run-id').textContent = runId;
-    document.getElementById('log-content').textContent = 'Loading...';
+    const content = document.getElementById('log-content');
+    content.textContent = 'Loading...';
 
     try {
-        const res = await fetch(`${API}/api/runs/${runId}/log`);
+        const res = await fetch(`${API}/api/runs/${runId}/log?tail=${LOG_TAIL_LINES}`);
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
         const text = await res.text();
-        document.getElementById('log-content').textContent = text || '(empty log)';
+        const start = parseInt(res.headers.get('X-Log-Offset') || '0');
+        const prefix = start > 0 ? `[showing last ${LOG_TAIL_LINES} lines]\n` : '';
+        content.textContent = prefix + text;
+        followLog(runId, parseInt(res.headers.get('X-Log-Next-Offset') || '0'));
     } catch (err) {
-        document.getElementById('log-content').textContent = `Error loading log: ${err.message}`;
+        content.textContent = `Error loading log: ${err.message}`;
+    }
+}
+
+// Append live output (if the run is still going) via Server-Sent Events
+function followLog(runId, offset) {
+    const content = document.getElementById('log-content');
+    const es = new EventSource(`${API}/api/runs/${runId}/log/stream?offset=${offset}`);
+    logStream = es;
+    es.onmessage = e => {
+        const atBottom = content.scrollHeight - content.scrollTop - content.clientHeight < 20;
+        content.textContent += JSON.parse(e.data);
+        if (atBottom) content.scrollTop = content.scrollHeight;
+    };
+    es.addEventListener('end', () => {
+        closeLogStream();
+        if (!content.textContent) content.textContent = '(empty log)';
+    });
+}
+
+function closeLogStream() {
+    if (logStream) {
+        logStream.close();
+        logStream = null;
     }
 }
 
 function closeLogModal() {
+    closeLogStream();
     document.getElementById('log-modal').classList.add('hidden');
 }
 
@@ -504,11 +626,13 @@ async function editJob(jobId) {
         document.getElementById('f-hour').value = job.schedule.hour || 0;
         document.getElementById('f-minute').value = job.schedule.minute || 0;
         document.getElementById('f-timeout').value = job.timeout_seconds;
+        document.getElementById('f-depends').value = (job.depends_on || []).join(', ');
 
         if (job.schedule.interval) document.getElementById('f-interval').value = job.schedule.interval;
         if (job.schedule.day_of_week != null) document.getElementById('f-dow').value = job.schedule.day_of_week;
         if (job.schedule.day_of_month != null) document.getElementById('f-dom').value = job.schedule.day_of_month;
         if (job.schedule.cron_expression) document.getElementById('f-cron').value = job.schedule.cron_expression;
+        document.getElementById('f-jitter').value = job.schedule.jitter_seconds ?? '';
 
         updateScheduleFields();
     } catch (err) {
@@ -522,10 +646,11 @@ function updateScheduleFields() {
     const freq = document.getElementById('f-frequency').value;
     const isCustom = freq === 'custom';
     document.getElementById('sched-hourly').classList.toggle('hidden', freq !== 'hourly');
-    document.getElementById('sched-time').classList.toggle('hidden', freq === 'hourly' || isCustom);
+    document.getElementById('sched-time').classList.toggle('hidden', freq === 'hourly' || isCustom || freq === 'none');
     document.getElementById('sched-dow').classList.toggle('hidden', freq !== 'weekly');
     document.getElementById('sched-dom').classList.toggle('hidden', freq !== 'monthly');
     document.getElementById('sched-custom').classList.toggle('hidden', !isCustom);
+    document.getElementById('sched-jitter').classList.toggle('hidden', freq === 'none');
 }
 
 function resetForm() {
@@ -550,7 +675,7 @@ async function submitJob(e) {
         schedule.cron_expression = document.getElementById('f-cron').value.trim();
     } else if (freq === 'hourly') {
         schedule.interval = parseInt(document.getElementById('f-interval').value);
-    } else {
+    } else if (freq !== 'none') {
         schedule.hour = parseInt(document.getElementById('f-hour').value);
         schedule.minute = parseInt(document.getElementById('f-minute').value);
     }
@@ -560,12 +685,17 @@ async function submitJob(e) {
     if (freq === 'monthly') {
         schedule.day_of_month = parseInt(document.getElementById('f-dom').value);
     }
+    const jitter = document.getElementById('f-jitter').value.trim();
+    if (freq !== 'none' && jitter !== '') {
+        schedule.jitter_seconds = parseInt(jitter);
+    }
 
     const body = {
         name: document.getElementById('f-name').value,
         script_path: document.getElementById('f-script').value,
         schedule,
         timeout_seconds: parseInt(document.getElementById('f-timeout').value),
+        depends_on: document.getElementById('f-depends').value.split(',').map(s => s.trim()).filter(Boolean),
     };
 
     try {
@@ -589,9 +719,14 @@ async function submitJob(e) {
 // ── File Browser ─────────────────────────────────────────────
 
 let browserPath = '';
+let browserItems = [];
+let browserCursor = null;
+let browserQuery = '';
+let browserSearchTimer = null;
 
 function openBrowser() {
     browserPath = '';
+    document.getElementById('browser-search').value = '';
     document.getElementById('browser-modal').classList.remove('hidden');
     loadBrowserDir('');
 }
@@ -600,17 +735,64 @@ function closeBrowser() {
     document.getElementById('browser-modal').classList.add('hidden');
 }
 
-async function loadBrowserDir(path) {
+async function loadBrowserDir(path, cursor = null, q = '') {
     browserPath = path;
+    browserQuery = q;
     try {
-        const res = await fetch(`${API}/api/browse?path=${encodeURIComponent(path)}`);
+        let url = `${API}/api/browse?path=${encodeURIComponent(path)}`;
+        if (q) url += `&q=${encodeURIComponent(q)}`;
+        if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+        const res = await fetch(url);
         const data = await res.json();
-        renderBrowser(data);
+        browserItems = cursor ? browserItems.concat(data.items || []) : (data.items || []);
+        browserCursor = data.next_cursor || null;
+        renderBrowser({ ...data, items: browserItems });
     } catch (err) {
         console.error('Browse error:', err);
     }
 }
 
+function loadMoreBrowser() {
+    if (browserCursor) loadBrowserDir(browserPath, browserCursor, browserQuery);
+}
+
+function searchScripts() {
+    clearTimeout(browserSearchTimer);
+    browserSearchTimer = setTimeout(async () => {
+        const q = document.getElementById('browser-search').value.trim();
+        if (!q) {
+            loadBrowserDir(browserPath);
+            return;
+        }
+        try {
+            const res = await fetch(`${API}/api/browse/scripts?q=${encodeURIComponent(q)}`);
+            const data = await res.json();
+            // Without the script index, filter the current directory by name
+            if (!data.enabled) loadBrowserDir(browserPath, null, q);
+            else renderScriptMatches(data);
+        } catch (err) {
+            console.error('Script search error:', err);
+        }
+    }, 150);
+}
+
+function renderScriptMatches(data) {
+    const list = document.getElementById('browser-list');
+    if (!data.ready) {
+        list.innerHTML = '<div class="px-4 py-8 text-center text-gray-400 text-sm">Indexing scripts, try again shortly</div>';
+        return;
+    }
+    if (!data.items.length) {
+        list.innerHTML = '<div class="px-4 py-8 text-center text-gray-400 text-sm">No matching scripts</div>';
+        return;
+    }
+    list.innerHTML = data.items.map(item => `
+        <div class="browser-item file" onclick="selectFile('${escHtml(item.path)}')">
+            <span class="icon">📄</span><span>${escHtml(item.name)}</span>
+            <span class="ml-2 text-xs text-gray-400 truncate">${escHtml(item.path)}</span>
+        </div>`).join('');
+}
+
 function renderBrowser(data) {
     const crumb = document.getElementById('browser-breadcrumb');
     const list = document.getElementById('browser-list');
@@ -646,6 +828,12 @@ function renderBrowser(data) {
         }
     }
 
+    if (browserCursor) {
+        html += `<div class="browser-item text-blue-600" onclick="loadMoreBrowser()">
+            <span class="icon">…</span><span>Load more</span>
+        </div>`;
+    }
+
     if (!data.items || data.items.length === 0) {
         html = '<div class="px-4 py-8 text-center text-gray-400 text-sm">No files here</div>';
     }
@@ -686,6 +874,12 @@ function formatDuration(ms) {
     return `${m}m ${rs}s`;
 }
 
+function formatKb(kb) {
+    if (kb < 1024) return `${kb}KB`;
+    if (kb < 1024 * 1024) return `${(kb / 1024).toFixed(1)}MB`;
+    return `${(kb / 1024 / 1024).toFixed(2)}GB`;
+}
+
 // Close modals on Escape
 document.addEventListener('keydown', e => {
     if (e.key === 'Escape') {
@@ -695,4 +889,5 @@ document.addEventListener('keydown', e => {
 });
 
 // Init
+connectEvents();
 switchTab('monitor');
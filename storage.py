@@ -0,0 +1,275 @@
+"""Storage interface for run records.
+
+db.py picks one implementation at startup (CRONUI_DB=postgres|sqlite) and
+forwards its module-level functions to it.
+"""
+from __future__ import annotations
+
+import base64
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+from models import DailyStats, RecentRunSummary, RunListItem, RunRecord, RunStatus, TriggerType
+
+
+class Storage(ABC):
+    """Backend for the `runs` table. Timestamps are timezone-aware UTC."""
+
+    @abstractmethod
+    async def open(self):
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+    @abstractmethod
+    async def ensure_table(self):
+        ...
+
+    @abstractmethod
+    async def cleanup_stale_runs(self, now: datetime) -> int:
+        """Fail every 'running'/'queued' run; returns how many were updated."""
+
+    @abstractmethod
+    async def upsert_runs(self, runs: list[RunRecord]):
+        """Insert or overwrite full run rows in one batch."""
+
+    @abstractmethod
+    async def finish_run(self, run_id: str, status: RunStatus, finished_at: datetime,
+                         exit_code: Optional[int], error_msg: Optional[str],
+                         usage: Optional[dict[str, int]] = None,
+                         worker: Optional[str] = None) -> Optional[RunRecord]:
+        """Record the outcome of a run this process has no state for.
+
+        Duration is computed in SQL. With `worker` set, only a run that
+        worker still holds is updated. Returns the updated run, if any.
+        """
+
+    @abstractmethod
+    async def list_runs(self, limit: int, *, job_id: Optional[str] = None,
+                        statuses: Sequence[RunStatus] = (), triggers: Sequence[TriggerType] = (),
+                        since: Optional[datetime] = None, until: Optional[datetime] = None,
+                        after: Optional[tuple[datetime, str]] = None) -> list[RunListItem]:
+        """One page of runs, newest first, ordered by (started_at, id).
+
+        `after` is the (started_at, id) of the last row of the previous page;
+        `since` is inclusive and `until` exclusive on started_at.
+        """
+
+    @abstractmethod
+    async def get_latest_run(self, job_id: str) -> Optional[RunRecord]:
+        ...
+
+    @abstractmethod
+    async def get_run(self, run_id: str) -> Optional[RunRecord]:
+        ...
+
+    @abstractmethod
+    async def get_recent_runs(self, job_id: str, limit: int) -> list[RecentRunSummary]:
+        ...
+
+    @abstractmethod
+    async def get_dashboard_runs(self, job_ids: list[str], per_job: int) -> dict[str, list[RecentRunSummary]]:
+        ...
+
+    def pool_stats(self) -> dict[str, int]:
+        """Connection counts for metrics: busy, idle and max."""
+        return {"busy": 0, "idle": 0, "max": 0}
+
+    # ── Retention and rollups ─────────────────────────────────
+
+    @abstractmethod
+    async def get_meta(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set_meta(self, key: str, value: str):
+        ...
+
+    @abstractmethod
+    async def rollup_daily(self, start: date, through: date):
+        """(Re)compute run_daily_stats for UTC days start..through inclusive."""
+
+    @abstractmethod
+    async def get_daily_stats(self, since: date, job_id: Optional[str] = None) -> list[DailyStats]:
+        ...
+
+    @abstractmethod
+    async def delete_runs_before(self, cutoff: datetime, job_id: Optional[str] = None,
+                                 exclude: Iterable[str] = ()) -> list[str]:
+        """Delete finished runs started before `cutoff`, for one job or all
+        jobs except `exclude`. Returns the deleted runs' log files."""
+
+    @abstractmethod
+    async def delete_runs_beyond(self, job_id: str, keep: int, before: datetime) -> list[str]:
+        """Delete finished runs of a job older than its newest `keep`, limited
+        to runs started before `before`. Returns the deleted runs' log files."""
+
+    async def maintain_partitions(self, now: datetime):
+        """Create upcoming time partitions, if the backend partitions runs."""
+
+    async def drop_partitions_before(self, cutoff: datetime) -> list[str]:
+        """Drop whole partitions ending before `cutoff`. Returns log files."""
+        return []
+
+    # ── Worker queue ──────────────────────────────────────────
+    # With CRONUI_EXECUTION=queue the API only inserts queued runs and
+    # worker processes claim them. A claimed run is 'running' with its
+    # `worker` set and a lease the worker keeps renewing.
+
+    @abstractmethod
+    async def enqueue_run(self, run: RunRecord, spec: dict[str, Any], priority: int,
+                          max_concurrency: Optional[int]):
+        """Insert a queued run for workers; `max_concurrency` None means unlimited."""
+
+    @abstractmethod
+    async def claim_runs(self, worker: str, limit: int, now: datetime,
+                         lease_until: datetime) -> list[tuple[RunRecord, dict[str, Any]]]:
+        """Atomically move up to `limit` queued runs to 'running' for `worker`,
+        highest priority then oldest first, respecting per-job limits.
+        Returns each claimed run with its spec."""
+
+    @abstractmethod
+    async def renew_leases(self, worker: str, run_ids: Sequence[str], lease_until: datetime) -> set[str]:
+        """Extend the leases of runs `worker` still owns; returns their ids."""
+
+    @abstractmethod
+    async def reclaim_expired(self, now: datetime, max_attempts: int) -> tuple[int, int]:
+        """Requeue running runs whose lease has expired, or fail them after
+        `max_attempts` claims. Returns (requeued, failed)."""
+
+    @abstractmethod
+    async def cancel_active(self, job_id: str, now: datetime) -> int:
+        """Cancel a job's queued and running runs; workers notice on renewal."""
+
+    @abstractmethod
+    async def count_active(self, job_id: str) -> int:
+        """Queued plus running runs of a job."""
+
+    @abstractmethod
+    async def list_active(self) -> dict[str, RunStatus]:
+        """Status of every queued or running run, by run id."""
+
+
+# created_at is when the run was first recorded (queued_at, else started_at).
+# Unlike started_at it never changes, so it is the time partitioning key.
+RUN_COLUMNS = (
+    "id", "job_id", "status", "trigger", "started_at", "finished_at", "duration_ms",
+    "exit_code", "log_file", "error_msg", "queued_at", "wait_ms", "created_at",
+    "cpu_user_ms", "cpu_sys_ms", "max_rss_kb", "io_read_blocks", "io_write_blocks",
+    "ctx_voluntary", "ctx_involuntary",
+)
+# Resource usage columns, added to existing tables as BIGINT / INTEGER
+USAGE_COLUMNS = RUN_COLUMNS[13:]
+# Worker queue state, kept out of RunRecord and never touched by upserts
+QUEUE_COLUMNS = ("priority", "max_concurrency", "spec", "worker", "lease_until", "attempts")
+
+
+def record_values(run: RunRecord) -> tuple:
+    """Column values of `run` in RUN_COLUMNS order."""
+    return (
+        run.id, run.job_id, run.status.value, run.trigger.value, run.started_at,
+        run.finished_at, run.duration_ms, run.exit_code, run.log_file, run.error_msg,
+        run.queued_at, run.wait_ms, run.queued_at or run.started_at,
+        *(getattr(run, c) for c in USAGE_COLUMNS),
+    )
+
+
+# Projection for list views
+LIST_COLUMNS = (
+    "id", "job_id", "status", "trigger", "started_at", "finished_at", "duration_ms",
+    "exit_code", "wait_ms", "cpu_user_ms", "cpu_sys_ms", "max_rss_kb",
+)
+
+
+def encode_cursor(started_at: datetime, run_id: str) -> str:
+    """Opaque page cursor for the keyset (started_at, id)."""
+    raw = f"{started_at.isoformat()}|{run_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, run_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), run_id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
+def summarize_day(day: date, job_id: str, rows: list[tuple[str, Optional[int]]]) -> DailyStats:
+    """Build a DailyStats from (status, duration_ms) pairs."""
+    durations = sorted(d for _, d in rows if d is not None)
+
+    def pct(q: float) -> Optional[int]:
+        if not durations:
+            return None
+        # Linear interpolation, same as Postgres percentile_cont
+        pos = q * (len(durations) - 1)
+        lo = int(pos)
+        hi = min(lo + 1, len(durations) - 1)
+        return round(durations[lo] + (durations[hi] - durations[lo]) * (pos - lo))
+
+    return DailyStats(
+        day=day,
+        job_id=job_id,
+        runs=len(rows),
+        successes=sum(1 for s, _ in rows if s == RunStatus.success.value),
+        failures=sum(1 for s, _ in rows if s in (RunStatus.failed.value, RunStatus.timeout.value)),
+        avg_ms=round(sum(durations) / len(durations)) if durations else None,
+        p50_ms=pct(0.5),
+        p95_ms=pct(0.95),
+        max_ms=durations[-1] if durations else None,
+    )
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(dt: datetime) -> datetime:
+    """First instant of the month after `dt`'s month."""
+    dt = month_start(dt)
+    return dt.replace(year=dt.year + 1, month=1) if dt.month == 12 else dt.replace(month=dt.month + 1)
+
+
+def row_to_record(row: Mapping[str, Any]) -> RunRecord:
+    return RunRecord(
+        id=row["id"],
+        job_id=row["job_id"],
+        status=RunStatus(row["status"]),
+        trigger=TriggerType(row["trigger"]),
+        started_at=row["started_at"],
+        finished_at=row["finished_at"],
+        duration_ms=row["duration_ms"],
+        exit_code=row["exit_code"],
+        log_file=row["log_file"],
+        error_msg=row["error_msg"],
+        queued_at=row["queued_at"],
+        wait_ms=row["wait_ms"],
+        **{c: row[c] for c in USAGE_COLUMNS},
+    )
+
+
+def row_to_list_item(row: Mapping[str, Any]) -> RunListItem:
+    return RunListItem(**{c: row[c] for c in LIST_COLUMNS})
+
+
+def row_to_summary(row: Mapping[str, Any]) -> RecentRunSummary:
+    return RecentRunSummary(
+        id=row["id"],
+        status=RunStatus(row["status"]),
+        started_at=row["started_at"],
+        duration_ms=row["duration_ms"],
+    )
+
+
+def group_summaries(rows) -> dict[str, list[RecentRunSummary]]:
+    """Group (job_id, id, status, started_at, duration_ms) rows by job_id."""
+    result: dict[str, list[RecentRunSummary]] = {}
+    for r in rows:
+        result.setdefault(r["job_id"], []).append(row_to_summary(r))
+    return result
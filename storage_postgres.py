@@ -0,0 +1,491 @@
+"""PostgreSQL storage backend (asyncpg connection pool)."""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable, Optional, Sequence
+
+import asyncpg
+
+from models import DailyStats, RecentRunSummary, RunListItem, RunRecord, RunStatus, TriggerType
+from storage import (
+    LIST_COLUMNS,
+    QUEUE_COLUMNS,
+    RUN_COLUMNS,
+    USAGE_COLUMNS,
+    Storage,
+    group_summaries,
+    month_start,
+    next_month,
+    record_values,
+    row_to_list_item,
+    row_to_record,
+    row_to_summary,
+)
+
+_RUN_COLUMNS_DDL = """
+    id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    trigger TEXT NOT NULL DEFAULT 'scheduled',
+    started_at TIMESTAMPTZ NOT NULL,
+    finished_at TIMESTAMPTZ,
+    duration_ms INTEGER,
+    exit_code INTEGER,
+    log_file TEXT,
+    error_msg TEXT,
+    queued_at TIMESTAMPTZ,
+    wait_ms INTEGER,
+    created_at TIMESTAMPTZ NOT NULL
+"""
+
+_QUEUE_TYPES = {
+    "priority": "INTEGER", "max_concurrency": "INTEGER", "spec": "TEXT",
+    "worker": "TEXT", "lease_until": "TIMESTAMPTZ", "attempts": "INTEGER",
+}
+
+# Months of partitions created ahead of the current one
+PARTITIONS_AHEAD = 2
+
+
+class PostgresStorage(Storage):
+    def __init__(self, dsn: str, min_size: int = 2, max_size: int = 10):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool: Optional[asyncpg.Pool] = None
+
+    async def open(self):
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
+
+    async def close(self):
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
+
+    def pool_stats(self) -> dict[str, int]:
+        if self._pool is None:
+            return super().pool_stats()
+        size, idle = self._pool.get_size(), self._pool.get_idle_size()
+        return {"busy": size - idle, "idle": idle, "max": self._pool.get_max_size()}
+
+    async def ensure_table(self):
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                kind = await conn.fetchval("SELECT relkind FROM pg_class WHERE oid = to_regclass('runs')")
+                migrate = kind == "r"
+                if migrate:
+                    await self._detach_legacy(conn)
+                await conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS runs (
+                        {_RUN_COLUMNS_DDL},
+                        PRIMARY KEY (id, created_at)
+                    ) PARTITION BY RANGE (created_at)
+                """)
+                await conn.execute("CREATE TABLE IF NOT EXISTS runs_default PARTITION OF runs DEFAULT")
+                for column in USAGE_COLUMNS:
+                    await conn.execute(f"ALTER TABLE runs ADD COLUMN IF NOT EXISTS {column} BIGINT")
+                for column in QUEUE_COLUMNS:
+                    await conn.execute(
+                        f"ALTER TABLE runs ADD COLUMN IF NOT EXISTS {column} {_QUEUE_TYPES[column]}")
+                # Worker claim order and per-job active counts; both stay tiny
+                await conn.execute(
+                    """CREATE INDEX IF NOT EXISTS idx_runs_queued ON runs(priority DESC, queued_at, id)
+                       WHERE status = 'queued'"""
+                )
+                await conn.execute(
+                    """CREATE INDEX IF NOT EXISTS idx_runs_active ON runs(job_id)
+                       WHERE status IN ('queued', 'running')"""
+                )
+                # (job_id, started_at DESC, id DESC) serves per-job history, the
+                # dashboard's per-job LATERAL lookups and keyset pages on
+                # (started_at, id); (started_at DESC, id DESC) does the same for
+                # the global listing. They supersede the indexes without id.
+                for index in ("idx_runs_job_id", "idx_runs_job_started", "idx_runs_started_at"):
+                    await conn.execute(f"DROP INDEX IF EXISTS {index}")
+                await conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_runs_job_started_id ON runs(job_id, started_at DESC, id DESC)"
+                )
+                await conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_runs_started_id ON runs(started_at DESC, id DESC)"
+                )
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS run_daily_stats (
+                        day DATE NOT NULL,
+                        job_id TEXT NOT NULL,
+                        runs INTEGER NOT NULL,
+                        successes INTEGER NOT NULL,
+                        failures INTEGER NOT NULL,
+                        avg_ms INTEGER,
+                        p50_ms INTEGER,
+                        p95_ms INTEGER,
+                        max_ms INTEGER,
+                        PRIMARY KEY (day, job_id)
+                    )
+                """)
+                await conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cronui_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+                )
+                if migrate:
+                    lo, hi = await conn.fetchrow("SELECT min(created_at), max(created_at) FROM runs_legacy")
+                    if lo is not None:
+                        await self._create_partitions(conn, lo, hi)
+                    cols = ", ".join(RUN_COLUMNS)
+                    n = await conn.execute(f"INSERT INTO runs ({cols}) SELECT {cols} FROM runs_legacy")
+                    await conn.execute("DROP TABLE runs_legacy")
+                    print(f"[CRONUI] Migrated {n.split()[-1]} run(s) to the partitioned runs table")
+
+    async def _detach_legacy(self, conn):
+        """Bring a pre-partitioning `runs` table up to date and move it aside."""
+        await conn.execute("ALTER TABLE runs ADD COLUMN IF NOT EXISTS queued_at TIMESTAMPTZ")
+        await conn.execute("ALTER TABLE runs ADD COLUMN IF NOT EXISTS wait_ms INTEGER")
+        await conn.execute("ALTER TABLE runs ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ")
+        for column in USAGE_COLUMNS:
+            await conn.execute(f"ALTER TABLE runs ADD COLUMN IF NOT EXISTS {column} BIGINT")
+        await conn.execute("UPDATE runs SET created_at = COALESCE(queued_at, started_at) WHERE created_at IS NULL")
+        for index in ("idx_runs_job_id", "idx_runs_job_started", "idx_runs_started_at"):
+            await conn.execute(f"DROP INDEX IF EXISTS {index}")
+        await conn.execute("ALTER TABLE runs RENAME CONSTRAINT runs_pkey TO runs_legacy_pkey")
+        await conn.execute("ALTER TABLE runs RENAME TO runs_legacy")
+
+    async def _create_partitions(self, conn, first: datetime, last: datetime):
+        """Create monthly partitions runs_pYYYYMM covering first..last."""
+        month = month_start(first.astimezone(timezone.utc))
+        while month <= last:
+            upper = next_month(month)
+            await conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS runs_p{month:%Y%m} PARTITION OF runs
+                    FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"""
+            )
+            month = upper
+
+    async def cleanup_stale_runs(self, now: datetime) -> int:
+        async with self._pool.acquire() as conn:
+            count = await conn.execute(
+                """UPDATE runs
+                   SET status='failed', finished_at=$1,
+                       duration_ms = EXTRACT(EPOCH FROM ($1 - started_at))::int * 1000,
+                       exit_code=-1,
+                       error_msg='Server restarted while job was ' || status
+                   WHERE status IN ('running', 'queued')""",
+                now,
+            )
+        # asyncpg returns "UPDATE N"
+        return int(count.split()[-1]) if count else 0
+
+    async def upsert_runs(self, runs: list[RunRecord]):
+        cols = ", ".join(RUN_COLUMNS)
+        params = ", ".join(f"${i}" for i in range(1, len(RUN_COLUMNS) + 1))
+        updates = ", ".join(f"{c}=EXCLUDED.{c}" for c in RUN_COLUMNS[2:])
+        async with self._pool.acquire() as conn:
+            await conn.executemany(
+                f"""INSERT INTO runs ({cols}) VALUES ({params})
+                    ON CONFLICT (id, created_at) DO UPDATE SET {updates}""",
+                [record_values(r) for r in runs],
+            )
+
+    async def finish_run(self, run_id: str, status: RunStatus, finished_at: datetime,
+                         exit_code: Optional[int], error_msg: Optional[str],
+                         usage: Optional[dict[str, int]] = None,
+                         worker: Optional[str] = None) -> Optional[RunRecord]:
+        usage = usage or {}
+        extra = "".join(f", {c}=${i}" for i, c in enumerate(usage, start=7))
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"""UPDATE runs SET status=$1, finished_at=$2,
+                        duration_ms = (EXTRACT(EPOCH FROM ($2 - started_at)) * 1000)::int,
+                        exit_code=$3, error_msg=$4{extra}
+                    WHERE id=$5 AND ($6::text IS NULL OR (worker=$6 AND status='running'))
+                    RETURNING *""",
+                status.value, finished_at, exit_code, error_msg, run_id, worker, *usage.values(),
+            )
+        return row_to_record(row) if row else None
+
+    async def list_runs(self, limit: int, *, job_id: Optional[str] = None,
+                        statuses: Sequence[RunStatus] = (), triggers: Sequence[TriggerType] = (),
+                        since: Optional[datetime] = None, until: Optional[datetime] = None,
+                        after: Optional[tuple[datetime, str]] = None) -> list[RunListItem]:
+        where, args = [], []
+
+        def arg(value) -> str:
+            args.append(value)
+            return f"${len(args)}"
+
+        if job_id is not None:
+            where.append(f"job_id = {arg(job_id)}")
+        if statuses:
+            where.append(f"status = ANY({arg([s.value for s in statuses])}::text[])")
+        if triggers:
+            where.append(f"trigger = ANY({arg([t.value for t in triggers])}::text[])")
+        if since is not None:
+            where.append(f"started_at >= {arg(since)}")
+        if until is not None:
+            where.append(f"started_at < {arg(until)}")
+        if after is not None:
+            where.append(f"(started_at, id) < ({arg(after[0])}, {arg(after[1])})")
+        sql = f"SELECT {', '.join(LIST_COLUMNS)} FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY started_at DESC, id DESC LIMIT {arg(limit)}"
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(sql, *args)
+        return [row_to_list_item(r) for r in rows]
+
+    async def get_latest_run(self, job_id: str) -> Optional[RunRecord]:
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT * FROM runs WHERE job_id=$1 ORDER BY started_at DESC LIMIT 1",
+                job_id,
+            )
+        return row_to_record(row) if row else None
+
+    async def get_run(self, run_id: str) -> Optional[RunRecord]:
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow("SELECT * FROM runs WHERE id=$1", run_id)
+        return row_to_record(row) if row else None
+
+    async def get_recent_runs(self, job_id: str, limit: int) -> list[RecentRunSummary]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, status, started_at, duration_ms FROM runs WHERE job_id=$1 ORDER BY started_at DESC LIMIT $2",
+                job_id, limit,
+            )
+        return [row_to_summary(r) for r in rows]
+
+    async def get_dashboard_runs(self, job_ids: list[str], per_job: int) -> dict[str, list[RecentRunSummary]]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT j.job_id, r.id, r.status, r.started_at, r.duration_ms
+                   FROM unnest($1::text[]) AS j(job_id)
+                   CROSS JOIN LATERAL (
+                       SELECT id, status, started_at, duration_ms FROM runs
+                       WHERE runs.job_id = j.job_id
+                       ORDER BY started_at DESC LIMIT $2
+                   ) r
+                   ORDER BY j.job_id, r.started_at DESC""",
+                job_ids, per_job,
+            )
+        return group_summaries(rows)
+
+    # ── Retention and rollups ─────────────────────────────────
+
+    async def get_meta(self, key: str) -> Optional[str]:
+        async with self._pool.acquire() as conn:
+            return await conn.fetchval("SELECT value FROM cronui_meta WHERE key=$1", key)
+
+    async def set_meta(self, key: str, value: str):
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                """INSERT INTO cronui_meta (key, value) VALUES ($1, $2)
+                   ON CONFLICT (key) DO UPDATE SET value=EXCLUDED.value""",
+                key, value,
+            )
+
+    async def rollup_daily(self, start: date, through: date):
+        lo = datetime.combine(start, time(), timezone.utc)
+        hi = datetime.combine(through + timedelta(days=1), time(), timezone.utc)
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM run_daily_stats WHERE day >= $1 AND day <= $2", start, through)
+                await conn.execute(
+                    """INSERT INTO run_daily_stats
+                           (day, job_id, runs, successes, failures, avg_ms, p50_ms, p95_ms, max_ms)
+                       SELECT (started_at AT TIME ZONE 'UTC')::date, job_id, count(*),
+                              count(*) FILTER (WHERE status = 'success'),
+                              count(*) FILTER (WHERE status IN ('failed', 'timeout')),
+                              round(avg(duration_ms))::int,
+                              round(percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms))::int,
+                              round(percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms))::int,
+                              max(duration_ms)
+                       FROM runs
+                       WHERE started_at >= $1 AND started_at < $2
+                         AND status NOT IN ('running', 'queued')
+                       GROUP BY 1, 2""",
+                    lo, hi,
+                )
+
+    async def get_daily_stats(self, since: date, job_id: Optional[str] = None) -> list[DailyStats]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT * FROM run_daily_stats
+                   WHERE day >= $1 AND ($2::text IS NULL OR job_id = $2)
+                   ORDER BY day, job_id""",
+                since, job_id,
+            )
+        return [DailyStats(**dict(r)) for r in rows]
+
+    async def delete_runs_before(self, cutoff: datetime, job_id: Optional[str] = None,
+                                 exclude: Iterable[str] = ()) -> list[str]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """DELETE FROM runs
+                   WHERE started_at < $1 AND status NOT IN ('running', 'queued')
+                     AND ($2::text IS NULL OR job_id = $2)
+                     AND job_id <> ALL($3::text[])
+                   RETURNING log_file""",
+                cutoff, job_id, list(exclude),
+            )
+        return [r["log_file"] for r in rows if r["log_file"]]
+
+    async def delete_runs_beyond(self, job_id: str, keep: int, before: datetime) -> list[str]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """DELETE FROM runs
+                   WHERE job_id = $1 AND started_at < $3 AND status NOT IN ('running', 'queued')
+                     AND started_at < (
+                         SELECT started_at FROM runs WHERE job_id = $1
+                         ORDER BY started_at DESC OFFSET $2 - 1 LIMIT 1
+                     )
+                   RETURNING log_file""",
+                job_id, keep, before,
+            )
+        return [r["log_file"] for r in rows if r["log_file"]]
+
+    async def maintain_partitions(self, now: datetime):
+        last = month_start(now)
+        for _ in range(PARTITIONS_AHEAD):
+            last = next_month(last)
+        async with self._pool.acquire() as conn:
+            await self._create_partitions(conn, now, last)
+
+    async def drop_partitions_before(self, cutoff: datetime) -> list[str]:
+        logs: list[str] = []
+        async with self._pool.acquire() as conn:
+            names = await conn.fetch(
+                """SELECT c.relname FROM pg_inherits i
+                   JOIN pg_class c ON c.oid = i.inhrelid
+                   WHERE i.inhparent = 'runs'::regclass AND c.relname ~ '^runs_p[0-9]{6}$'
+                   ORDER BY c.relname"""
+            )
+            for (name,) in names:
+                upper = next_month(datetime.strptime(name[6:], "%Y%m").replace(tzinfo=timezone.utc))
+                if upper > cutoff:
+                    break
+                async with conn.transaction():
+                    # A partition can still hold long-running or queued runs
+                    busy = await conn.fetchval(
+                        f"SELECT count(*) FROM {name} WHERE status IN ('running', 'queued')"
+                    )
+                    if busy:
+                        continue
+                    logs.extend(
+                        r["log_file"] for r in await conn.fetch(f"SELECT log_file FROM {name}") if r["log_file"]
+                    )
+                    await conn.execute(f"ALTER TABLE runs DETACH PARTITION {name}")
+                    await conn.execute(f"DROP TABLE {name}")
+                print(f"[CRONUI] Dropped run partition {name}")
+        return logs
+
+    # ── Worker queue ──────────────────────────────────────────
+    # Workers claim with FOR UPDATE SKIP LOCKED, so concurrent claims pass
+    # over each other's rows instead of queueing behind them. Jobs with a
+    # concurrency limit are additionally serialized per job with a
+    # transaction-scoped advisory lock, taken with try-lock so a busy job
+    # is skipped rather than waited for.
+
+    async def enqueue_run(self, run: RunRecord, spec: dict[str, Any], priority: int,
+                          max_concurrency: Optional[int]):
+        cols = ", ".join(RUN_COLUMNS + ("priority", "max_concurrency", "spec", "attempts"))
+        params = ", ".join(f"${i}" for i in range(1, len(RUN_COLUMNS) + 5))
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                f"INSERT INTO runs ({cols}) VALUES ({params})",
+                *record_values(run), priority, max_concurrency, json.dumps(spec), 0,
+            )
+
+    async def claim_runs(self, worker: str, limit: int, now: datetime,
+                         lease_until: datetime) -> list[tuple[RunRecord, dict[str, Any]]]:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                queued = await conn.fetch(
+                    """SELECT id, created_at, job_id, max_concurrency FROM runs
+                       WHERE status = 'queued'
+                       ORDER BY priority DESC, queued_at, id
+                       LIMIT $1 FOR UPDATE SKIP LOCKED""",
+                    limit * 4,
+                )
+                running: dict[str, int] = {}
+                chosen = []
+                for r in queued:
+                    if len(chosen) >= limit:
+                        break
+                    if r["max_concurrency"] is not None:
+                        job_id = r["job_id"]
+                        if job_id not in running:
+                            locked = await conn.fetchval(
+                                "SELECT pg_try_advisory_xact_lock(hashtext('cronui_claim:' || $1))", job_id)
+                            if locked:
+                                running[job_id] = await conn.fetchval(
+                                    "SELECT count(*) FROM runs WHERE job_id=$1 AND status='running'", job_id)
+                            else:
+                                # Another worker is claiming this job right now
+                                running[job_id] = r["max_concurrency"]
+                        if running[job_id] >= r["max_concurrency"]:
+                            continue
+                        running[job_id] += 1
+                    chosen.append((r["id"], r["created_at"]))
+                rows = await conn.fetch(
+                    """UPDATE runs SET status='running', started_at=$1,
+                           wait_ms = (EXTRACT(EPOCH FROM ($1 - queued_at)) * 1000)::int,
+                           worker=$2, lease_until=$3, attempts=COALESCE(attempts, 0) + 1
+                       FROM unnest($4::text[], $5::timestamptz[]) AS c(id, created_at)
+                       WHERE runs.id = c.id AND runs.created_at = c.created_at
+                       RETURNING runs.*""",
+                    now, worker, lease_until, [c[0] for c in chosen], [c[1] for c in chosen],
+                )
+        return [(row_to_record(r), json.loads(r["spec"] or "{}")) for r in rows]
+
+    async def renew_leases(self, worker: str, run_ids: Sequence[str], lease_until: datetime) -> set[str]:
+        if not run_ids:
+            return set()
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """UPDATE runs SET lease_until=$1
+                   WHERE worker=$2 AND status='running' AND id = ANY($3::text[])
+                   RETURNING id""",
+                lease_until, worker, list(run_ids),
+            )
+        return {r["id"] for r in rows}
+
+    async def reclaim_expired(self, now: datetime, max_attempts: int) -> tuple[int, int]:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                failed = await conn.execute(
+                    """UPDATE runs
+                       SET status='failed', finished_at=$1,
+                           duration_ms = (EXTRACT(EPOCH FROM ($1 - started_at)) * 1000)::int,
+                           exit_code=-1,
+                           error_msg='Lease of worker ' || worker || ' expired after ' || attempts || ' attempt(s)'
+                       WHERE status='running' AND lease_until < $1 AND attempts >= $2""",
+                    now, max_attempts,
+                )
+                requeued = await conn.execute(
+                    """UPDATE runs SET status='queued', worker=NULL, lease_until=NULL
+                       WHERE status='running' AND lease_until < $1""",
+                    now,
+                )
+        return int(requeued.split()[-1]), int(failed.split()[-1])
+
+    async def cancel_active(self, job_id: str, now: datetime) -> int:
+        async with self._pool.acquire() as conn:
+            count = await conn.execute(
+                """UPDATE runs
+                   SET status='cancelled', finished_at=$1,
+                       duration_ms = (EXTRACT(EPOCH FROM ($1 - started_at)) * 1000)::int,
+                       error_msg = CASE status WHEN 'queued' THEN 'Cancelled while queued'
+                                               ELSE 'Cancelled by user' END
+                   WHERE job_id=$2 AND status IN ('queued', 'running')""",
+                now, job_id,
+            )
+        return int(count.split()[-1])
+
+    async def count_active(self, job_id: str) -> int:
+        async with self._pool.acquire() as conn:
+            return await conn.fetchval(
+                "SELECT count(*) FROM runs WHERE job_id=$1 AND status IN ('queued', 'running')", job_id,
+            )
+
+    async def list_active(self) -> dict[str, RunStatus]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("SELECT id, status FROM runs WHERE status IN ('queued', 'running')")
+        return {r["id"]: RunStatus(r["status"]) for r in rows}
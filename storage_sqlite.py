@@ -0,0 +1,528 @@
+"""Embedded SQLite storage backend.
+
+The database runs in WAL mode so readers never block the writer. All writes
+go through one asyncio writer task that drains a queue and applies each
+batch in a single transaction on a dedicated thread; reads run on a small
+thread pool with one connection per thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from models import DailyStats, RecentRunSummary, RunListItem, RunRecord, RunStatus, TriggerType
+from storage import (
+    LIST_COLUMNS,
+    QUEUE_COLUMNS,
+    RUN_COLUMNS,
+    USAGE_COLUMNS,
+    Storage,
+    group_summaries,
+    record_values,
+    row_to_list_item,
+    row_to_record,
+    row_to_summary,
+    summarize_day,
+)
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        id TEXT PRIMARY KEY,
+        job_id TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'running',
+        trigger TEXT NOT NULL DEFAULT 'scheduled',
+        started_at TEXT NOT NULL,
+        finished_at TEXT,
+        duration_ms INTEGER,
+        exit_code INTEGER,
+        log_file TEXT,
+        error_msg TEXT,
+        queued_at TEXT,
+        wait_ms INTEGER,
+        created_at TEXT
+    )""",
+    # Keyset pages on (started_at, id), per job and global
+    "DROP INDEX IF EXISTS idx_runs_job_started",
+    "DROP INDEX IF EXISTS idx_runs_started_at",
+    "CREATE INDEX IF NOT EXISTS idx_runs_job_started_id ON runs(job_id, started_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_started_id ON runs(started_at DESC, id DESC)",
+    """CREATE TABLE IF NOT EXISTS run_daily_stats (
+        day TEXT NOT NULL,
+        job_id TEXT NOT NULL,
+        runs INTEGER NOT NULL,
+        successes INTEGER NOT NULL,
+        failures INTEGER NOT NULL,
+        avg_ms INTEGER,
+        p50_ms INTEGER,
+        p95_ms INTEGER,
+        max_ms INTEGER,
+        PRIMARY KEY (day, job_id)
+    )""",
+    "CREATE TABLE IF NOT EXISTS cronui_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+]
+
+# Columns added after the first release: (name, type)
+_ADDED_COLUMNS = [("created_at", "TEXT")] + [(c, "INTEGER") for c in USAGE_COLUMNS] + [
+    (c, "TEXT" if c in ("spec", "worker", "lease_until") else "INTEGER") for c in QUEUE_COLUMNS
+]
+
+# Created once the added columns exist
+_QUEUE_INDEXES = [
+    # Claim order, and per-job active counts
+    """CREATE INDEX IF NOT EXISTS idx_runs_queued ON runs(priority DESC, queued_at, id)
+       WHERE status = 'queued'""",
+    """CREATE INDEX IF NOT EXISTS idx_runs_active ON runs(job_id)
+       WHERE status IN ('queued', 'running')""",
+]
+
+
+def _ts(dt: Optional[datetime]) -> Optional[str]:
+    """Fixed-width UTC ISO-8601 so text order matches time order."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path: Path, readers: int = 4, batch_size: int = 256):
+        self.path = Path(path)
+        self.readers = readers
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._conns: list[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._write_pool: Optional[ThreadPoolExecutor] = None
+        self._read_pool: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    # ── Connections and threads ───────────────────────────────
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    async def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_pool = ThreadPoolExecutor(1, thread_name_prefix="cronui-sqlite-writer")
+        self._read_pool = ThreadPoolExecutor(self.readers, thread_name_prefix="cronui-sqlite-reader")
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._writer_loop())
+
+    async def close(self):
+        if self._writer:
+            await self._queue.put(None)
+            await self._writer
+            self._writer = None
+        for pool in (self._write_pool, self._read_pool):
+            if pool:
+                pool.shutdown(wait=True)
+        with self._conns_lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+
+    async def _read(self, fn: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_pool, lambda: fn(self._conn(), *args))
+
+    async def _write(self, fn: Callable[..., Any], *args) -> Any:
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, args, fut))
+        return await fut
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+            stopping = item is None
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(self._write_pool, self._apply, batch)
+            except Exception as exc:
+                results = [(False, exc)] * len(batch)
+            for (_, _, fut), (ok, value) in zip(batch, results):
+                if fut.done():
+                    continue
+                if ok:
+                    fut.set_result(value)
+                else:
+                    fut.set_exception(value)
+
+    def _apply(self, batch) -> list[tuple[bool, Any]]:
+        """Run a batch of writes in one transaction; one failure doesn't sink the rest."""
+        conn = self._conn()
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for fn, args, _ in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    results.append((True, fn(conn, *args)))
+                    conn.execute("RELEASE op")
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    results.append((False, exc))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    def pool_stats(self) -> dict[str, int]:
+        # No pool here: report writes waiting for the writer thread as busy
+        # and the per-thread connections opened so far as idle
+        with self._conns_lock:
+            conns = len(self._conns)
+        busy = self._queue.qsize() if self._queue else 0
+        return {"busy": busy, "idle": conns, "max": self.readers + 1}
+
+    # ── Storage ───────────────────────────────────────────────
+
+    async def ensure_table(self):
+        def apply(conn):
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+            have = {r["name"] for r in conn.execute("PRAGMA table_info(runs)")}
+            for name, kind in _ADDED_COLUMNS:
+                if name not in have:
+                    conn.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+            for stmt in _QUEUE_INDEXES:
+                conn.execute(stmt)
+            conn.execute("UPDATE runs SET created_at = COALESCE(queued_at, started_at) WHERE created_at IS NULL")
+        await self._write(apply)
+
+    async def cleanup_stale_runs(self, now: datetime) -> int:
+        def apply(conn):
+            cur = conn.execute(
+                """UPDATE runs
+                   SET status='failed', finished_at=:now,
+                       duration_ms = CAST(ROUND((julianday(:now) - julianday(started_at)) * 86400000) AS INTEGER),
+                       exit_code=-1,
+                       error_msg='Server restarted while job was ' || status
+                   WHERE status IN ('running', 'queued')""",
+                {"now": _ts(now)},
+            )
+            return cur.rowcount
+        return await self._write(apply)
+
+    async def upsert_runs(self, runs: list[RunRecord]):
+        cols = ", ".join(RUN_COLUMNS)
+        params = ", ".join("?" for _ in RUN_COLUMNS)
+        updates = ", ".join(f"{c}=excluded.{c}" for c in RUN_COLUMNS[2:])
+        rows = [
+            tuple(_ts(v) if isinstance(v, datetime) else v for v in record_values(r))
+            for r in runs
+        ]
+
+        def apply(conn):
+            conn.executemany(
+                f"""INSERT INTO runs ({cols}) VALUES ({params})
+                    ON CONFLICT (id) DO UPDATE SET {updates}""",
+                rows,
+            )
+        await self._write(apply)
+
+    async def finish_run(self, run_id: str, status: RunStatus, finished_at: datetime,
+                         exit_code: Optional[int], error_msg: Optional[str],
+                         usage: Optional[dict[str, int]] = None,
+                         worker: Optional[str] = None) -> Optional[RunRecord]:
+        usage = usage or {}
+        extra = "".join(f", {c}=:{c}" for c in usage)
+        owned = " AND worker=:worker AND status='running'" if worker else ""
+
+        def apply(conn):
+            cur = conn.execute(
+                f"""UPDATE runs SET status=:status, finished_at=:finished_at,
+                        duration_ms = CAST(ROUND((julianday(:finished_at) - julianday(started_at)) * 86400000) AS INTEGER),
+                        exit_code=:exit_code, error_msg=:error_msg{extra}
+                    WHERE id=:id{owned}""",
+                {"status": status.value, "finished_at": _ts(finished_at), "exit_code": exit_code,
+                 "error_msg": error_msg, "id": run_id, "worker": worker, **usage},
+            )
+            if not cur.rowcount:
+                return None
+            return conn.execute("SELECT * FROM runs WHERE id=?", (run_id,)).fetchone()
+        row = await self._write(apply)
+        return row_to_record(row) if row else None
+
+    async def list_runs(self, limit: int, *, job_id: Optional[str] = None,
+                        statuses: Sequence[RunStatus] = (), triggers: Sequence[TriggerType] = (),
+                        since: Optional[datetime] = None, until: Optional[datetime] = None,
+                        after: Optional[tuple[datetime, str]] = None) -> list[RunListItem]:
+        where, args = [], []
+        if job_id is not None:
+            where.append("job_id = ?")
+            args.append(job_id)
+        if statuses:
+            where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            args.extend(s.value for s in statuses)
+        if triggers:
+            where.append(f"trigger IN ({', '.join('?' for _ in triggers)})")
+            args.extend(t.value for t in triggers)
+        if since is not None:
+            where.append("started_at >= ?")
+            args.append(_ts(since))
+        if until is not None:
+            where.append("started_at < ?")
+            args.append(_ts(until))
+        if after is not None:
+            where.append("(started_at, id) < (?, ?)")
+            args.extend((_ts(after[0]), after[1]))
+        sql = f"SELECT {', '.join(LIST_COLUMNS)} FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        args.append(limit)
+        rows = await self._read(lambda conn: conn.execute(sql, args).fetchall())
+        return [row_to_list_item(r) for r in rows]
+
+    async def get_latest_run(self, job_id: str) -> Optional[RunRecord]:
+        row = await self._read(lambda conn: conn.execute(
+            "SELECT * FROM runs WHERE job_id=? ORDER BY started_at DESC LIMIT 1",
+            (job_id,),
+        ).fetchone())
+        return row_to_record(row) if row else None
+
+    async def get_run(self, run_id: str) -> Optional[RunRecord]:
+        row = await self._read(lambda conn: conn.execute(
+            "SELECT * FROM runs WHERE id=?", (run_id,),
+        ).fetchone())
+        return row_to_record(row) if row else None
+
+    async def get_recent_runs(self, job_id: str, limit: int) -> list[RecentRunSummary]:
+        rows = await self._read(lambda conn: conn.execute(
+            "SELECT id, status, started_at, duration_ms FROM runs WHERE job_id=? ORDER BY started_at DESC LIMIT ?",
+            (job_id, limit),
+        ).fetchall())
+        return [row_to_summary(r) for r in rows]
+
+    async def get_dashboard_runs(self, job_ids: list[str], per_job: int) -> dict[str, list[RecentRunSummary]]:
+        def query(conn):
+            # One index seek per job, all inside a single thread hop
+            rows = []
+            for job_id in job_ids:
+                rows.extend(conn.execute(
+                    """SELECT job_id, id, status, started_at, duration_ms FROM runs
+                       WHERE job_id=? ORDER BY started_at DESC LIMIT ?""",
+                    (job_id, per_job),
+                ).fetchall())
+            return rows
+        return group_summaries(await self._read(query))
+
+    # ── Retention and rollups ─────────────────────────────────
+    # SQLite has no partitioning, so old runs are removed with plain DELETEs
+    # on the started_at index.
+
+    async def get_meta(self, key: str) -> Optional[str]:
+        row = await self._read(lambda conn: conn.execute(
+            "SELECT value FROM cronui_meta WHERE key=?", (key,),
+        ).fetchone())
+        return row["value"] if row else None
+
+    async def set_meta(self, key: str, value: str):
+        await self._write(lambda conn: conn.execute(
+            "INSERT INTO cronui_meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value=excluded.value",
+            (key, value),
+        ))
+
+    async def rollup_daily(self, start: date, through: date):
+        lo = _ts(datetime.combine(start, time(), timezone.utc))
+        hi = _ts(datetime.combine(through + timedelta(days=1), time(), timezone.utc))
+        rows = await self._read(lambda conn: conn.execute(
+            """SELECT substr(started_at, 1, 10) AS day, job_id, status, duration_ms FROM runs
+               WHERE started_at >= ? AND started_at < ? AND status NOT IN ('running', 'queued')
+               ORDER BY day, job_id""",
+            (lo, hi),
+        ).fetchall())
+        stats = [
+            summarize_day(date.fromisoformat(day), job_id, [(r["status"], r["duration_ms"]) for r in group])
+            for (day, job_id), group in groupby(rows, key=lambda r: (r["day"], r["job_id"]))
+        ]
+
+        def apply(conn):
+            conn.execute("DELETE FROM run_daily_stats WHERE day >= ? AND day <= ?",
+                         (start.isoformat(), through.isoformat()))
+            conn.executemany(
+                """INSERT INTO run_daily_stats
+                       (day, job_id, runs, successes, failures, avg_ms, p50_ms, p95_ms, max_ms)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(s.day.isoformat(), s.job_id, s.runs, s.successes, s.failures,
+                  s.avg_ms, s.p50_ms, s.p95_ms, s.max_ms) for s in stats],
+            )
+        await self._write(apply)
+
+    async def get_daily_stats(self, since: date, job_id: Optional[str] = None) -> list[DailyStats]:
+        rows = await self._read(lambda conn: conn.execute(
+            """SELECT * FROM run_daily_stats
+               WHERE day >= :since AND (:job_id IS NULL OR job_id = :job_id)
+               ORDER BY day, job_id""",
+            {"since": since.isoformat(), "job_id": job_id},
+        ).fetchall())
+        return [DailyStats(**dict(r)) for r in rows]
+
+    async def delete_runs_before(self, cutoff: datetime, job_id: Optional[str] = None,
+                                 exclude: Iterable[str] = ()) -> list[str]:
+        exclude = list(exclude)
+        marks = ", ".join("?" for _ in exclude)
+
+        def apply(conn):
+            return conn.execute(
+                f"""DELETE FROM runs
+                    WHERE started_at < ? AND status NOT IN ('running', 'queued')
+                      AND (? IS NULL OR job_id = ?)
+                      AND job_id NOT IN ({marks})
+                    RETURNING log_file""",
+                (_ts(cutoff), job_id, job_id, *exclude),
+            ).fetchall()
+        rows = await self._write(apply)
+        return [r["log_file"] for r in rows if r["log_file"]]
+
+    async def delete_runs_beyond(self, job_id: str, keep: int, before: datetime) -> list[str]:
+        def apply(conn):
+            return conn.execute(
+                """DELETE FROM runs
+                   WHERE job_id = :job_id AND started_at < :before AND status NOT IN ('running', 'queued')
+                     AND started_at < (
+                         SELECT started_at FROM runs WHERE job_id = :job_id
+                         ORDER BY started_at DESC LIMIT 1 OFFSET :keep - 1
+                     )
+                   RETURNING log_file""",
+                {"job_id": job_id, "keep": keep, "before": _ts(before)},
+            ).fetchall()
+        rows = await self._write(apply)
+        return [r["log_file"] for r in rows if r["log_file"]]
+
+    # ── Worker queue ──────────────────────────────────────────
+    # Each claim runs inside the writer's BEGIN IMMEDIATE transaction, which
+    # holds the database write lock, so workers in separate processes on one
+    # host never claim the same run or overrun a job's limit.
+
+    async def enqueue_run(self, run: RunRecord, spec: dict[str, Any], priority: int,
+                          max_concurrency: Optional[int]):
+        cols = ", ".join(RUN_COLUMNS + ("priority", "max_concurrency", "spec", "attempts"))
+        params = ", ".join("?" for _ in range(len(RUN_COLUMNS) + 4))
+        row = tuple(_ts(v) if isinstance(v, datetime) else v for v in record_values(run))
+        await self._write(lambda conn: conn.execute(
+            f"INSERT INTO runs ({cols}) VALUES ({params})",
+            (*row, priority, max_concurrency, json.dumps(spec), 0),
+        ))
+
+    async def claim_runs(self, worker: str, limit: int, now: datetime,
+                         lease_until: datetime) -> list[tuple[RunRecord, dict[str, Any]]]:
+        def apply(conn):
+            running: dict[str, int] = {}
+            chosen = []
+            queued = conn.execute(
+                """SELECT id, job_id, max_concurrency FROM runs WHERE status = 'queued'
+                   ORDER BY priority DESC, queued_at, id"""
+            )
+            for r in queued:
+                if len(chosen) >= limit:
+                    break
+                if r["max_concurrency"] is not None:
+                    if r["job_id"] not in running:
+                        running[r["job_id"]] = conn.execute(
+                            "SELECT count(*) FROM runs WHERE job_id=? AND status='running'",
+                            (r["job_id"],),
+                        ).fetchone()[0]
+                    if running[r["job_id"]] >= r["max_concurrency"]:
+                        continue
+                    running[r["job_id"]] += 1
+                chosen.append(r["id"])
+            queued.close()
+            rows = []
+            for run_id in chosen:
+                rows.append(conn.execute(
+                    """UPDATE runs SET status='running', started_at=:now,
+                           wait_ms = CAST(ROUND((julianday(:now) - julianday(queued_at)) * 86400000) AS INTEGER),
+                           worker=:worker, lease_until=:lease_until, attempts=COALESCE(attempts, 0) + 1
+                       WHERE id=:id RETURNING *""",
+                    {"now": _ts(now), "worker": worker, "lease_until": _ts(lease_until), "id": run_id},
+                ).fetchone())
+            return rows
+        rows = await self._write(apply)
+        return [(row_to_record(r), json.loads(r["spec"] or "{}")) for r in rows]
+
+    async def renew_leases(self, worker: str, run_ids: Sequence[str], lease_until: datetime) -> set[str]:
+        if not run_ids:
+            return set()
+        marks = ", ".join("?" for _ in run_ids)
+        rows = await self._write(lambda conn: conn.execute(
+            f"""UPDATE runs SET lease_until=?
+                WHERE worker=? AND status='running' AND id IN ({marks})
+                RETURNING id""",
+            (_ts(lease_until), worker, *run_ids),
+        ).fetchall())
+        return {r["id"] for r in rows}
+
+    async def reclaim_expired(self, now: datetime, max_attempts: int) -> tuple[int, int]:
+        def apply(conn):
+            failed = conn.execute(
+                """UPDATE runs
+                   SET status='failed', finished_at=:now,
+                       duration_ms = CAST(ROUND((julianday(:now) - julianday(started_at)) * 86400000) AS INTEGER),
+                       exit_code=-1,
+                       error_msg='Lease of worker ' || worker || ' expired after ' || attempts || ' attempt(s)'
+                   WHERE status='running' AND lease_until < :now AND attempts >= :max_attempts""",
+                {"now": _ts(now), "max_attempts": max_attempts},
+            ).rowcount
+            requeued = conn.execute(
+                """UPDATE runs SET status='queued', worker=NULL, lease_until=NULL
+                   WHERE status='running' AND lease_until < ?""",
+                (_ts(now),),
+            ).rowcount
+            return requeued, failed
+        return await self._write(apply)
+
+    async def cancel_active(self, job_id: str, now: datetime) -> int:
+        def apply(conn):
+            return conn.execute(
+                """UPDATE runs
+                   SET status='cancelled', finished_at=:now,
+                       duration_ms = CAST(ROUND((julianday(:now) - julianday(started_at)) * 86400000) AS INTEGER),
+                       error_msg = CASE status WHEN 'queued' THEN 'Cancelled while queued'
+                                               ELSE 'Cancelled by user' END
+                   WHERE job_id=:job_id AND status IN ('queued', 'running')""",
+                {"now": _ts(now), "job_id": job_id},
+            ).rowcount
+        return await self._write(apply)
+
+    async def count_active(self, job_id: str) -> int:
+        row = await self._read(lambda conn: conn.execute(
+            "SELECT count(*) FROM runs WHERE job_id=? AND status IN ('queued', 'running')", (job_id,),
+        ).fetchone())
+        return row[0]
+
+    async def list_active(self) -> dict[str, RunStatus]:
+        rows = await self._read(lambda conn: conn.execute(
+            "SELECT id, status FROM runs WHERE status IN ('queued', 'running')",
+        ).fetchall())
+        return {r["id"]: RunStatus(r["status"]) for r in rows}
@@ -0,0 +1,34 @@
+"""Test setup: an embedded SQLite database and temporary config/log dirs.
+
+The app modules read their settings at import time, so the environment is
+set here, before any test module imports them. `async def` tests run in a
+fresh event loop each.
+"""
+import asyncio
+import inspect
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_root = Path(tempfile.mkdtemp(prefix="cronui-test-"))
+for _name in ("config", "logs"):
+    (_root / _name).mkdir()
+os.environ.update({
+    "CRONUI_DB": "sqlite",
+    "CRONUI_SQLITE_PATH": str(_root / "cronui.db"),
+    "CRONUI_CONFIG_DIR": str(_root / "config"),
+    "CRONUI_LOGS_DIR": str(_root / "logs"),
+    "CRONUI_SCHEDULER": "native",
+    "CRONUI_WARM": "0",
+    "CRONUI_SCRIPT_INDEX_SECONDS": "0",
+})
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        args = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**args))
+        return True
@@ -0,0 +1,85 @@
+"""API tests through the ASGI app, with its lifespan running."""
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import httpx
+
+import db
+import main
+from models import RunRecord, RunStatus
+
+
+@asynccontextmanager
+async def client():
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            yield c
+
+
+async def test_dashboard_includes_buffered_runs(monkeypatch):
+    async with client() as c:
+        # Keep the run in the write-behind buffer until something flushes it
+        monkeypatch.setattr(db, "FLUSH_INTERVAL", 60)
+        await db.insert_run(RunRecord(id="buffered1", job_id="j1", status=RunStatus.running,
+                                      started_at=datetime.now(timezone.utc)))
+        assert "buffered1" in db._pending
+        runs = await db.get_dashboard_runs(["j1"])
+        assert [r.id for r in runs["j1"]] == ["buffered1"]
+        await db.finish_run("buffered1", RunStatus.success, 0)
+
+
+async def test_jobs_etag_follows_runs(tmp_path, monkeypatch):
+    script = tmp_path / "job.py"
+    script.write_text("print('hi')\n")
+    async with client() as c:
+        job = (await c.post("/api/jobs", json={
+            "name": "etag", "script_path": str(script), "schedule": {"frequency": "none"},
+        })).json()
+        first = await c.get("/api/jobs")
+        etag = first.headers["etag"]
+        assert (await c.get("/api/jobs", headers={"If-None-Match": etag})).status_code == 304
+
+        monkeypatch.setattr(db, "FLUSH_INTERVAL", 60)
+        await db.insert_run(RunRecord(id="etagrun1", job_id=job["id"], status=RunStatus.running,
+                                      started_at=datetime.now(timezone.utc)))
+        second = await c.get("/api/jobs", headers={"If-None-Match": etag})
+        assert second.status_code == 200
+        assert second.headers["etag"] != etag
+        mine = next(j for j in second.json() if j["config"]["id"] == job["id"])
+        assert [r["id"] for r in mine["recent_runs"]] == ["etagrun1"]
+        assert mine["last_status"] == "running"
+        # The cached body for the new ETag carries the run too
+        assert (await c.get("/api/jobs")).json() == second.json()
+        again = await c.get("/api/jobs", headers={"If-None-Match": second.headers["etag"]})
+        assert again.status_code == 304
+        await db.finish_run("etagrun1", RunStatus.success, 0)
+        await c.delete(f"/api/jobs/{job['id']}")
+
+
+async def test_log_search_uses_stored_log_path(tmp_path):
+    elsewhere = tmp_path / "moved.log"
+    elsewhere.write_text("start\nneedle here\nend\n")
+    async with client() as c:
+        started = datetime.now(timezone.utc)
+        await db.insert_run(RunRecord(id="movedlog1", job_id="search", status=RunStatus.running,
+                                      started_at=started, log_file=str(elsewhere)))
+        await db.finish_run("movedlog1", RunStatus.success, 0)
+        found = (await c.get("/api/jobs/search/logs/search", params={"q": "needle"})).json()
+        assert [(m["run_id"], m["line"], m["before"], m["after"]) for m in found] == [
+            ("movedlog1", 2, ["start"], ["end"]),
+        ]
+
+
+async def test_deleted_job_drops_duration_metrics(tmp_path):
+    async with client() as c:
+        job = (await c.post("/api/jobs", json={
+            "name": "metrics", "script_path": str(tmp_path / "job.py"), "schedule": {"frequency": "none"},
+        })).json()
+        await db.insert_run(RunRecord(id="metricrun1", job_id=job["id"], status=RunStatus.running,
+                                      started_at=datetime.now(timezone.utc)))
+        await db.finish_run("metricrun1", RunStatus.success, 0)
+        series = f'cronui_run_duration_seconds_count{{job_id="{job["id"]}"}}'
+        assert series in (await c.get("/metrics")).text
+        await c.delete(f"/api/jobs/{job['id']}")
+        assert series not in (await c.get("/metrics")).text
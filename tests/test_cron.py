@@ -0,0 +1,114 @@
+"""cron.CronExpr checked against a brute-force, minute-by-minute reference."""
+from datetime import datetime, timedelta
+
+import pytest
+
+import cron
+
+EXPRESSIONS = [
+    "* * * * *",
+    "*/15 * * * *",
+    "30 */6 * * *",
+    "0 0 */5 * *",
+    "0 0 */10 * *",
+    "0 0 2-20/3 * *",
+    "0 0 * * */2",
+    "0 0 * * 1-5",
+    "0 0 * * 7",
+    "0 0 */5 * */2",
+    "0 0 1,15 * 1",
+    "0 0 13 * 5",
+    "0 12 */7 * 0",
+    "0 0 * jan,jul sun",
+    "5 4 31 * *",
+]
+
+_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _ref_field(spec, low, high):
+    spec = spec.lower()
+    for name, i in cron._MONTH_NAMES.items():
+        spec = spec.replace(name, str(i))
+    for name, i in cron._DOW_NAMES.items():
+        spec = spec.replace(name, str(i))
+    values = set()
+    for part in spec.split(","):
+        base, _, step = part.partition("/")
+        step = int(step or 1)
+        if base == "*":
+            a, b = low, high
+        elif "-" in base:
+            a, b = map(int, base.split("-"))
+        else:
+            a = int(base)
+            b = high if step > 1 else a
+        values.update(range(a, b + 1, step))
+    return values
+
+
+class _Ref:
+    """Set-based matcher, independent of cron.py's bitsets."""
+
+    def __init__(self, expr):
+        fields = expr.split()
+        self.minute, self.hour, self.dom, self.month, self.dow = (
+            _ref_field(f, *r) for f, r in zip(fields, _RANGES))
+        if 7 in self.dow:
+            self.dow.add(0)
+        # Vixie cron: OR only when neither day field starts with "*"
+        self.either = not (fields[2].startswith("*") or fields[4].startswith("*"))
+
+    def day(self, dt):
+        if dt.month not in self.month:
+            return False
+        dom_ok = dt.day in self.dom
+        dow_ok = (dt.weekday() + 1) % 7 in self.dow
+        return (dom_ok or dow_ok) if self.either else (dom_ok and dow_ok)
+
+    def matches(self, dt):
+        return self.day(dt) and dt.hour in self.hour and dt.minute in self.minute
+
+    def next_after(self, dt, limit=timedelta(days=800)):
+        """Checks every minute, skipping only days and hours that can't match."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        end = t + limit
+        while t < end:
+            if not self.day(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hour:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute in self.minute:
+                return t
+            else:
+                t += timedelta(minutes=1)
+        return None
+
+
+@pytest.mark.parametrize("expr", EXPRESSIONS)
+def test_matches_every_day(expr):
+    compiled, ref = cron.parse(expr), _Ref(expr)
+    day = datetime(2023, 1, 1)
+    while day.year < 2025:
+        at = day.replace(hour=min(ref.hour), minute=min(ref.minute))
+        assert compiled.matches(at) == ref.matches(at), at
+        day += timedelta(days=1)
+
+
+@pytest.mark.parametrize("expr", EXPRESSIONS)
+@pytest.mark.parametrize("start", [
+    datetime(2024, 1, 1), datetime(2024, 2, 27, 23, 59), datetime(2023, 12, 30, 18, 7),
+])
+def test_next_after(expr, start):
+    compiled, ref = cron.parse(expr), _Ref(expr)
+    t = start
+    for _ in range(20):
+        expected = ref.next_after(t)
+        assert compiled.next_after(t) == expected, (expr, t)
+        t = expected
+
+
+def test_step_in_day_fields():
+    assert cron.parse("0 0 */5 * *").next_after(datetime(2024, 1, 1)) == datetime(2024, 1, 6)
+    # Jan 2, 2024 is a Tuesday
+    assert cron.parse("0 0 * * */2").next_after(datetime(2024, 1, 2)) == datetime(2024, 1, 4)
@@ -0,0 +1,197 @@
+"""The Storage contract, run against the embedded SQLite backend."""
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+
+from models import RunRecord, RunStatus, TriggerType
+from storage_sqlite import SQLiteStorage
+
+T0 = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@asynccontextmanager
+async def opened(tmp_path):
+    store = SQLiteStorage(tmp_path / "runs.db")
+    await store.open()
+    await store.ensure_table()
+    try:
+        yield store
+    finally:
+        await store.close()
+
+
+def run(run_id, job_id="a", minutes=0, status=RunStatus.success, duration_ms=1000, **fields):
+    started = T0 + timedelta(minutes=minutes)
+    done = status not in (RunStatus.running, RunStatus.queued)
+    return RunRecord(
+        id=run_id, job_id=job_id, status=status, trigger=TriggerType.scheduled, started_at=started,
+        finished_at=started + timedelta(milliseconds=duration_ms) if done else None,
+        duration_ms=duration_ms if done else None, log_file=f"/logs/{run_id}.log", **fields,
+    )
+
+
+def queued(run_id, job_id="a", minutes=0):
+    at = T0 + timedelta(minutes=minutes)
+    return RunRecord(id=run_id, job_id=job_id, status=RunStatus.queued, started_at=at, queued_at=at)
+
+
+# ── Runs ──────────────────────────────────────────────────────
+
+async def test_upsert_and_get(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.upsert_runs([run("r1"), run("r2", minutes=5, status=RunStatus.running)])
+        got = await s.get_run("r1")
+        assert got.status == RunStatus.success and got.started_at == T0 and got.duration_ms == 1000
+        assert (await s.get_latest_run("a")).id == "r2"
+        assert await s.get_run("missing") is None
+        # An upsert overwrites the whole row
+        await s.upsert_runs([run("r2", minutes=5, status=RunStatus.failed, exit_code=2)])
+        got = await s.get_run("r2")
+        assert got.status == RunStatus.failed and got.exit_code == 2
+
+
+async def test_finish_run(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.upsert_runs([run("r1", status=RunStatus.running)])
+        done = await s.finish_run("r1", RunStatus.failed, T0 + timedelta(seconds=3), 1, "boom",
+                                  usage={"cpu_user_ms": 7, "max_rss_kb": 100})
+        assert done.status == RunStatus.failed and done.exit_code == 1 and done.error_msg == "boom"
+        assert done.duration_ms == 3000
+        assert done.cpu_user_ms == 7 and done.max_rss_kb == 100
+        assert await s.finish_run("missing", RunStatus.success, T0, 0, None) is None
+
+
+async def test_cleanup_stale_runs(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.upsert_runs([run("r1", status=RunStatus.running), queued("r2"), run("r3")])
+        assert await s.cleanup_stale_runs(T0 + timedelta(minutes=1)) == 2
+        assert (await s.get_run("r1")).status == RunStatus.failed
+        assert (await s.get_run("r2")).error_msg == "Server restarted while job was queued"
+        assert (await s.get_run("r3")).status == RunStatus.success
+
+
+async def test_list_runs_filters_and_pages(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.upsert_runs([run(f"r{i}", job_id="ab"[i % 2], minutes=i,
+                                 status=RunStatus.failed if i % 3 == 0 else RunStatus.success)
+                             for i in range(10)])
+        assert [r.id for r in await s.list_runs(3)] == ["r9", "r8", "r7"]
+        assert [r.id for r in await s.list_runs(10, job_id="b")] == ["r9", "r7", "r5", "r3", "r1"]
+        assert [r.id for r in await s.list_runs(10, statuses=[RunStatus.failed])] == ["r9", "r6", "r3", "r0"]
+        window = await s.list_runs(10, since=T0 + timedelta(minutes=2), until=T0 + timedelta(minutes=5))
+        assert [r.id for r in window] == ["r4", "r3", "r2"]
+        pages, after = [], None
+        while True:
+            page = await s.list_runs(4, after=after)
+            if not page:
+                break
+            pages.append([r.id for r in page])
+            after = (page[-1].started_at, page[-1].id)
+        assert pages == [["r9", "r8", "r7", "r6"], ["r5", "r4", "r3", "r2"], ["r1", "r0"]]
+
+
+async def test_recent_and_dashboard_runs(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.upsert_runs([run(f"a{i}", "a", minutes=i) for i in range(5)]
+                            + [run(f"b{i}", "b", minutes=i) for i in range(2)])
+        assert [r.id for r in await s.get_recent_runs("a", 3)] == ["a4", "a3", "a2"]
+        dash = await s.get_dashboard_runs(["a", "b", "c"], 2)
+        assert {k: [r.id for r in v] for k, v in dash.items()} == {"a": ["a4", "a3"], "b": ["b1", "b0"]}
+
+
+# ── Retention and rollups ─────────────────────────────────────
+
+async def test_meta(tmp_path):
+    async with opened(tmp_path) as s:
+        assert await s.get_meta("k") is None
+        await s.set_meta("k", "1")
+        await s.set_meta("k", "2")
+        assert await s.get_meta("k") == "2"
+
+
+async def test_delete_runs(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.upsert_runs([run(f"a{i}", "a", minutes=i) for i in range(5)]
+                            + [run("a9", "a", minutes=-10, status=RunStatus.running),
+                               run("b0", "b", minutes=-10)])
+        # Unfinished runs are never deleted
+        gone = await s.delete_runs_before(T0 + timedelta(minutes=1), exclude=["b"])
+        assert gone == ["/logs/a0.log"]
+        gone = await s.delete_runs_beyond("a", 2, T0 + timedelta(days=1))
+        assert sorted(gone) == ["/logs/a1.log", "/logs/a2.log"]
+        assert [r.id for r in await s.list_runs(10)] == ["a4", "a3", "b0", "a9"]
+
+
+async def test_rollup_daily(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.upsert_runs([
+            run("r1", duration_ms=100), run("r2", minutes=1, duration_ms=300),
+            run("r3", minutes=2, status=RunStatus.failed, duration_ms=200),
+            run("r4", minutes=3, status=RunStatus.running),
+            run("r5", "b", minutes=24 * 60),
+        ])
+        await s.rollup_daily(T0.date(), T0.date() + timedelta(days=1))
+        stats = await s.get_daily_stats(date(2024, 3, 1))
+        assert [(d.day, d.job_id, d.runs, d.successes, d.failures) for d in stats] == [
+            (date(2024, 3, 1), "a", 3, 2, 1), (date(2024, 3, 2), "b", 1, 1, 0),
+        ]
+        assert (stats[0].p50_ms, stats[0].max_ms) == (200, 300)
+        assert [d.job_id for d in await s.get_daily_stats(date(2024, 3, 1), job_id="b")] == ["b"]
+
+
+# ── Worker queue ──────────────────────────────────────────────
+
+async def test_claim_order_and_limits(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.enqueue_run(queued("a1", "a", 0), {"n": 1}, 0, 1)
+        await s.enqueue_run(queued("a2", "a", 1), {"n": 2}, 0, 1)
+        await s.enqueue_run(queued("b1", "b", 2), {}, 5, None)
+        await s.enqueue_run(queued("c1", "c", 3), {}, 0, None)
+        now = T0 + timedelta(minutes=10)
+        claimed = await s.claim_runs("w1", 10, now, now + timedelta(seconds=30))
+        # Highest priority first, then oldest; job "a" is limited to one at a time
+        assert [(r.id, r.status) for r, _ in claimed] == [
+            ("b1", RunStatus.running), ("a1", RunStatus.running), ("c1", RunStatus.running),
+        ]
+        assert claimed[1][1] == {"n": 1}
+        assert claimed[1][0].wait_ms == 10 * 60 * 1000
+        assert await s.claim_runs("w2", 10, now, now) == []
+        assert await s.count_active("a") == 2
+        assert await s.list_active() == {
+            "a1": RunStatus.running, "a2": RunStatus.queued,
+            "b1": RunStatus.running, "c1": RunStatus.running,
+        }
+        # Only the owning worker can finish a claimed run
+        assert await s.finish_run("a1", RunStatus.success, now, 0, None, worker="w2") is None
+        assert await s.finish_run("a1", RunStatus.success, now, 0, None, worker="w1") is not None
+        assert [r.id for r, _ in await s.claim_runs("w2", 10, now, now)] == ["a2"]
+
+
+async def test_leases(tmp_path):
+    async with opened(tmp_path) as s:
+        for run_id in ("r1", "r2"):
+            await s.enqueue_run(queued(run_id), {}, 0, None)
+        lease = T0 + timedelta(seconds=30)
+        await s.claim_runs("w1", 10, T0, lease)
+        assert await s.renew_leases("w1", ["r1"], lease + timedelta(minutes=5)) == {"r1"}
+        assert await s.renew_leases("w2", ["r2"], lease) == set()
+        # r2's lease runs out: requeued, then failed once out of attempts
+        assert await s.reclaim_expired(lease + timedelta(seconds=1), max_attempts=2) == (1, 0)
+        assert (await s.get_run("r2")).status == RunStatus.queued
+        await s.claim_runs("w2", 10, lease, lease + timedelta(seconds=30))
+        assert await s.reclaim_expired(lease + timedelta(minutes=1), max_attempts=2) == (0, 1)
+        assert (await s.get_run("r2")).status == RunStatus.failed
+        assert (await s.get_run("r1")).status == RunStatus.running
+
+
+async def test_cancel_active(tmp_path):
+    async with opened(tmp_path) as s:
+        await s.enqueue_run(queued("r1"), {}, 0, None)
+        await s.enqueue_run(queued("r2", minutes=1), {}, 0, None)
+        await s.enqueue_run(queued("b1", "b", minutes=1), {}, 0, None)
+        await s.claim_runs("w1", 1, T0, T0 + timedelta(seconds=30))
+        assert await s.cancel_active("a", T0 + timedelta(minutes=2)) == 2
+        assert (await s.get_run("r1")).error_msg == "Cancelled by user"
+        assert (await s.get_run("r2")).error_msg == "Cancelled while queued"
+        assert await s.count_active("a") == 0
+        assert await s.renew_leases("w1", ["r1"], T0 + timedelta(minutes=5)) == set()
+        assert await s.list_active() == {"b1": RunStatus.queued}
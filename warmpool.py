@@ -0,0 +1,252 @@
+"""Warm execution of .py jobs through a per-interpreter fork server.
+
+A cold run pays interpreter startup plus imports on every trigger. With
+`warm: true` a job's script is instead forked from a long-lived server
+process (warmserver.py) running under the job's interpreter with the
+CRONUI_WARM_PRELOAD modules already imported, and executed with runpy.
+The server is started on first use (or at startup for warm jobs) and
+restarted if it dies.
+
+Warm runs share the server's interpreter state as of its start, so
+PYTHONPATH or venv changes need a restart, and scripts that depend on a
+pristine interpreter (e.g. module-level state mutated by preloads) should
+stay cold.
+"""
+from __future__ import annotations
+
+import array
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+import procstats
+
+ENABLED = os.environ.get("CRONUI_WARM", "1") != "0"
+# Imported once per server, before any fork
+PRELOAD = os.environ.get(
+    "CRONUI_WARM_PRELOAD",
+    "json,re,datetime,pathlib,logging,subprocess,collections,urllib.request",
+)
+
+_SERVER = Path(__file__).parent / "warmserver.py"
+
+
+class WarmError(RuntimeError):
+    """The fork server could not start a run; the caller falls back to cold."""
+
+
+class WarmChild:
+    """A run forked by the server. Same interface as procstats.Child;
+    `pid` is set once the server has forked it."""
+
+    def __init__(self, stdout: asyncio.StreamReader):
+        self.pid: Optional[int] = None
+        self.stdout = stdout
+        self.returncode: Optional[int] = None
+        self.usage: Optional[dict[str, int]] = None
+        loop = asyncio.get_running_loop()
+        self._forked = loop.create_future()
+        self._done = loop.create_future()
+
+    def _started(self, pid: int):
+        self.pid = pid
+        if not self._forked.done():
+            self._forked.set_result(pid)
+
+    def _finish(self, code: int, usage: Optional[dict[str, int]]):
+        self.returncode = code
+        self.usage = usage
+        if not self._done.done():
+            self._done.set_result(code)
+
+    def kill(self):
+        if self.pid and self.returncode is None:
+            procstats.kill_group(self.pid)
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._done)
+
+
+class _Server:
+    def __init__(self, python: str):
+        self.python = python
+        self.proc: Optional[subprocess.Popen] = None
+        self.sock: Optional[socket.socket] = None
+        self.reader_task: Optional[asyncio.Task] = None
+        self._ids = itertools.count()
+        self._send_lock = asyncio.Lock()
+        # request id -> child being forked or running
+        self._children: dict[int, WarmChild] = {}
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None and self.reader_task is not None \
+            and not self.reader_task.done()
+
+    async def start(self):
+        ours, theirs = socket.socketpair()
+        env = dict(os.environ, CRONUI_WARM_PRELOAD=PRELOAD)
+        try:
+            self.proc = subprocess.Popen(
+                [self.python, str(_SERVER), str(theirs.fileno())],
+                pass_fds=[theirs.fileno()], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                env=env, start_new_session=True,
+            )
+        except OSError as exc:
+            ours.close()
+            raise WarmError(f"Could not start fork server for {self.python}: {exc}") from exc
+        finally:
+            theirs.close()
+        ours.setblocking(False)
+        self.sock = ours
+        self.reader_task = asyncio.create_task(self._read())
+        print(f"[CRONUI] Started warm fork server for {self.python} (pid {self.proc.pid})")
+
+    async def _read(self):
+        loop = asyncio.get_running_loop()
+        buf = b""
+        try:
+            while data := await loop.sock_recv(self.sock, 65536):
+                buf += data
+                while b"\n" in buf:
+                    line, buf = buf.split(b"\n", 1)
+                    self._handle(json.loads(line))
+        finally:
+            self._fail_all()
+
+    def _handle(self, msg: dict):
+        rid = msg["id"]
+        if "status" in msg:
+            child = self._children.pop(rid, None)
+            if child:
+                usage = procstats.usage_from_rusage(SimpleNamespace(**msg["rusage"]))
+                child._finish(msg["status"], usage)
+        elif "error" in msg:
+            child = self._children.pop(rid, None)
+            if child and not child._forked.done():
+                child._forked.set_exception(WarmError(msg["error"]))
+        elif rid in self._children:
+            self._children[rid]._started(msg["pid"])
+
+    def _fail_all(self):
+        for child in self._children.values():
+            if not child._forked.done():
+                child._forked.set_exception(WarmError(f"Fork server for {self.python} exited"))
+            else:
+                # Orphaned children are reparented to init; their status is lost
+                child._finish(-1, None)
+        self._children.clear()
+
+    async def spawn(self, script: str, cwd: str, env: dict[str, str],
+                    limits: Optional[dict] = None, profile: Optional[Path] = None) -> WarmChild:
+        loop = asyncio.get_running_loop()
+        rid = next(self._ids)
+        read_fd, write_fd = os.pipe()
+        stdout = asyncio.StreamReader()
+        # Registered before sending so no reply can arrive for an unknown id
+        child = self._children[rid] = WarmChild(stdout)
+        transport = None
+        try:
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(stdout), os.fdopen(read_fd, "rb", buffering=0))
+            data = json.dumps({"id": rid, "script": script, "cwd": cwd, "env": env,
+                               "limits": limits,
+                               "profile": str(profile) if profile else None}).encode() + b"\n"
+            fds = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", [write_fd]))]
+            try:
+                await self._send(data, fds)
+            except OSError as exc:
+                raise WarmError(f"Fork server for {self.python} is gone: {exc}") from exc
+            finally:
+                os.close(write_fd)
+            await child._forked
+        except BaseException:
+            self._children.pop(rid, None)
+            if transport:
+                transport.close()
+            else:
+                os.close(read_fd)
+            raise
+        return child
+
+    async def _send(self, data: bytes, fds):
+        loop = asyncio.get_running_loop()
+        async with self._send_lock:
+            # The fd rides on the first byte; the rest may need more writes
+            while True:
+                try:
+                    sent = self.sock.sendmsg([data], fds)
+                    break
+                except BlockingIOError:
+                    writable = loop.create_future()
+                    loop.add_writer(self.sock, writable.set_result, None)
+                    try:
+                        await writable
+                    finally:
+                        loop.remove_writer(self.sock)
+            if sent < len(data):
+                await loop.sock_sendall(self.sock, data[sent:])
+
+    async def stop(self):
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.sock:
+            self.sock.close()
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            await asyncio.to_thread(self.proc.wait)
+
+
+# interpreter path -> fork server
+_servers: dict[str, _Server] = {}
+_starting: dict[str, asyncio.Task] = {}
+
+
+async def _replace(old: Optional[_Server], new: _Server):
+    if old:
+        await old.stop()
+    await new.start()
+
+
+async def _server(python: str) -> _Server:
+    server = _servers.get(python)
+    if server and server.alive:
+        return server
+    # Concurrent first runs share one startup
+    task = _starting.get(python)
+    if task is None:
+        new = _servers[python] = _Server(python)
+        task = _starting[python] = asyncio.create_task(_replace(server, new))
+        task.add_done_callback(lambda _: _starting.pop(python, None))
+    await asyncio.shield(task)
+    return _servers[python]
+
+
+async def spawn(python: str, script: str, cwd: str, env: dict[str, str],
+                limits: Optional[dict] = None, profile: Optional[Path] = None) -> WarmChild:
+    """Fork `script` from the warm server for `python`, applying the
+    governor spec `limits` in the child and saving cProfile stats to
+    `profile` if given; raises WarmError."""
+    server = await _server(python)
+    return await server.spawn(script, cwd, env, limits, profile)
+
+
+async def prestart(pythons: set[str]):
+    """Start servers ahead of the first warm run, so it doesn't pay preload."""
+    for python in pythons:
+        try:
+            await _server(python)
+        except WarmError as exc:
+            print(f"[CRONUI] {exc}")
+
+
+async def stop():
+    for server in list(_servers.values()):
+        await server.stop()
+    _servers.clear()
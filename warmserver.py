@@ -0,0 +1,203 @@
+"""Fork server for warm .py runs; started by warmpool under a job's interpreter.
+
+Runs in the job's interpreter (a venv may be an older Python without the
+app's dependencies), so it only uses the standard library.
+
+    python warmserver.py <socket fd>
+
+After importing the modules listed in CRONUI_WARM_PRELOAD it reads JSON
+requests {id, script, cwd, env, limits, profile} from the socket, each
+with one fd attached (SCM_RIGHTS) for the run's stdout and stderr. Every
+request is forked into a child that leads its own process group, applies
+`limits` with governor.apply (also standard library only) and runs the
+script with runpy, under cProfile saving to `profile` if that is set. Replies are JSON lines:
+{id, pid} once forked (or {id, error}), then {id, pid, status, rusage}
+when the child has been reaped.
+"""
+import array
+import atexit
+import gc
+import io
+import json
+import os
+import runpy
+import selectors
+import signal
+import socket
+import sys
+import threading
+import traceback
+
+import governor
+
+_RUSAGE = ("ru_utime", "ru_stime", "ru_maxrss", "ru_inblock", "ru_oublock", "ru_nvcsw", "ru_nivcsw")
+
+
+def _preload():
+    for name in filter(None, os.environ.get("CRONUI_WARM_PRELOAD", "").split(",")):
+        try:
+            __import__(name.strip())
+        except Exception as exc:
+            print(f"[CRONUI] Warm preload of {name} failed: {exc}", file=sys.stderr)
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _run_child(req: dict, out_fd: int):
+    """In the forked child: become the script and never return."""
+    code = 1
+    try:
+        os.setpgid(0, 0)
+        os.dup2(out_fd, 1)
+        os.dup2(out_fd, 2)
+        os.close(out_fd)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        os.chdir(req["cwd"])
+        if req.get("limits"):
+            governor.apply(req["limits"])
+        # Apply only the difference; the server usually has the same env
+        env = req["env"]
+        for key in [k for k in os.environ if k not in env]:
+            del os.environ[key]
+        for key, value in env.items():
+            if os.environ.get(key) != value:
+                os.environ[key] = value
+        unbuffered = bool(os.environ.get("PYTHONUNBUFFERED"))
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), write_through=unbuffered)
+        sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), write_through=True,
+                                      errors="backslashreplace")
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False))
+        script = req["script"]
+        sys.argv = [script]
+        sys.path[0] = os.path.dirname(script)
+        prof = None
+        if req.get("profile"):
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+        try:
+            runpy.run_path(script, run_name="__main__")
+            code = 0
+        except SystemExit as exc:
+            if exc.code is None:
+                code = 0
+            elif isinstance(exc.code, int):
+                code = exc.code
+            else:
+                print(exc.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+        if prof is not None:
+            prof.disable()
+            prof.dump_stats(req["profile"])
+        # What interpreter shutdown would do: join threads, run atexit
+        for t in threading.enumerate():
+            if t is not threading.main_thread() and not t.daemon:
+                t.join()
+        atexit._run_exitfuncs()
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code & 0xFF)
+
+
+def main():
+    sock = socket.socket(fileno=int(sys.argv[1]))
+    sock.setblocking(True)
+    _preload()
+    # Keep preloaded objects out of the children's collections, which would
+    # otherwise touch (and so copy) every page of them after the fork
+    gc.freeze()
+
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ)
+    sel.register(wake_r, selectors.EVENT_READ)
+    buf = b""
+    fds: list = []
+    children: dict = {}  # pid -> request id
+
+    def reply(msg: dict):
+        sock.sendall(json.dumps(msg).encode() + b"\n")
+
+    def reap():
+        while children:
+            try:
+                pid, status, ru = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            rid = children.pop(pid, None)
+            reply({"id": rid, "pid": pid, "status": _exit_code(status),
+                   "rusage": {k: getattr(ru, k) for k in _RUSAGE}})
+
+    def fork(req: dict, out_fd: int):
+        try:
+            pid = os.fork()
+        except OSError as exc:
+            os.close(out_fd)
+            reply({"id": req["id"], "error": str(exc)})
+            return
+        if pid == 0:
+            sel.close()
+            sock.close()
+            os.close(wake_r)
+            os.close(wake_w)
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            # Other runs' pipes must not be held open by this one
+            for fd in fds:
+                os.close(fd)
+            _run_child(req, out_fd)
+        os.close(out_fd)
+        # Also set here so the group exists before the app can signal it
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass  # the child already exited
+        children[pid] = req["id"]
+        reply({"id": req["id"], "pid": pid})
+
+    fd_size = array.array("i").itemsize
+    while True:
+        for key, _ in sel.select():
+            if key.fileobj == wake_r:
+                os.read(wake_r, 4096)
+                reap()
+                continue
+            data, ancdata, _, _ = sock.recvmsg(65536, socket.CMSG_SPACE(16 * fd_size))
+            if not data:
+                # The app went away; running children keep going on their own
+                return
+            for level, kind, cdata in ancdata:
+                if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                    got = array.array("i")
+                    got.frombytes(cdata[:len(cdata) - len(cdata) % fd_size])
+                    fds.extend(got)
+            buf += data
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                # Each request carries exactly one fd, sent with its first byte
+                fork(json.loads(line), fds.pop(0))
+
+
+if __name__ == "__main__":
+    main()
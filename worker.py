@@ -0,0 +1,126 @@
+"""Queue worker: claims runs enqueued by the API and executes them.
+
+With CRONUI_EXECUTION=queue the API server only inserts 'queued' rows into
+`runs`. Any number of workers, on one host or several, share the same
+database, config and logs directory and claim those rows:
+
+    python worker.py                       # id defaults to <host>-<pid>
+    python worker.py --id w2 --concurrency 4
+
+A claimed run is 'running' under the worker's id with a lease that the
+worker renews every third of CRONUI_LEASE_SECONDS while the script runs.
+If a worker dies its leases lapse and any worker puts the runs back in the
+queue, or fails them once they have been claimed CRONUI_MAX_ATTEMPTS
+times. A run that is cancelled, or whose lease was taken over, is killed
+at the next renewal. SIGTERM stops claiming and waits for running scripts.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+from datetime import datetime, timedelta, timezone
+
+import db
+import executor
+import logstore
+import warmpool
+from executor import LOGS_DIR
+
+CONCURRENCY = int(os.environ.get("CRONUI_WORKER_CONCURRENCY", str(executor.MAX_CONCURRENCY)))
+# Seconds between claims while the queue looks empty
+POLL = float(os.environ.get("CRONUI_WORKER_POLL", "0.5"))
+LEASE_SECONDS = float(os.environ.get("CRONUI_LEASE_SECONDS", "30"))
+MAX_ATTEMPTS = int(os.environ.get("CRONUI_MAX_ATTEMPTS", "3"))
+
+
+def _lease_until() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=LEASE_SECONDS)
+
+
+async def _renew_loop(worker_id: str):
+    """Keep our leases alive, kill runs we no longer hold, reclaim dead workers' runs."""
+    while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        try:
+            held = executor.active_run_ids()
+            owned = await db.renew_leases(worker_id, held, _lease_until())
+            for run_id in set(held) - owned:
+                # Runs that just finished aren't held either; only live ones are killed
+                if executor.kill_run(run_id):
+                    print(f"[CRONUI] Killed run {run_id}: cancelled or reclaimed by another worker")
+            requeued, failed = await db.reclaim_expired(MAX_ATTEMPTS)
+            if requeued or failed:
+                print(f"[CRONUI] Expired leases: requeued {requeued}, failed {failed} run(s)")
+        except Exception as exc:
+            print(f"[CRONUI] Lease renewal failed: {exc}")
+
+
+async def run(worker_id: str, concurrency: int):
+    await db.init_pool()
+    await db.ensure_table()
+    logstore.start(LOGS_DIR, scan=False)
+    executor.WORKER_ID = worker_id
+
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+    # A finished run frees a slot; claim again right away
+    slot_freed = asyncio.Event()
+    executor.add_finish_listener(lambda *_: slot_freed.set())
+
+    renewer = asyncio.create_task(_renew_loop(worker_id))
+    tasks: set[asyncio.Task] = set()
+    print(f"[CRONUI] Worker {worker_id} started (concurrency {concurrency})")
+    try:
+        while not stopping.is_set():
+            slot_freed.clear()
+            free = concurrency - len(executor.active_run_ids())
+            claimed = []
+            if free > 0:
+                try:
+                    claimed = await db.claim_runs(worker_id, free, _lease_until())
+                except Exception as exc:
+                    print(f"[CRONUI] Claiming runs failed: {exc}")
+            for record, spec in claimed:
+                task = executor.execute_claimed(record, spec)
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            # A full batch means the queue may hold more: claim again at once
+            if free <= 0 or len(claimed) < free:
+                await _wait_any(stopping, slot_freed, POLL)
+        if tasks:
+            print(f"[CRONUI] Worker {worker_id} stopping, waiting for {len(tasks)} run(s)")
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        renewer.cancel()
+        await warmpool.stop()
+        await logstore.stop()
+        await db.close_pool()
+    print(f"[CRONUI] Worker {worker_id} stopped")
+
+
+async def _wait_any(stopping: asyncio.Event, other: asyncio.Event, timeout):
+    waits = [asyncio.ensure_future(stopping.wait()), asyncio.ensure_future(other.wait())]
+    try:
+        await asyncio.wait(waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for w in waits:
+            w.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastCronUI queue worker")
+    parser.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="worker id recorded on claimed runs")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="runs executed at once (CRONUI_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    asyncio.run(run(args.id, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()